@@ -0,0 +1,103 @@
+"""Micro-benchmark of the JSON codec backends.
+
+Measures decode and encode throughput of each installed backend of JsonCodec on the
+example session file and on the dashboard feature table derived from it.
+
+Run from the fermo_gui source directory:
+    python benchmarks/benchmark_json_codec.py --repeat 20
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fermo_gui.analysis.dashboard_manager import DashboardManager
+from fermo_gui.analysis.json_codec import JsonCodec
+
+EXAMPLE = Path(__file__).parent.parent.joinpath(
+    "fermo_gui/upload/example/results/out.fermo.session.json"
+)
+
+
+def throughput(label: str, func: Callable[[], object], size: int, repeat: int):
+    """Print the best-of-repeat throughput of a callable
+
+    Arguments:
+        label: the label to print
+        func: a callable without arguments
+        size: the number of bytes processed per call
+        repeat: the number of calls
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<28} {best * 1e3:8.2f} ms   {size / best / 1e6:8.1f} MB/s")
+
+
+def benchmark(backend: str, repeat: int):
+    """Measure decode and encode throughput of a backend
+
+    Arguments:
+        backend: the name of the backend
+        repeat: the number of calls per measurement
+    """
+    codec = JsonCodec(backend)
+    raw = EXAMPLE.read_bytes()
+    session = codec.loads(raw)
+    manager = DashboardManager()
+    manager.extract_features(session)
+    features = manager.stats_features
+    encoded = codec.dumpb(features)
+
+    print(f"{backend}:")
+    throughput("decode session", lambda: codec.loads(raw), len(raw), repeat)
+    throughput("encode session", lambda: codec.dumpb(session), len(raw), repeat)
+    throughput(
+        "decode feature table", lambda: codec.loads(encoded), len(encoded), repeat
+    )
+    throughput(
+        "encode feature table",
+        lambda: codec.dumps(features, sort_keys=True),
+        len(encoded),
+        repeat,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{EXAMPLE.name}: {EXAMPLE.stat().st_size / 1e6:.1f} MB")
+    for backend in JsonCodec.available():
+        benchmark(backend, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
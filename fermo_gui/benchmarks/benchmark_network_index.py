@@ -0,0 +1,183 @@
+"""Benchmark of dashboard data preparation with the network member index.
+
+Measures how the runtime of building the feature table and the network index
+(DashboardManager.extract_features, extract_network_index) and the size of the
+feature table and network index scale with the number of features and the size of
+the spectral similarity networks. For comparison, the size of a feature table that
+copies the network members into every feature record (the previous layout) is
+reported.
+
+Run from the fermo_gui source directory:
+    python benchmarks/benchmark_network_index.py --features 1000 5000 20000
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fermo_gui.analysis.dashboard_manager import DashboardManager
+
+EXAMPLE = Path(__file__).parent.parent.joinpath(
+    "fermo_gui/upload/example/results/out.fermo.session.json"
+)
+
+
+def create_session(example: dict, n_features: int, network_size: int) -> dict:
+    """Create a synthetic session with networks of equal size
+
+    Arguments:
+        example: the parsed example session, used as template
+        n_features: the number of general features
+        network_size: the number of features per network
+
+    Returns:
+        A session dict
+    """
+    template = next(iter(example["general_features"].values()))
+    spec_template = next(
+        iter(next(iter(example["samples"].values()))["sample_spec_features"].values())
+    )
+    sample_ids = [f"sample_{i}.mzXML" for i in range(4)]
+    f_ids = list(range(1, n_features + 1))
+
+    summary = {
+        str(i): f_ids[start : start + network_size]
+        for i, start in enumerate(range(0, n_features, network_size))
+    }
+    general_features = {}
+    for n_id, members in summary.items():
+        for f_id in members:
+            feature = dict(template)
+            feature["f_id"] = f_id
+            feature["samples"] = sample_ids
+            feature["networks"] = {
+                algorithm: {"network_id": int(n_id)}
+                for algorithm in ("modified_cosine", "ms2deepscore")
+            }
+            general_features[str(f_id)] = feature
+
+    samples = {}
+    for s_id in sample_ids:
+        spec_features = {}
+        for f_id in f_ids:
+            spec = dict(spec_template)
+            spec["f_id"] = f_id
+            spec_features[str(f_id)] = spec
+        samples[s_id] = {
+            "s_id": s_id,
+            "feature_ids": f_ids,
+            "scores": {"diversity": 0.5, "specificity": 0.5, "mean_novelty": 0.5},
+            "sample_spec_features": spec_features,
+        }
+
+    stats = copy.deepcopy(example["stats"])
+    stats["samples"] = sample_ids
+    stats["features"] = n_features
+    stats["groups"]["categories"] = {}
+    stats["networks"] = {
+        algorithm: {"algorithm": algorithm, "subnetworks": {}, "summary": summary}
+        for algorithm in ("modified_cosine", "ms2deepscore")
+    }
+    return {
+        "metadata": example["metadata"],
+        "parameters": example["parameters"],
+        "stats": stats,
+        "general_features": general_features,
+        "samples": samples,
+    }
+
+
+def copied_table_size(manager: DashboardManager) -> int:
+    """Calculate the size of the feature table with copied network members
+
+    Arguments:
+        manager: a DashboardManager after extract_features and extract_network_index
+
+    Returns:
+        The size of the serialized feature table in bytes
+    """
+    index = manager.stats_network_index
+    table = {
+        f_id: {
+            **record,
+            "n_features_cosine": index["modified_cosine"].get(
+                str(record["n_cos_id"]), {}
+            ),
+            "n_features_deepscore": index["ms2deepscore"].get(
+                str(record["n_ms2d_id"]), {}
+            ),
+        }
+        for f_id, record in manager.stats_features.items()
+    }
+    return len(json.dumps(table, separators=(",", ":")))
+
+
+def benchmark(example: dict, n_features: int, network_size: int):
+    """Measure dashboard data preparation for a synthetic session
+
+    Arguments:
+        example: the parsed example session
+        n_features: the number of general features
+        network_size: the number of features per network
+    """
+    session = create_session(example, n_features, network_size)
+    manager = DashboardManager()
+    start = time.perf_counter()
+    manager.extract_network_index(session)
+    manager.extract_features(session)
+    runtime = time.perf_counter() - start
+
+    table = len(json.dumps(manager.stats_features, separators=(",", ":")))
+    index = len(json.dumps(manager.stats_network_index, separators=(",", ":")))
+    print(
+        f"  {n_features:>8} {network_size:>6} {n_features // network_size:>8}"
+        f" {runtime:10.2f} s {table / 1e6:10.2f} MB {index / 1e6:8.2f} MB"
+        f" {copied_table_size(manager) / 1e6:12.2f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--features", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 45])
+    args = parser.parse_args()
+
+    with open(EXAMPLE) as infile:
+        example = json.load(infile)
+
+    print(
+        f"  {'features':>8} {'size':>6} {'networks':>8} {'prepare':>12}"
+        f" {'table':>13} {'index':>11} {'copied table':>15}"
+    )
+    for n_features in args.features:
+        for network_size in args.sizes:
+            benchmark(example, n_features, network_size)
+
+
+if __name__ == "__main__":
+    main()
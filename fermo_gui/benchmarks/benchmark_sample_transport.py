@@ -0,0 +1,127 @@
+"""Size benchmark of the JSON and binary encodings of the sample resources.
+
+Measures decode and encode throughput of each installed backend of JsonCodec on the
+example session file and on the dashboard feature table derived from it.
+
+Run from the fermo_gui source directory:
+    python benchmarks/benchmark_json_codec.py --repeat 20
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fermo_gui.analysis.artifact_manager import ArtifactManager
+from fermo_gui.analysis.column_codec import ColumnCodec
+from fermo_gui.analysis.json_codec import codec
+
+EXAMPLE = Path(__file__).parent.parent.joinpath(
+    "fermo_gui/upload/example/results/out.fermo.session.json"
+)
+
+
+def best_time(func, repeat: int) -> float:
+    """Return the best-of-repeat runtime of a callable in seconds
+
+    Arguments:
+        func: a callable without arguments
+        repeat: the number of calls
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(session: Path, repeat: int):
+    """Measure the sizes and decoding times of the sample resources of a job
+
+    Arguments:
+        session: the path to the session file
+        repeat: the number of calls per time measurement
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shutil.copy(session, Path(tmp_dir).joinpath(ArtifactManager.session_name))
+        _, resources = ArtifactManager(results_dir=Path(tmp_dir)).create_data()
+
+    encodings = ["identity", *ArtifactManager.compress(b"").keys()]
+    print(
+        f"  {'level':<8} {'encoding':<8}"
+        + "".join(f" {name:>12}" for name in encodings)
+        + f" {'decode':>10}"
+    )
+    levels = [None, *ArtifactManager.trace_levels]
+    for max_points in levels:
+        names = [
+            name
+            for name in resources
+            if name.startswith("samples/")
+            and name.endswith(".json")
+            and (
+                (max_points is None and ".lod" not in name)
+                or (max_points is not None and f".lod{max_points}." in name)
+            )
+        ]
+        for label, encode, decode in (
+            ("json", codec.dumpb, codec.loads),
+            ("binary", None, ColumnCodec.decode),
+        ):
+            contents = [
+                (
+                    resources[ArtifactManager.binary_name(name)]
+                    if encode is None
+                    else encode(resources[name])
+                )
+                for name in names
+            ]
+            sizes = {"identity": sum(len(content) for content in contents)}
+            for content in contents:
+                for encoding, compressed in ArtifactManager.compress(content).items():
+                    sizes[encoding] = sizes.get(encoding, 0) + len(compressed)
+            runtime = best_time(
+                lambda contents=contents, decode=decode: [
+                    decode(content) for content in contents
+                ],
+                repeat,
+            )
+            print(
+                f"  {max_points or 'full'!s:<8} {label:<8}"
+                + "".join(f" {sizes[name] / 1e3:9.1f} kB" for name in encodings)
+                + f" {runtime * 1e3:7.2f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--session", type=Path, default=EXAMPLE)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.session.name}: {args.session.stat().st_size / 1e6:.1f} MB")
+    benchmark(args.session, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
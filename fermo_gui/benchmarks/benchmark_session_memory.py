@@ -0,0 +1,180 @@
+"""Benchmark of peak memory during dashboard data preparation.
+
+Compares building the columnar store from the completely loaded session file with
+building it while reading the session incrementally (ColumnarStore.convert), for
+the example session and for a synthetic large session derived from it.
+
+Run from the fermo_gui source directory:
+    python benchmarks/benchmark_session_memory.py --features 30000 --samples 400
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import copy
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+
+EXAMPLE = Path(__file__).parent.parent.joinpath(
+    "fermo_gui/upload/example/results/out.fermo.session.json"
+)
+
+
+def create_synthetic_session(
+    path: Path, n_features: int, n_samples: int, per_sample: int
+):
+    """Write a synthetic session by replicating features of the example session
+
+    Arguments:
+        path: the output path
+        n_features: the number of general features
+        n_samples: the number of samples
+        per_sample: the number of features detected per sample
+    """
+    with open(EXAMPLE) as infile:
+        example = json.load(infile)
+
+    rng = random.Random(42)  # noqa: S311
+    templates = list(example["general_features"].values())
+    spec_templates = [
+        spec
+        for sample in example["samples"].values()
+        for spec in sample["sample_spec_features"].values()
+    ]
+    sample_ids = [f"sample_{i}.mzXML" for i in range(n_samples)]
+    sample_features = {
+        s_id: sorted(rng.sample(range(1, n_features + 1), per_sample))
+        for s_id in sample_ids
+    }
+    feature_samples = {}
+    for s_id, f_ids in sample_features.items():
+        for f_id in f_ids:
+            feature_samples.setdefault(f_id, []).append(s_id)
+
+    session = {
+        "metadata": example["metadata"],
+        "parameters": example["parameters"],
+        "stats": copy.deepcopy(example["stats"]),
+    }
+    session["stats"]["samples"] = sample_ids
+    session["stats"]["features"] = n_features
+    session["stats"]["groups"]["categories"] = {}
+
+    with open(path, "w") as outfile:
+        outfile.write(json.dumps(session)[:-1])
+        outfile.write(', "general_features": {')
+        for f_id in range(1, n_features + 1):
+            feature = dict(templates[f_id % len(templates)])
+            feature["f_id"] = f_id
+            feature["samples"] = feature_samples.get(f_id, [])
+            prefix = "" if f_id == 1 else ", "
+            outfile.write(f'{prefix}"{f_id}": {json.dumps(feature)}')
+        outfile.write('}, "samples": {')
+        for i, (s_id, f_ids) in enumerate(sample_features.items()):
+            spec_features = {}
+            for f_id in f_ids:
+                spec = dict(spec_templates[f_id % len(spec_templates)])
+                spec["f_id"] = f_id
+                spec_features[str(f_id)] = spec
+            sample = {
+                "s_id": s_id,
+                "feature_ids": f_ids,
+                "scores": {"diversity": 0.5, "specificity": 0.5, "mean_novelty": 0.5},
+                "sample_spec_features": spec_features,
+            }
+            prefix = "" if i == 0 else ", "
+            outfile.write(f'{prefix}"{s_id}": {json.dumps(sample)}')
+        outfile.write("}}")
+
+
+def measure(label: str, func) -> dict:
+    """Measure runtime and peak traced memory of a callable
+
+    Arguments:
+        label: the label to print
+        func: a callable without arguments
+
+    Returns:
+        A dict with peak memory in MB and runtime in seconds
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    runtime = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"  {label:<28} peak {peak / 1e6:10.1f} MB   time {runtime:8.2f} s")
+    return {"peak_mb": peak / 1e6, "seconds": runtime}
+
+
+def benchmark(path: Path):
+    """Compare full and incremental dashboard data preparation for a session
+
+    Arguments:
+        path: the path to the session file
+    """
+
+    def _full():
+        with open(path) as infile:
+            f_sess = json.load(infile)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ColumnarStore(results_dir=_results_dir(tmp_dir)).convert(f_sess)
+
+    def _stream():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ColumnarStore(results_dir=_results_dir(tmp_dir)).convert()
+
+    def _results_dir(tmp_dir: str) -> Path:
+        results_dir = Path(tmp_dir)
+        results_dir.joinpath(ColumnarStore.session_name).symlink_to(path.resolve())
+        return results_dir
+
+    print(f"{path.name}: {path.stat().st_size / 1e6:.1f} MB")
+    measure("convert (loaded session)", _full)
+    measure("convert (incremental)", _stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--features", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--per-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    benchmark(EXAMPLE)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir).joinpath("synthetic.session.json")
+        create_synthetic_session(path, args.features, args.samples, args.per_sample)
+        benchmark(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark of session file validation.
+
+Compares jsonschema.validate, which rebuilds the validator on every call, with the
+validator compiled once per process (validate_session) and with the trusted fast
+path (TrustedSessionRegistry.is_trusted), for the example session and for a
+synthetic large session derived from it.
+
+Run from the fermo_gui source directory:
+    python benchmarks/benchmark_session_validation.py --features 30000 --samples 400
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import jsonschema
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_session_memory import EXAMPLE, create_synthetic_session
+
+from fermo_gui.analysis.json_codec import codec
+from fermo_gui.analysis.session_validator import (
+    SCHEMA_PATH,
+    TrustedSessionRegistry,
+    get_validator,
+    validate_session,
+)
+
+
+def timed(label: str, func: Callable[[], object], repeat: int):
+    """Print the best-of-repeat runtime of a callable
+
+    Arguments:
+        label: the label to print
+        func: a callable without arguments
+        repeat: the number of calls
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<36} {best * 1e3:10.1f} ms")
+
+
+def benchmark(path: Path, registry: TrustedSessionRegistry, repeat: int):
+    """Compare the validation paths for a session file
+
+    Arguments:
+        path: the path to the session file
+        registry: a registry in which the session file is registered
+        repeat: the number of calls per measurement
+    """
+
+    def _validate_uncached():
+        schema = codec.load(SCHEMA_PATH)
+        jsonschema.validate(instance=codec.load(path), schema=schema)
+
+    registry.register(path)
+    get_validator()
+
+    print(f"{path.name}: {path.stat().st_size / 1e6:.1f} MB")
+    timed("load + jsonschema.validate", _validate_uncached, repeat)
+    timed(
+        "load + compiled validator", lambda: validate_session(codec.load(path)), repeat
+    )
+    timed("trusted fast path (HMAC)", lambda: registry.is_trusted(path), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--features", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--per-sample", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = TrustedSessionRegistry(
+            registry_dir=Path(tmp_dir).joinpath("trusted_sessions"),
+            secret_key="benchmark",  # noqa: S106
+        )
+        benchmark(EXAMPLE, registry, args.repeat)
+        path = Path(tmp_dir).joinpath("synthetic.session.json")
+        create_synthetic_session(path, args.features, args.samples, args.per_sample)
+        benchmark(path, registry, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,8 +28,16 @@ from typing import Optional
 
 from flask import Flask
 
+from fermo_gui.config.config_cache import configure_cache
 from fermo_gui.config.config_celery import configure_celery
+from fermo_gui.config.config_events import configure_events
+from fermo_gui.config.config_json import configure_json
 from fermo_gui.config.config_mail import configure_mail
+from fermo_gui.config.config_networks import configure_networks
+from fermo_gui.config.config_resources import configure_resources
+from fermo_gui.config.config_reuse import configure_reuse
+from fermo_gui.config.config_validation import configure_validation
+from fermo_gui.config.config_worker import configure_worker
 from fermo_gui.config.extensions import mail
 from fermo_gui.routes import bp
 
@@ -45,8 +53,16 @@ def create_app(test_config: Optional[dict] = None) -> Flask:
     """
     app = Flask(__name__, instance_relative_config=True)
     app = configure_app(app, test_config)
+    app = configure_json(app)
     app = configure_mail(app)
     app = configure_celery(app)
+    app = configure_cache(app)
+    app = configure_events(app)
+    app = configure_resources(app)
+    app = configure_validation(app)
+    app = configure_networks(app)
+    app = configure_worker(app)
+    app = configure_reuse(app)
 
     mail.init_app(app)
 
@@ -0,0 +1,401 @@
+"""Manages precomputed dashboard data stored next to the job results
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, ClassVar, Optional, Self
+
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from fermo_gui.analysis.column_codec import ColumnCodec
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.dashboard_manager import DashboardManager
+from fermo_gui.analysis.json_codec import codec
+from fermo_gui.analysis.network_layout import NetworkLayout
+
+
+class ArtifactManager(BaseModel):
+    """Organizes building, storage, and retrieval of the dashboard data artifact
+
+    The artifact holds the overview data shipped with the dashboard page. It is
+    built once after the fermo_core run (or the session upload), together with the
+    columnar store from which per-sample, per-feature, and per-network data are
+    served, and stored as 'out.fermo.dashboard.json'. A metadata file records its
+    content hash, the hash of the session file it was derived from, and the format
+    version.
+
+    The heavy parts of the dashboard data (the feature table, the index of network
+    members, and the records of each sample) are stored as separate resources in
+    'out.fermo.dashboard/', each next to its precompressed variants, so that they
+    can be sent as they are.
+    The records of each sample are additionally stored with traces downsampled to
+    each of the 'trace_levels', to be shown when the chromatogram is zoomed out;
+    levels that would not shorten any trace of a sample are skipped and served
+    by the full records ('sample_levels' lists the stored ones).
+    Each sample resource also has a binary variant ('.bin'), encoded column-wise
+    by ColumnCodec with the dtypes in 'sample_columns'. Binary resources are not
+    precompressed, since their float payloads hardly shrink.
+
+    Attributes:
+        results_dir: the results directory of the job
+        layout: computes the node coordinates of the networks in the columnar store
+        format_version: incremented whenever the dashboard data layout changes
+        encodings: maps content codings to the suffixes of precompressed variants
+        compress_levels: the compression level (quality) of each content coding
+        trace_levels: the maximum points per trace of the downsampled sample records
+        sample_columns: the ColumnCodec schema of the binary sample resources
+    """
+
+    results_dir: Path
+    layout: NetworkLayout = NetworkLayout()
+    format_version: ClassVar[int] = 8
+
+    session_name: ClassVar[str] = "out.fermo.session.json"
+    artifact_name: ClassVar[str] = "out.fermo.dashboard.json"
+    meta_name: ClassVar[str] = "out.fermo.dashboard.meta.json"
+    resource_dir_name: ClassVar[str] = "out.fermo.dashboard"
+    encodings: ClassVar[dict[str, str]] = {"br": ".br", "gzip": ".gz"}
+    compress_levels: ClassVar[dict[str, int]] = {"br": 5, "gzip": 6}
+    trace_levels: ClassVar[tuple[int, ...]] = (3, 5)
+    sample_columns: ClassVar[dict[str, str]] = {
+        "f_id": "int32",
+        "rt": "float64",
+        "abs_int": "float64",
+        "rel_int": "float64",
+        "trace_rt": "float32[]",
+        "trace_int": "float32[]",
+    }
+
+    @staticmethod
+    def hash_file(path: Path) -> str:
+        """Calculate the sha256 hash of a file in chunks
+
+        Arguments:
+            path: the path to the file
+
+        Returns:
+            The hexadecimal digest
+        """
+        sha = hashlib.sha256()
+        with open(path, "rb") as infile:
+            for chunk in iter(lambda: infile.read(1048576), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def write_atomic(path: Path, content: bytes):
+        """Write content to a temporary file and move it into place
+
+        The temporary file has a unique name, so that concurrent writers of the
+        same file do not interfere; the last one to finish wins.
+
+        Arguments:
+            path: the target path
+            content: the bytes to write
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as outfile:
+                outfile.write(content)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_name)
+            raise
+
+    @classmethod
+    def compress(cls, content: bytes) -> dict[str, bytes]:
+        """Compress content with all available content codings
+
+        Brotli is only used if the optional 'brotli' package is installed.
+
+        Arguments:
+            content: the bytes to compress
+
+        Returns:
+            A dict of content coding to compressed bytes
+        """
+        variants = {
+            "gzip": gzip.compress(
+                content, compresslevel=cls.compress_levels["gzip"], mtime=0
+            )
+        }
+        if brotli is not None:
+            variants["br"] = brotli.compress(content, quality=cls.compress_levels["br"])
+        return variants
+
+    @staticmethod
+    def level_name(name: str, max_points: int) -> str:
+        """Return the name of a sample resource with downsampled traces
+
+        Arguments:
+            name: the name of the sample resource with full traces
+            max_points: the maximum number of points per trace
+
+        Returns:
+            The resource name
+        """
+        return name.replace(".json", f".lod{max_points}.json")
+
+    @staticmethod
+    def binary_name(name: str) -> str:
+        """Return the name of the binary variant of a sample resource
+
+        Arguments:
+            name: the name of the JSON sample resource
+
+        Returns:
+            The resource name
+        """
+        return name.replace(".json", ".bin")
+
+    def resource_path(self: Self, name: str, encoding: Optional[str] = None) -> Path:
+        """Return the path to a stored resource or one of its compressed variants
+
+        Arguments:
+            name: the resource name, relative to the resource directory
+            encoding: the content coding or None for the uncompressed resource
+
+        Returns:
+            The path to the file
+        """
+        path = self.results_dir.joinpath(self.resource_dir_name).joinpath(name)
+        if encoding is None:
+            return path
+        return path.with_name(f"{path.name}{self.encodings[encoding]}")
+
+    def read_meta(self: Self) -> Optional[dict]:
+        """Read the artifact metadata file
+
+        Returns:
+            The metadata dict or None if not available
+        """
+        try:
+            return codec.load(self.results_dir.joinpath(self.meta_name))
+        except (OSError, ValueError):
+            return None
+
+    def is_current(self: Self) -> bool:
+        """Check if an artifact exists and matches the session file and format
+
+        Returns:
+            True if the artifact can be used as is
+        """
+        meta = self.read_meta()
+        if meta is None or meta.get("format_version") != self.format_version:
+            return False
+
+        try:
+            stat = self.results_dir.joinpath(self.session_name).stat()
+        except OSError:
+            return False
+
+        return (
+            self.results_dir.joinpath(self.artifact_name).exists()
+            and self.results_dir.joinpath(self.resource_dir_name).is_dir()
+            and meta.get("session_mtime_ns") == stat.st_mtime_ns
+            and meta.get("session_size") == stat.st_size
+        )
+
+    def create_data(
+        self: Self, session: Optional[dict] = None
+    ) -> tuple[dict, dict[str, Any]]:
+        """Create the dashboard overview data and resources from the columnar store
+
+        The columnar store of the results dir is (re)built if outdated. The
+        overview data references the resources in 'resources'.
+
+        Arguments:
+            session: the parsed session file, if available, to build the store from
+
+        Returns:
+            A tuple of the overview data and a dict of resource name to data
+        """
+        store = ColumnarStore(results_dir=self.results_dir, layout=self.layout)
+        if not store.is_current():
+            store.convert(session)
+        manager = DashboardManager()
+        manager.prepare_data_overview(store)
+        data = manager.provide_data_overview()
+
+        resources = {
+            "features.json": manager.build_feature_table(store),
+            "networks.json": manager.build_columnar_network_index(store),
+        }
+        sample_resources = {}
+        sample_levels = {}
+        for index, sample in enumerate(data["stats_samples"]):
+            name = f"samples/{index}.json"
+            records = manager.build_sample_data(store, sample)
+            self.add_sample_resource(resources, name, records)
+            sample_resources[sample] = name
+            sample_levels[sample] = {}
+            longest = max(
+                (
+                    len(record["trace_rt"])
+                    for record in records
+                    if record["trace_rt"] is not None
+                ),
+                default=0,
+            )
+            for max_points in self.trace_levels:
+                if longest <= max_points:
+                    continue
+                level_name = self.level_name(name, max_points)
+                self.add_sample_resource(
+                    resources,
+                    level_name,
+                    manager.decimate_records(records, max_points),
+                )
+                sample_levels[sample][str(max_points)] = level_name
+        data["resources"] = {
+            "features": "features.json",
+            "networks": "networks.json",
+            "samples": sample_resources,
+            "sample_levels": sample_levels,
+            "trace_levels": list(self.trace_levels),
+        }
+        return data, resources
+
+    def add_sample_resource(
+        self: Self, resources: dict[str, Any], name: str, records: list
+    ):
+        """Add the records of a sample and their binary variant to the resources
+
+        Arguments:
+            resources: a dict of resource name to data, to add to
+            name: the name of the JSON sample resource
+            records: the feature records of the sample
+        """
+        resources[name] = records
+        resources[self.binary_name(name)] = ColumnCodec.encode(
+            records, self.sample_columns
+        )
+
+    def store_resources(self: Self, resources: dict[str, Any]):
+        """Store resources and their compressed variants in the resource directory
+
+        The directory is assembled next to the old one and swapped in at the end:
+        the old directory is renamed aside, the new one renamed into place, and
+        only then the old one deleted, so that the resources are never missing for
+        concurrent readers for longer than between two renames. It is made
+        world-readable to allow a reverse proxy to serve the files.
+
+        Arguments:
+            resources: a dict of resource name to json-compatible data or bytes
+        """
+        target = self.results_dir.joinpath(self.resource_dir_name)
+        tmp_dir = Path(
+            tempfile.mkdtemp(prefix=f".{self.resource_dir_name}.", dir=self.results_dir)
+        )
+        old_dir = tmp_dir.with_name(f"{tmp_dir.name}.old")
+        try:
+            os.chmod(tmp_dir, 0o755)  # noqa: S103
+            for name, value in resources.items():
+                path = tmp_dir.joinpath(name)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                content = value if isinstance(value, bytes) else codec.dumpb(value)
+                path.write_bytes(content)
+                if path.suffix == ".bin":
+                    continue
+                for encoding, compressed in self.compress(content).items():
+                    path.with_name(
+                        f"{path.name}{self.encodings[encoding]}"
+                    ).write_bytes(compressed)
+            with contextlib.suppress(FileNotFoundError):
+                os.replace(target, old_dir)
+            os.replace(tmp_dir, target)
+        except OSError:
+            if old_dir.exists() and not target.exists():
+                os.replace(old_dir, target)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def store(self: Self, data: dict):
+        """Store the dashboard data and its metadata in the results dir
+
+        The resource version in data['resources'] is set from the session hash.
+
+        Arguments:
+            data: the dashboard overview data as json-compatible dict
+        """
+        session_path = self.results_dir.joinpath(self.session_name)
+        stat = session_path.stat()
+        session_sha256 = self.hash_file(session_path)
+        if "resources" in data:
+            data["resources"][
+                "version"
+            ] = f"{self.format_version}-{session_sha256[:16]}"
+
+        content = codec.dumpb(data)
+        self.write_atomic(self.results_dir.joinpath(self.artifact_name), content)
+
+        meta = {
+            "format_version": self.format_version,
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "size": len(content),
+            "session_sha256": session_sha256,
+            "session_mtime_ns": stat.st_mtime_ns,
+            "session_size": stat.st_size,
+        }
+        self.write_atomic(
+            self.results_dir.joinpath(self.meta_name),
+            codec.dumpb(meta, indent=True),
+        )
+
+    def build(self: Self, session: Optional[dict] = None) -> dict:
+        """Build the dashboard overview data and resources and store them
+
+        Arguments:
+            session: the parsed session file, if available, to avoid reading it again
+
+        Returns:
+            The dashboard overview data as json-compatible dict
+        """
+        data, resources = self.create_data(session)
+        self.store_resources(resources)
+        self.store(data)
+        return data
+
+    def read(self: Self) -> dict:
+        """Read the stored dashboard data
+
+        Returns:
+            The dashboard overview data as json-compatible dict
+
+        Raises:
+            FileNotFoundError: no artifact available
+        """
+        return codec.load(self.results_dir.joinpath(self.artifact_name))
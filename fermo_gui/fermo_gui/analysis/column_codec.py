@@ -0,0 +1,243 @@
+"""Encodes tabular dashboard data as a binary container of typed arrays
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import struct
+from typing import Any, ClassVar, Union
+
+import numpy as np
+
+from fermo_gui.analysis.json_codec import codec
+
+
+class ColumnCodec:
+    """Encodes lists of records column-wise into typed arrays and decodes them.
+
+    The container starts with the magic bytes 'FRMC' and the length of a JSON
+    header (uint32), followed by the header and the column buffers. The header
+    holds the container version, the number of records, and the dtype, byte
+    offset, and element count of each column. Buffers are little-endian and
+    aligned to 8 bytes, so that a browser can view them as typed arrays without
+    copying.
+
+    A schema maps field names to dtypes ('int32', 'float32', 'float64'). Fields
+    holding a list per record are marked with '[]' (e.g. 'float32[]'); their
+    values are concatenated and delimited by an int32 column of n + 1 offsets,
+    named in the 'offsets' entry of the column. List fields of equal lengths per
+    record (e.g. the retention times and intensities of traces) share their
+    offsets. Missing values are encoded as NaN for floats, -1 for integers, and
+    an empty list for list fields.
+
+    Attributes:
+        magic: the first bytes of every container
+        version: incremented whenever the container layout changes
+        mimetype: the media type of the container
+        dtypes: the supported dtypes and their numpy equivalents
+    """
+
+    magic: ClassVar[bytes] = b"FRMC"
+    version: ClassVar[int] = 1
+    mimetype: ClassVar[str] = "application/vnd.fermo.columns"
+    dtypes: ClassVar[dict[str, str]] = {
+        "int32": "<i4",
+        "float32": "<f4",
+        "float64": "<f8",
+    }
+
+    @staticmethod
+    def pad(size: int) -> int:
+        """Return the number of bytes to append to reach an 8-byte boundary
+
+        Arguments:
+            size: the current size in bytes
+
+        Returns:
+            The number of padding bytes
+        """
+        return -size % 8
+
+    @classmethod
+    def to_array(cls, values: list, dtype: str) -> np.ndarray:
+        """Convert values to a little-endian array, replacing missing values
+
+        Arguments:
+            values: the values of a column
+            dtype: one of the supported dtypes
+
+        Returns:
+            The array
+        """
+        missing = -1 if dtype == "int32" else np.nan
+        return np.asarray(
+            [missing if value is None else value for value in values],
+            dtype=cls.dtypes[dtype],
+        )
+
+    @classmethod
+    def encode(cls, records: list[dict], schema: dict[str, str]) -> bytes:
+        """Encode records as a container of typed arrays
+
+        Arguments:
+            records: the records; fields not in the schema are dropped
+            schema: maps field names to dtypes
+
+        Returns:
+            The container bytes
+
+        Raises:
+            ValueError: unsupported dtype in the schema
+        """
+        arrays = {}
+        columns = {}
+        for name, dtype in schema.items():
+            if dtype.endswith("[]") and dtype[:-2] in cls.dtypes:
+                lists = [record.get(name) or [] for record in records]
+                offsets = np.zeros(len(lists) + 1, dtype=cls.dtypes["int32"])
+                offsets[1:] = np.cumsum([len(values) for values in lists])
+                offsets_name = next(
+                    (
+                        other
+                        for other, (_, array) in arrays.items()
+                        if other.endswith(".offsets") and np.array_equal(array, offsets)
+                    ),
+                    f"{name}.offsets",
+                )
+                arrays.setdefault(offsets_name, ("int32", offsets))
+                arrays[name] = (
+                    dtype[:-2],
+                    cls.to_array(
+                        [value for values in lists for value in values], dtype[:-2]
+                    ),
+                )
+                columns[name] = {"offsets": offsets_name}
+            elif dtype in cls.dtypes:
+                arrays[name] = (
+                    dtype,
+                    cls.to_array([record.get(name) for record in records], dtype),
+                )
+            else:
+                raise ValueError(f"Unsupported dtype '{dtype}' of field '{name}'.")
+
+        position = 0
+        for name, (dtype, array) in arrays.items():
+            columns[name] = {
+                "dtype": dtype,
+                "offset": position,
+                "count": len(array),
+                **columns.get(name, {}),
+            }
+            position += array.nbytes + cls.pad(array.nbytes)
+
+        header = codec.dumpb(
+            {"version": cls.version, "length": len(records), "columns": columns}
+        )
+        header += b" " * cls.pad(len(cls.magic) + 4 + len(header))
+
+        parts = [cls.magic, struct.pack("<I", len(header)), header]
+        for _, array in arrays.values():
+            parts.append(array.tobytes())
+            parts.append(b"\0" * cls.pad(array.nbytes))
+        return b"".join(parts)
+
+    @classmethod
+    def read_header(cls, data: bytes) -> tuple[dict, int]:
+        """Read the header of a container
+
+        Arguments:
+            data: the container bytes
+
+        Returns:
+            A tuple of the header and the offset of the first buffer
+
+        Raises:
+            ValueError: not a container or unsupported version
+        """
+        if data[: len(cls.magic)] != cls.magic or len(data) < len(cls.magic) + 4:
+            raise ValueError("Not a column container.")
+        (length,) = struct.unpack_from("<I", data, len(cls.magic))
+        start = len(cls.magic) + 4
+        header = codec.loads(data[start : start + length])
+        if header.get("version") != cls.version:
+            raise ValueError(
+                f"Unsupported column container version: {header.get('version')}"
+            )
+        return header, start + length
+
+    @classmethod
+    def decode(cls, data: bytes) -> dict[str, Union[np.ndarray, list[np.ndarray]]]:
+        """Decode a container into arrays, splitting list fields per record
+
+        Arguments:
+            data: the container bytes
+
+        Returns:
+            A dict of field name to array, or list of arrays for list fields
+
+        Raises:
+            ValueError: not a container or unsupported version
+        """
+        header, start = cls.read_header(data)
+        arrays = {
+            name: np.frombuffer(
+                data,
+                dtype=cls.dtypes[column["dtype"]],
+                count=column["count"],
+                offset=start + column["offset"],
+            )
+            for name, column in header["columns"].items()
+        }
+        columns = {}
+        for name, array in arrays.items():
+            if name.endswith(".offsets"):
+                continue
+            offsets_name = header["columns"][name].get("offsets")
+            if offsets_name is None:
+                columns[name] = array
+            else:
+                offsets = arrays[offsets_name]
+                columns[name] = [
+                    array[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)
+                ]
+        return columns
+
+    @classmethod
+    def to_records(cls, columns: dict[str, Any]) -> list[dict]:
+        """Convert decoded columns back into records of Python values
+
+        Arguments:
+            columns: the decoded columns
+
+        Returns:
+            A list of records; NaN is returned as None
+        """
+
+        def _value(value):
+            if isinstance(value, np.ndarray):
+                return value.tolist()
+            value = value.item()
+            return None if isinstance(value, float) and np.isnan(value) else value
+
+        length = len(next(iter(columns.values()))) if columns else 0
+        return [
+            {name: _value(values[i]) for name, values in columns.items()}
+            for i in range(length)
+        ]
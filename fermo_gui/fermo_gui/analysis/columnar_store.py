@@ -0,0 +1,769 @@
+"""Columnar, memory-mappable representation of a session file
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import os
+import re
+import shutil
+import tempfile
+from array import array
+from pathlib import Path
+from typing import ClassVar, Optional, Self
+
+import numpy as np
+from pydantic import BaseModel
+
+from fermo_gui.analysis.json_codec import codec
+from fermo_gui.analysis.network_layout import NetworkLayout
+from fermo_gui.analysis.session_stream import SessionStreamReader
+
+
+class ColumnarStore(BaseModel):
+    """Organizes conversion of a session file into columns and their loading
+
+    The store is a directory 'out.fermo.columnar' next to the session file. Per
+    feature scalars are typed arrays sorted by feature ID; per sample features are
+    rows of entry arrays, delimited by 'sample_offsets'; traces are concatenated
+    buffers, delimited by 'trace_offsets'. The remaining per feature information
+    (annotations, networks, ...) is stored as offset-indexed JSON records, the
+    remaining sections as JSON side tables. Arrays are loaded memory-mapped, so
+    slicing them does not copy data.
+
+    The edges of the spectral similarity networks are indexed per algorithm as
+    adjacency lists of feature rows ('adjacency_<algorithm>_*'), delimited by
+    offsets and sorted by descending edge weight. Node coordinates of the networks
+    are stored in 'layouts.json'; changing the layout settings outdates the store.
+
+    For filtering, the best phenotype and match scores, the network ID per algorithm
+    ('network_<algorithm>'), and the membership of features and samples in the
+    group categories listed in 'meta.json' are stored as well, as one bitset per
+    category over the feature rows ('category_features') and over the samples
+    ('category_samples'), packed with numpy.packbits.
+
+    The fold changes of the features between the categories of each group are
+    stored as one dense row per ordered category pair ('fold_changes'), in the
+    order of the pairs listed in 'meta.json'. A row holds the factor reported by
+    fermo_core where the first category has the higher mean area, and its
+    reciprocal where it has the lower one; NaN where no factor was reported.
+
+    For searching, the feature rows are additionally stored sorted by m/z and by
+    retention time ('mz_order', 'mz_sorted', 'rt_order', 'rt_sorted'; NaN last),
+    and the tokens of the annotation names are indexed as postings lists of
+    feature rows and fields ('search_*'), delimited by offsets in the order of
+    the sorted tokens in 'search_tokens.json'.
+
+    Missing values are stored as NaN for floats and as -1 for 'blank' and network
+    IDs.
+
+    Attributes:
+        results_dir: the results directory of the job
+        columns: the memory-mapped arrays loaded so far
+        sample_index: maps sample identifiers to their position in the store
+        layout: computes the node coordinates of the networks
+        format_version: incremented whenever the layout of the store changes
+    """
+
+    results_dir: Path
+    columns: dict = {}
+    sample_index: dict = {}
+    layout: NetworkLayout = NetworkLayout()
+    format_version: ClassVar[int] = 9
+
+    session_name: ClassVar[str] = "out.fermo.session.json"
+    dir_name: ClassVar[str] = "out.fermo.columnar"
+    side_fields: ClassVar[tuple] = (
+        "samples",
+        "group_factors",
+        "height_per_sample",
+        "area_per_sample",
+        "annotations",
+    )
+    search_fields: ClassVar[tuple] = ("match", "class", "adduct")
+
+    @property
+    def path(self: Self) -> Path:
+        """Return the path to the store directory"""
+        return self.results_dir.joinpath(self.dir_name)
+
+    def read_json(self: Self, name: str) -> dict:
+        """Read a JSON side table of the store
+
+        Arguments:
+            name: the name of the side table without extension
+
+        Returns:
+            The parsed side table
+        """
+        return codec.load(self.path.joinpath(f"{name}.json"))
+
+    def is_current(self: Self) -> bool:
+        """Check if the store exists and matches the session file, format, and layout
+
+        Returns:
+            True if the store can be used as is
+        """
+        try:
+            meta = self.read_json("meta")
+            stat = self.results_dir.joinpath(self.session_name).stat()
+        except (OSError, ValueError):
+            return False
+
+        return (
+            meta.get("format_version") == self.format_version
+            and meta.get("layout") == self.layout.model_dump()
+            and meta.get("session_mtime_ns") == stat.st_mtime_ns
+            and meta.get("session_size") == stat.st_size
+        )
+
+    def convert(self: Self, session: Optional[dict] = None):
+        """Convert the session file into the columnar store
+
+        The session file is read incrementally, unless the already parsed session
+        is provided; the store is written to a temporary directory and moved into
+        place when complete. The old store is renamed aside before and deleted
+        only afterwards, so that the store path is never missing for longer than
+        between two renames. If a concurrent conversion finished first, its result
+        is kept.
+
+        Arguments:
+            session: the parsed session file, if available; not modified
+
+        Raises:
+            FileNotFoundError: session file does not exist
+            ValueError: session file is not valid JSON
+        """
+        session_path = self.results_dir.joinpath(self.session_name)
+        stat = session_path.stat()
+
+        features = {
+            "f_id": array("q"),
+            "mz": array("d"),
+            "rt": array("d"),
+            "area": array("d"),
+            "novelty": array("d"),
+            "blank": array("b"),
+            "n_samples": array("q"),
+            "phenotype_score": array("d"),
+            "match_score": array("d"),
+            "has_adducts": array("b"),
+        }
+        feature_networks = {}
+        fold_records = {}
+        search_postings = set()
+        side_records = []
+        entries = {
+            "entry_f_id": array("q"),
+            "entry_has_spec": array("b"),
+            "entry_rt": array("d"),
+            "entry_intensity": array("d"),
+            "entry_rel_intensity": array("d"),
+        }
+        sample_offsets = array("q", [0])
+        trace_offsets = array("q", [0])
+        trace_rt = array("d")
+        trace_int = array("d")
+        samples = {}
+
+        def _float(value) -> float:
+            return float("nan") if value is None else float(value)
+
+        def _on_feature(f_id: str, g_info: dict):
+            features["f_id"].append(int(f_id))
+            features["mz"].append(_float(g_info.get("mz")))
+            features["rt"].append(_float(g_info.get("rt")))
+            features["area"].append(_float(g_info.get("area")))
+            features["novelty"].append(_float(g_info.get("scores", {}).get("novelty")))
+            blank = g_info.get("blank")
+            features["blank"].append(-1 if blank is None else int(blank))
+            features["n_samples"].append(len(g_info.get("samples") or []))
+            annotations = g_info.get("annotations") or {}
+            for name, key in (
+                ("phenotype_score", "phenotypes"),
+                ("match_score", "matches"),
+            ):
+                best = (annotations.get(key) or [{}])[0]
+                features[name].append(_float(best.get("score")))
+            features["has_adducts"].append(annotations.get("adducts") is not None)
+            record = {key: g_info[key] for key in self.side_fields if key in g_info}
+            record["networks"] = {
+                algorithm: {"network_id": network["network_id"]}
+                for algorithm, network in g_info.get("networks", {}).items()
+                if "network_id" in network
+            }
+            for algorithm, network in record["networks"].items():
+                feature_networks.setdefault(algorithm, {})[len(side_records)] = int(
+                    network["network_id"]
+                )
+            for token, field in self.search_tokens(annotations):
+                search_postings.add((token, len(side_records), field))
+            if g_info.get("group_factors"):
+                fold_records[len(side_records)] = (
+                    g_info["group_factors"],
+                    {
+                        entry.get("s_id"): entry.get("value") or 0.0
+                        for entry in g_info.get("area_per_sample") or []
+                    },
+                )
+            side_records.append(codec.dumpb(record))
+
+        def _on_sample(s_id: str, sample_data: dict):
+            samples[s_id] = {"scores": sample_data.get("scores", {})}
+            spec_features = sample_data.get("sample_spec_features", {})
+            for f_id in sample_data.get("feature_ids", []):
+                f_info = spec_features.get(str(f_id))
+                entries["entry_f_id"].append(int(f_id))
+                entries["entry_has_spec"].append(f_info is not None)
+                f_info = f_info or {}
+                entries["entry_rt"].append(_float(f_info.get("rt")))
+                entries["entry_intensity"].append(_float(f_info.get("intensity")))
+                entries["entry_rel_intensity"].append(
+                    _float(f_info.get("rel_intensity"))
+                )
+                f_trace_rt = f_info.get("trace_rt") or []
+                f_trace_int = f_info.get("trace_int") or []
+                if len(f_trace_rt) != len(f_trace_int):
+                    raise ValueError(
+                        f"Session file malformed: traces of feature '{f_id}' in "
+                        f"sample '{s_id}' have unequal length."
+                    )
+                trace_rt.extend(f_trace_rt)
+                trace_int.extend(f_trace_int)
+                trace_offsets.append(len(trace_rt))
+            sample_offsets.append(len(entries["entry_f_id"]))
+
+        handlers = {"general_features": _on_feature, "samples": _on_sample}
+        if session is None:
+            sections = SessionStreamReader(path=session_path).read(handlers)
+        else:
+            sections = {}
+            for key, value in session.items():
+                if key in handlers:
+                    for item_key, item in value.items():
+                        handlers[key](item_key, item)
+                else:
+                    sections[key] = value
+
+        stats = sections.get("stats", {})
+        networks = {}
+        if isinstance(stats, dict):
+            networks = stats.get("networks", {})
+            sections["stats"] = {
+                key: value for key, value in stats.items() if key != "networks"
+            }
+
+        network_summary = {
+            algorithm: network.get("summary", {})
+            for algorithm, network in networks.items()
+        }
+        tmp_dir = Path(
+            tempfile.mkdtemp(prefix=f".{self.dir_name}.", dir=self.results_dir)
+        )
+
+        order = np.argsort(np.asarray(features["f_id"], dtype=np.int64), kind="stable")
+        for name, values in features.items():
+            dtype = bool if name == "has_adducts" else None
+            np.save(
+                tmp_dir.joinpath(f"{name}.npy"), np.asarray(values, dtype=dtype)[order]
+            )
+
+        sorted_f_ids = np.asarray(features["f_id"], dtype=np.int64)[order]
+        for name in ("mz", "rt"):
+            values = np.asarray(features[name])[order]
+            value_order = np.argsort(values, kind="stable")
+            np.save(tmp_dir.joinpath(f"{name}_order.npy"), value_order)
+            np.save(tmp_dir.joinpath(f"{name}_sorted.npy"), values[value_order])
+
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        tokens, search_index = self.build_search_index(search_postings, rank)
+        for name, values in search_index.items():
+            np.save(tmp_dir.joinpath(f"search_{name}.npy"), values)
+        for algorithm, network in networks.items():
+            offsets, rows, weights = self.build_adjacency(sorted_f_ids, network)
+            for name, values in (
+                ("offsets", offsets),
+                ("rows", rows),
+                ("weights", weights),
+            ):
+                np.save(tmp_dir.joinpath(f"adjacency_{algorithm}_{name}.npy"), values)
+            network_ids = np.full(len(order), -1, dtype=np.int64)
+            positions = feature_networks.get(algorithm, {})
+            network_ids[list(positions)] = list(positions.values())
+            np.save(tmp_dir.joinpath(f"network_{algorithm}.npy"), network_ids[order])
+
+        categories = []
+        groups = sections.get("stats", {}).get("groups", {})
+        if isinstance(groups, dict) and isinstance(groups.get("categories"), dict):
+            for group_id, group_categories in groups["categories"].items():
+                for category, details in group_categories.items():
+                    categories.append((group_id, category, details))
+        sample_rows = {s_id: i for i, s_id in enumerate(samples)}
+        category_features = np.zeros((len(categories), len(order)), dtype=bool)
+        category_samples = np.zeros((len(categories), len(samples)), dtype=bool)
+        for i, (_, _, details) in enumerate(categories):
+            rows = self.lookup_rows(sorted_f_ids, details.get("f_ids", []))
+            category_features[i, rows[rows != -1]] = True
+            for s_id in details.get("s_ids", []):
+                if s_id in sample_rows:
+                    category_samples[i, sample_rows[s_id]] = True
+        np.save(
+            tmp_dir.joinpath("category_features.npy"),
+            np.packbits(category_features, axis=1),
+        )
+        np.save(
+            tmp_dir.joinpath("category_samples.npy"),
+            np.packbits(category_samples, axis=1),
+        )
+        fold_pairs, fold_changes = self.build_fold_changes(
+            categories, fold_records, len(order)
+        )
+        np.save(tmp_dir.joinpath("fold_changes.npy"), fold_changes[:, order])
+
+        side_offsets = np.zeros(len(side_records) + 1, dtype=np.int64)
+        with open(tmp_dir.joinpath("side_records.bin"), "wb") as outfile:
+            for i, row in enumerate(order):
+                outfile.write(side_records[row])
+                side_offsets[i + 1] = side_offsets[i] + len(side_records[row])
+        np.save(tmp_dir.joinpath("side_offsets.npy"), side_offsets)
+
+        for name, values in entries.items():
+            dtype = bool if name == "entry_has_spec" else None
+            np.save(tmp_dir.joinpath(f"{name}.npy"), np.asarray(values, dtype=dtype))
+        np.save(tmp_dir.joinpath("sample_offsets.npy"), np.asarray(sample_offsets))
+        np.save(tmp_dir.joinpath("trace_offsets.npy"), np.asarray(trace_offsets))
+        np.save(tmp_dir.joinpath("trace_rt.npy"), np.asarray(trace_rt))
+        np.save(tmp_dir.joinpath("trace_int.npy"), np.asarray(trace_int))
+
+        for name, content in (
+            ("sections", sections),
+            ("networks", networks),
+            ("network_summary", network_summary),
+            ("layouts", self.layout.layout_networks(networks)),
+            ("samples", samples),
+            ("search_tokens", tokens),
+            (
+                "meta",
+                {
+                    "format_version": self.format_version,
+                    "session_mtime_ns": stat.st_mtime_ns,
+                    "session_size": stat.st_size,
+                    "sample_ids": list(samples),
+                    "adjacency": list(networks),
+                    "layout": self.layout.model_dump(),
+                    "categories": [
+                        [group_id, category] for group_id, category, _ in categories
+                    ],
+                    "fold_pairs": [list(pair) for pair in fold_pairs],
+                    "trace_rt_range": (
+                        [min(trace_rt), max(trace_rt)] if len(trace_rt) > 0 else None
+                    ),
+                },
+            ),
+        ):
+            codec.dump(content, tmp_dir.joinpath(f"{name}.json"))
+
+        old_dir = tmp_dir.with_name(f"{tmp_dir.name}.old")
+        try:
+            with contextlib.suppress(FileNotFoundError):
+                os.replace(self.path, old_dir)
+            os.replace(tmp_dir, self.path)
+        except OSError:
+            if old_dir.exists() and not self.path.exists():
+                os.replace(old_dir, self.path)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not self.is_current():
+                raise
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self.columns = {}
+        self.sample_index = {}
+
+    @staticmethod
+    def lookup_rows(f_ids: np.ndarray, values) -> np.ndarray:
+        """Find the rows of feature identifiers in the sorted feature identifiers
+
+        Arguments:
+            f_ids: the sorted feature identifiers
+            values: the feature identifiers to look up
+
+        Returns:
+            An array of row indices, -1 for identifiers not found
+        """
+        values = np.asarray(values, dtype=np.int64)
+        rows = np.searchsorted(f_ids, values)
+        found = rows < len(f_ids)
+        found[found] = f_ids[rows[found]] == values[found]
+        return np.where(found, rows, -1)
+
+    @staticmethod
+    def build_adjacency(
+        f_ids: np.ndarray, network: dict
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Build the adjacency lists of the features from the network edges
+
+        Edges are undirected and therefore added in both directions; edges between
+        features not in the store are skipped.
+
+        Arguments:
+            f_ids: the sorted feature identifiers
+            network: the networks of one algorithm, as in the session file
+
+        Returns:
+            A tuple of row offsets, neighbor rows, and edge weights
+        """
+        sources, targets, weights = array("q"), array("q"), array("d")
+        for subnetwork in (network.get("subnetworks") or {}).values():
+            for edge in subnetwork.get("elements", {}).get("edges", []):
+                edge_data = edge.get("data", {})
+                sources.append(int(edge_data["source"]))
+                targets.append(int(edge_data["target"]))
+                weights.append(float(edge_data.get("weight") or 0.0))
+
+        source_rows = ColumnarStore.lookup_rows(f_ids, sources)
+        target_rows = ColumnarStore.lookup_rows(f_ids, targets)
+        valid = (source_rows != -1) & (target_rows != -1)
+        weights = np.asarray(weights)[valid]
+        rows = np.concatenate([source_rows[valid], target_rows[valid]])
+        neighbors = np.concatenate([target_rows[valid], source_rows[valid]])
+        weights = np.concatenate([weights, weights])
+
+        order = np.lexsort((-weights, rows))
+        offsets = np.zeros(len(f_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(f_ids)), out=offsets[1:])
+        return offsets, neighbors[order].astype(np.int64), weights[order]
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        """Split a text into lowercase alphanumeric search tokens
+
+        Arguments:
+            text: the text to split
+
+        Returns:
+            The list of tokens
+        """
+        return re.findall(r"[a-z0-9]+", str(text).lower())
+
+    @classmethod
+    def search_tokens(cls, annotations: dict) -> set[tuple[str, int]]:
+        """Extract the search tokens of the annotations of a feature
+
+        Library and MS2Query matches are indexed by name ('match') and compound
+        class ('class'), adducts by their type ('adduct'), which is additionally
+        indexed verbatim (e.g. '[m+h]+').
+
+        Arguments:
+            annotations: the 'annotations' entry of a general feature
+
+        Returns:
+            A set of tokens and the indices of their fields in 'search_fields'
+        """
+        texts = []
+        for match in annotations.get("matches") or []:
+            texts.append((match.get("id"), 0))
+            texts.append((match.get("npc_class"), 1))
+        for adduct in annotations.get("adducts") or []:
+            texts.append((adduct.get("adduct_type"), 2))
+
+        tokens = set()
+        for text, field in texts:
+            if not text or text in ("unknown", "N/A"):
+                continue
+            tokens.update((token, field) for token in cls.tokenize(text))
+            if field == 2:
+                tokens.add((str(text).lower(), field))
+        return tokens
+
+    @staticmethod
+    def build_search_index(
+        postings: set[tuple[str, int, int]], rank: np.ndarray
+    ) -> tuple[list[str], dict[str, np.ndarray]]:
+        """Build the inverted index of the annotation tokens
+
+        Arguments:
+            postings: the tokens with feature position and field index
+            rank: maps feature positions to feature rows
+
+        Returns:
+            A tuple of the sorted tokens and a dict of the 'offsets' delimiting
+            the postings of each token, and the 'rows' and 'fields' of the postings
+        """
+        ordered = sorted(
+            (token, int(rank[position]), field) for token, position, field in postings
+        )
+        tokens = sorted({token for token, _, _ in ordered})
+        counts = np.zeros(len(tokens), dtype=np.int64)
+        token_index = {token: i for i, token in enumerate(tokens)}
+        for token, _, _ in ordered:
+            counts[token_index[token]] += 1
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return tokens, {
+            "offsets": offsets,
+            "rows": np.asarray([row for _, row, _ in ordered], dtype=np.int64),
+            "fields": np.asarray([field for _, _, field in ordered], dtype=np.uint8),
+        }
+
+    @staticmethod
+    def build_fold_changes(
+        categories: list[tuple[str, str, dict]], fold_records: dict, n_rows: int
+    ) -> tuple[list[tuple[str, str, str]], np.ndarray]:
+        """Build the dense fold change rows of all ordered category pairs
+
+        The direction of each factor is derived from the mean area of the feature
+        in the samples of both categories; samples without area count as 0.
+
+        Arguments:
+            categories: the group ID, category, and details of each category
+            fold_records: maps feature positions to their 'group_factors' and a
+                dict of sample ID to area
+            n_rows: the number of features
+
+        Returns:
+            A tuple of the (group, category1, category2) pairs and the fold change
+            matrix with one row per pair and one column per feature position
+        """
+        s_ids = {
+            (group_id, category): details.get("s_ids") or []
+            for group_id, category, details in categories
+        }
+        pairs = [
+            (group_id, category1, category2)
+            for group_id, category1 in s_ids
+            for other_group, category2 in s_ids
+            if other_group == group_id and category2 != category1
+        ]
+        pair_rows = {pair: i for i, pair in enumerate(pairs)}
+        fold_changes = np.full((len(pairs), n_rows), np.nan)
+
+        for position, (group_factors, areas) in fold_records.items():
+            for group_id, changes in group_factors.items():
+                for change in changes or []:
+                    pair = (group_id, change.get("group1"), change.get("group2"))
+                    factor = change.get("factor")
+                    if pair not in pair_rows or not factor or factor <= 0:
+                        continue
+                    means = [
+                        np.mean([areas.get(s_id, 0.0) for s_id in s_ids[key]] or [0.0])
+                        for key in ((group_id, pair[1]), (group_id, pair[2]))
+                    ]
+                    forward, backward = (
+                        (factor, 1 / factor)
+                        if means[0] >= means[1]
+                        else (1 / factor, factor)
+                    )
+                    fold_changes[pair_rows[pair], position] = forward
+                    fold_changes[pair_rows[(group_id, pair[2], pair[1])], position] = (
+                        backward
+                    )
+        return pairs, fold_changes
+
+    def adjacency(
+        self: Self, algorithm: str
+    ) -> Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Return the memory-mapped adjacency lists of a networking algorithm
+
+        Arguments:
+            algorithm: the networking algorithm
+
+        Returns:
+            A tuple of row offsets, neighbor rows, and edge weights, or None if the
+            algorithm is not in the store
+        """
+        if algorithm not in self.read_json("meta").get("adjacency", []):
+            return None
+        return tuple(
+            self.column(f"adjacency_{algorithm}_{name}")
+            for name in ("offsets", "rows", "weights")
+        )
+
+    def network_ids(self: Self, algorithm: str) -> Optional[np.ndarray]:
+        """Return the network identifiers of the features for an algorithm
+
+        Arguments:
+            algorithm: the networking algorithm
+
+        Returns:
+            An array of network IDs by feature row, -1 for features without
+            network, or None if the algorithm is not in the store
+        """
+        if algorithm not in self.read_json("meta").get("adjacency", []):
+            return None
+        return self.column(f"network_{algorithm}")
+
+    def fold_change(
+        self: Self, group: str, category1: str, category2: str
+    ) -> Optional[np.ndarray]:
+        """Return the fold changes of the features from category2 to category1
+
+        Arguments:
+            group: the group identifier
+            category1: the category in the numerator
+            category2: the category in the denominator
+
+        Returns:
+            An array of fold changes by feature row, NaN where fermo_core reported
+            none, or None if the pair is not in the store
+        """
+        pairs = self.read_json("meta").get("fold_pairs", [])
+        try:
+            row = pairs.index([group, category1, category2])
+        except ValueError:
+            return None
+        return self.column("fold_changes")[row]
+
+    def sorted_range(self: Self, name: str, low: float, high: float) -> np.ndarray:
+        """Find the features with a value in an inclusive range by bisection
+
+        Arguments:
+            name: 'mz' or 'rt'
+            low: the minimum value
+            high: the maximum value
+
+        Returns:
+            The feature rows, in ascending order of the value
+        """
+        values = self.column(f"{name}_sorted")
+        start = int(np.searchsorted(values, low, side="left"))
+        end = int(np.searchsorted(values, high, side="right"))
+        return self.column(f"{name}_order")[start : max(start, end)]
+
+    def column(self: Self, name: str) -> np.ndarray:
+        """Return a memory-mapped array of the store
+
+        Arguments:
+            name: the name of the array
+
+        Returns:
+            A read-only array backed by the file
+        """
+        if name not in self.columns:
+            if name == "side_records":
+                self.columns[name] = np.memmap(
+                    self.path.joinpath("side_records.bin"), dtype=np.uint8, mode="r"
+                )
+            else:
+                self.columns[name] = np.load(
+                    self.path.joinpath(f"{name}.npy"), mmap_mode="r"
+                )
+        return self.columns[name]
+
+    def feature_row(self: Self, f_id: int) -> Optional[int]:
+        """Find the row of a feature in the per feature arrays
+
+        Arguments:
+            f_id: the feature identifier
+
+        Returns:
+            The row index or None if the feature is not in the store
+        """
+        f_ids = self.column("f_id")
+        row = int(np.searchsorted(f_ids, f_id))
+        if row < len(f_ids) and f_ids[row] == f_id:
+            return row
+        return None
+
+    def general_feature(self: Self, row: int) -> dict:
+        """Assemble the general feature information used by the dashboard
+
+        Arguments:
+            row: the row index of the feature
+
+        Returns:
+            A dict structured like the reduced 'general_features' entry
+        """
+        offsets = self.column("side_offsets")
+        record = codec.loads(
+            self.column("side_records")[offsets[row] : offsets[row + 1]].tobytes()
+        )
+        g_info = {key: record[key] for key in self.side_fields if key in record}
+        for name in ("rt", "mz"):
+            value = float(self.column(name)[row])
+            g_info[name] = None if np.isnan(value) else value
+        blank = int(self.column("blank")[row])
+        g_info["blank"] = None if blank == -1 else bool(blank)
+        novelty = float(self.column("novelty")[row])
+        if not np.isnan(novelty):
+            g_info["scores"] = {"novelty": novelty}
+        g_info["networks"] = record.get("networks", {})
+        return g_info
+
+    def sample_entries(self: Self, s_id: str) -> slice:
+        """Return the slice of entry rows belonging to a sample
+
+        Arguments:
+            s_id: the sample identifier
+
+        Returns:
+            A slice into the entry arrays; empty if the sample is unknown
+        """
+        if not self.sample_index:
+            self.sample_index = {
+                sample: i
+                for i, sample in enumerate(self.read_json("meta")["sample_ids"])
+            }
+        i = self.sample_index.get(s_id)
+        if i is None:
+            return slice(0, 0)
+        offsets = self.column("sample_offsets")
+        return slice(int(offsets[i]), int(offsets[i + 1]))
+
+    def sample_spec_features(self: Self, entries: slice) -> list:
+        """Assemble the sample-specific feature information of entry rows
+
+        Arguments:
+            entries: a slice into the entry arrays
+
+        Returns:
+            A list of dicts structured like 'sample_spec_features' entries
+        """
+        f_ids = self.column("entry_f_id")[entries].tolist()
+        has_spec = self.column("entry_has_spec")[entries].tolist()
+        rts = self.column("entry_rt")[entries].tolist()
+        intensities = self.column("entry_intensity")[entries].tolist()
+        rel_intensities = self.column("entry_rel_intensity")[entries].tolist()
+        trace_offsets = self.column("trace_offsets")[
+            entries.start : entries.stop + 1
+        ].tolist()
+        trace_rt = self.column("trace_rt")
+        trace_int = self.column("trace_int")
+
+        def _value(value: float) -> Optional[float]:
+            return None if np.isnan(value) else value
+
+        spec_features = []
+        for i, f_id in enumerate(f_ids):
+            if not has_spec[i]:
+                spec_features.append({})
+                continue
+            trace = slice(trace_offsets[i], trace_offsets[i + 1])
+            spec_features.append(
+                {
+                    "f_id": f_id,
+                    "rt": _value(rts[i]),
+                    "intensity": _value(intensities[i]),
+                    "rel_intensity": _value(rel_intensities[i]),
+                    "trace_rt": trace_rt[trace].tolist(),
+                    "trace_int": trace_int[trace].tolist(),
+                }
+            )
+        return spec_features
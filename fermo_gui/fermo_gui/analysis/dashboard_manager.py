@@ -21,10 +21,16 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from typing import Self
+from typing import TYPE_CHECKING, ClassVar, Optional, Self
 
+import numpy as np
 from pydantic import BaseModel
 
+from fermo_gui.analysis.membership_index import MembershipIndex
+
+if TYPE_CHECKING:
+    from fermo_gui.analysis.columnar_store import ColumnarStore
+
 
 class DashboardManager(BaseModel):
     """Organizes data extraction and filtering for dashboard
@@ -32,43 +38,419 @@ class DashboardManager(BaseModel):
     Attributes:
         stats_analysis: static stats data from general analysis run
         stats_samples_dyn: mixed static and dynamic data on samples (overview)
-        stats_chromatogram: all feature information structured per sample. Used for all dashboard visualizations
+        stats_samples: the sample identifiers in overview order
+        stats_rt_range: the minimum and maximum retention time of all traces
+        stats_chromatogram: sample-specific feature information structured per sample. Used for all dashboard visualizations
+        stats_features: general feature information by feature ID, referenced by
+            stats_chromatogram
         stats_network: network information ordered by network ID
+        stats_network_index: member feature IDs by algorithm and network ID,
+            referenced by stats_features
         stats_groups: overview of group labels to be used for filter selection
+        neighborhood_limits: upper bounds of the network neighborhood parameters
     """
 
     stats_analysis: dict = {}
     stats_samples_dyn: list = []
+    stats_samples: list = []
+    stats_rt_range: list = []
     stats_chromatogram: dict = {}
+    stats_features: dict = {}
     stats_network: dict = {}
+    stats_network_index: dict = {}
     stats_groups: dict = {}
     stats_fgroups: dict = {}
+    neighborhood_limits: ClassVar[dict] = {
+        "hops": 5,
+        "max_nodes": 250,
+        "max_edges": 1000,
+    }
+
+    def columnar_session(
+        self: Self, store: "ColumnarStore", networks: bool = False
+    ) -> dict:
+        """Assemble the session sections used for overview data from the store
 
-    def prepare_data_get(self: Self, f_sess: dict):
-        """Run methods to prepare the data required by GET method
+        Samples only contain their feature IDs and scores.
 
         Arguments:
-            f_sess: fermo session file
+            store: a ColumnarStore of the job, up to date with the session file
+            networks: include the full network information in the 'stats' section
+
+        Returns:
+            A dict structured like a reduced fermo session file
+        """
+        sections = store.read_json("sections")
+        stats = sections.get("stats", {})
+        if networks:
+            stats = {**stats, "networks": store.read_json("networks")}
+        entry_f_ids = store.column("entry_f_id")
+
+        samples = {}
+        for s_id, info in store.read_json("samples").items():
+            samples[s_id] = {
+                "feature_ids": entry_f_ids[store.sample_entries(s_id)],
+                "scores": info.get("scores", {}),
+            }
+        return {**sections, "stats": stats, "samples": samples}
+
+    def prepare_data_overview(self: Self, store: "ColumnarStore"):
+        """Prepare the overview data shipped with the dashboard page
+
+        The feature table and sample records are delivered as separate resources.
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
         """
+        f_sess = self.columnar_session(store)
         self.extract_stats_analysis(f_sess)
-        self.extract_stats_samples_dyn(f_sess)
-        self.extract_network(f_sess)
-        self.create_chromatogram(f_sess)
+        self.extract_stats_samples_dyn(f_sess, store)
+        self.stats_samples = f_sess.get("stats", {}).get("samples") or []
+        self.stats_rt_range = store.read_json("meta").get("trace_rt_range") or []
 
-    def provide_data_get(self: Self) -> dict:
-        """Return data required by GET method
+    def provide_data_overview(self: Self) -> dict:
+        """Return the overview data shipped with the dashboard page
 
         Returns: a json-compatible dict
         """
         return {
             "stats_analysis": self.stats_analysis,
             "stats_samples_dyn": self.stats_samples_dyn,
-            "stats_chromatogram": self.stats_chromatogram,
-            "stats_network": self.stats_network,
+            "stats_samples": self.stats_samples,
+            "stats_rt_range": self.stats_rt_range,
             "stats_groups": self.stats_groups,
             "stats_fgroups": self.stats_fgroups,
         }
 
+    def build_columnar_network_index(self: Self, store: "ColumnarStore") -> dict:
+        """Build the index of network members from the store
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+
+        Returns:
+            A dict of member feature IDs by algorithm and network ID
+        """
+        return self.build_network_index(store.read_json("network_summary"))
+
+    def build_sample_data(
+        self: Self,
+        store: "ColumnarStore",
+        sample: str,
+        max_points: Optional[int] = None,
+    ) -> list:
+        """Build the chromatogram records of a single sample from the store
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+            sample: the sample identifier
+            max_points: the maximum number of points per trace; None for all
+
+        Returns:
+            A list of feature records; empty if the sample is unknown
+        """
+        records = [
+            self.build_feature_record(f_info)
+            for f_info in store.sample_spec_features(store.sample_entries(sample))
+        ]
+        if max_points is not None:
+            return self.decimate_records(records, max_points)
+        return records
+
+    @classmethod
+    def decimate_records(cls, records: list, max_points: int) -> list:
+        """Derive records with downsampled traces from the full records of a sample
+
+        The full records are not modified, so that several levels can be derived
+        from the records built once.
+
+        Arguments:
+            records: the feature records of a sample, with full traces
+            max_points: the maximum number of points per trace
+
+        Returns:
+            A list of feature records with traces of at most max_points
+        """
+        decimated = []
+        for record in records:
+            if record["trace_rt"] is not None:
+                trace_rt, trace_int = cls.decimate_trace(
+                    record["trace_rt"], record["trace_int"], max_points
+                )
+                record = {**record, "trace_rt": trace_rt, "trace_int": trace_int}
+            decimated.append(record)
+        return decimated
+
+    @staticmethod
+    def decimate_trace(
+        trace_rt: list, trace_int: list, max_points: int
+    ) -> tuple[list, list]:
+        """Reduce a trace to at most max_points with largest-triangle-three-buckets
+
+        The first and last points are kept; of each bucket in between, the point
+        spanning the largest triangle with the previously kept point and the mean
+        of the next bucket is kept, which preserves peak apices. Traces and levels
+        are short, so plain Python is faster than converting them to arrays.
+
+        Arguments:
+            trace_rt: the retention times of the trace
+            trace_int: the intensities of the trace
+            max_points: the maximum number of points, at least 3
+
+        Returns:
+            A tuple of the retention times and intensities of the kept points
+        """
+        n_points = len(trace_rt)
+        if n_points <= max_points or max_points < 3:
+            return trace_rt, trace_int
+
+        bucket_size = (n_points - 2) / (max_points - 2)
+        kept = [0]
+        for i in range(max_points - 2):
+            start = int(i * bucket_size) + 1
+            end = int((i + 1) * bucket_size) + 1
+            next_end = min(int((i + 2) * bucket_size) + 1, n_points)
+            mean_x = sum(trace_rt[end:next_end]) / (next_end - end)
+            mean_y = sum(trace_int[end:next_end]) / (next_end - end)
+            prev_x, prev_y = trace_rt[kept[-1]], trace_int[kept[-1]]
+            best, best_area = start, -1.0
+            for j in range(start, end):
+                area = abs(
+                    (prev_x - mean_x) * (trace_int[j] - prev_y)
+                    - (prev_x - trace_rt[j]) * (mean_y - prev_y)
+                )
+                if area > best_area:
+                    best, best_area = j, area
+            kept.append(best)
+        kept.append(n_points - 1)
+        return [float(trace_rt[j]) for j in kept], [float(trace_int[j]) for j in kept]
+
+    def build_feature_table(self: Self, store: "ColumnarStore") -> dict:
+        """Build the general information of all features from the store
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+
+        Returns:
+            A dict of general feature information by feature ID
+        """
+        return {
+            str(f_id): {
+                "f_id": f_id,
+                **self.build_general_record(store.general_feature(row)),
+            }
+            for row, f_id in enumerate(store.column("f_id").tolist())
+        }
+
+    def build_feature_data(
+        self: Self, store: "ColumnarStore", f_id: int
+    ) -> Optional[dict]:
+        """Build the general information of a single feature from the store
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+            f_id: the feature identifier
+
+        Returns:
+            A dict of general feature information or None if the feature is unknown
+        """
+        row = store.feature_row(f_id)
+        if row is None:
+            return None
+        return {
+            "f_id": f_id,
+            **self.build_general_record(store.general_feature(row)),
+        }
+
+    def build_network_data(
+        self: Self, store: "ColumnarStore", algorithm: str, n_id: str
+    ) -> Optional[dict]:
+        """Build the data of a single spectral similarity network from the store
+
+        Networks with 50 or more nodes are not rendered and only flagged. Nodes
+        carry their precomputed 'position', if the network was laid out.
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+            algorithm: the networking algorithm
+            n_id: the network identifier
+
+        Returns:
+            A dict with the network elements (or 'large_network'), or None if the
+            network is unknown
+        """
+        network = (
+            store.read_json("networks")
+            .get(algorithm, {})
+            .get("subnetworks", {})
+            .get(str(n_id))
+        )
+        if network is None:
+            return None
+
+        if len(network.get("elements", {}).get("nodes", [])) >= 50:
+            return {"network": "large_network"}
+
+        positions = store.read_json("layouts").get(algorithm, {}).get(str(n_id))
+        if positions:
+            elements = network.get("elements", {})
+            network = {
+                **network,
+                "elements": {
+                    **elements,
+                    "nodes": [
+                        {**node, "position": positions[str(node["data"]["id"])]}
+                        for node in elements.get("nodes", [])
+                    ],
+                },
+            }
+        return {"network": network}
+
+    def build_network_neighborhood(
+        self: Self,
+        store: "ColumnarStore",
+        algorithm: str,
+        f_id: int,
+        hops: int = 2,
+        max_nodes: int = 50,
+        max_edges: int = 150,
+    ) -> Optional[dict]:
+        """Build a bounded view of the network around a feature from the store
+
+        Nodes are collected breadth-first up to 'hops' edges away from the feature,
+        strongest edges first, until 'max_nodes' is reached. Of the edges between
+        the collected nodes, the 'max_edges' with the highest weight are kept,
+        preferring the edges over which nodes were reached, to keep the view
+        connected. The limits are clamped to 'neighborhood_limits'.
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+            algorithm: the networking algorithm
+            f_id: the feature identifier
+            hops: the maximum distance from the feature, in edges
+            max_nodes: the maximum number of nodes
+            max_edges: the maximum number of edges
+
+        Returns:
+            A dict with the network elements and the applied limits, or None if the
+            feature or algorithm is unknown
+        """
+        adjacency = store.adjacency(algorithm)
+        row = store.feature_row(f_id)
+        if adjacency is None or row is None:
+            return None
+
+        offsets, neighbors, weights = adjacency
+        hops = min(max(hops, 1), self.neighborhood_limits["hops"])
+        max_nodes = min(max(max_nodes, 1), self.neighborhood_limits["max_nodes"])
+        max_edges = min(max(max_edges, 0), self.neighborhood_limits["max_edges"])
+
+        distance = {row: 0}
+        tree_edges = set()
+        frontier = [row]
+        truncated = False
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for current in frontier:
+                for neighbor in neighbors[offsets[current] : offsets[current + 1]]:
+                    neighbor = int(neighbor)
+                    if neighbor in distance:
+                        continue
+                    if len(distance) >= max_nodes:
+                        truncated = True
+                        break
+                    distance[neighbor] = hop
+                    tree_edges.add((min(current, neighbor), max(current, neighbor)))
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        edges = []
+        for current in distance:
+            start, end = offsets[current], offsets[current + 1]
+            for neighbor, weight in zip(
+                neighbors[start:end].tolist(), weights[start:end].tolist(), strict=True
+            ):
+                if current < neighbor and neighbor in distance:
+                    edges.append(
+                        ((current, neighbor) in tree_edges, weight, current, neighbor)
+                    )
+        edges.sort(reverse=True)
+        if len(edges) > max_edges:
+            truncated = True
+            edges = edges[:max_edges]
+
+        f_ids = store.column("f_id")
+        return {
+            "network": {
+                "elements": {
+                    "nodes": [
+                        {
+                            "data": {
+                                "id": str(int(f_ids[node])),
+                                "value": int(f_ids[node]),
+                                "name": str(int(f_ids[node])),
+                                "hops": hop,
+                            }
+                        }
+                        for node, hop in distance.items()
+                    ],
+                    "edges": [
+                        {
+                            "data": {
+                                "weight": weight,
+                                "source": int(f_ids[source]),
+                                "target": int(f_ids[target]),
+                            }
+                        }
+                        for _, weight, source, target in edges
+                    ],
+                }
+            },
+            "neighborhood": {
+                "f_id": f_id,
+                "hops": hops,
+                "max_nodes": max_nodes,
+                "max_edges": max_edges,
+                "truncated": truncated,
+            },
+        }
+
+    @staticmethod
+    def build_fold_overview(
+        store: "ColumnarStore", group: str, group1: str, group2: str
+    ) -> Optional[dict]:
+        """Build the fold changes of all features between two categories
+
+        Intended for a volcano-like overview plot; fermo_core does not report
+        p-values, so the novelty score is provided as second dimension.
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+            group: the group identifier
+            group1: the category in the numerator
+            group2: the category in the denominator
+
+        Returns:
+            A dict of parallel lists over the features with a fold change, or None
+            if the category pair is unknown
+        """
+        fold = store.fold_change(group, group1, group2)
+        if fold is None:
+            return None
+        valid = ~np.isnan(fold)
+        novelty = np.asarray(store.column("novelty"))[valid]
+        return {
+            "group": group,
+            "group1": group1,
+            "group2": group2,
+            "f_id": store.column("f_id")[valid].tolist(),
+            "fold": fold[valid].tolist(),
+            "log2_fold": np.log2(fold[valid]).tolist(),
+            "novelty": [
+                None if np.isnan(value) else value for value in novelty.tolist()
+            ],
+        }
+
     def extract_stats_analysis(self: Self, f_sess: dict):
         """Extracts static analysis stats from fermo.session file
 
@@ -92,91 +474,258 @@ class DashboardManager(BaseModel):
         except TypeError:
             self.stats_analysis = {"error": "error during parsing of session file"}
 
-    def extract_stats_samples_dyn(self: Self, f_sess: dict):
-        """Extracts dynamic stats of samples
+    def extract_groups(self: Self, stats: dict) -> tuple[list, dict]:
+        """Extracts group labels for filtering and the sample-to-group mapping
 
         Arguments:
-            f_sess: fermo session file
+            stats: the 'stats' section of the fermo session file
+
+        Returns:
+            A tuple of the list of group names and the sample-to-group mapping
         """
-        try:
-            groups = f_sess.get("stats", {}).get("groups", {}).get("categories", {})
+        groups = stats.get("groups", {}).get("categories", {})
+
+        # TODO: handle no input metadata
+        if groups == "":
+            groups = "N/A"
+
+        group_list = []
+        sample_to_group = {}
+
+        for group_id, categories in groups.items():
+            group_list.append(group_id.title())
+            for category, details in categories.items():
+                # to be used for group filtering sample -> category
+                if group_id in self.stats_groups:
+                    self.stats_groups[group_id].append(category)
+                else:
+                    self.stats_groups[group_id] = [category]
+                # to be used for group filtering feature -> category
+                for f_id in details["f_ids"]:
+                    if f_id in self.stats_fgroups:
+                        self.stats_fgroups[f_id].append(category)
+                    else:
+                        self.stats_fgroups[f_id] = [category]
 
-            # TODO: handle no input metadata
-            if groups == "":
-                groups = "N/A"
+                for s_id in details["s_ids"]:
+                    if s_id in sample_to_group:
+                        sample_to_group[s_id].update({group_id.title(): category})
+                    else:
+                        sample_to_group[s_id] = {group_id.title(): category}
 
-            group_list = []
-            sample_to_group = {}
+        return group_list, sample_to_group
 
-            for group_id, categories in groups.items():
-                group_list.append(group_id.title())
-                for category, details in categories.items():
-                    # to be used for group filtering sample -> category
-                    if group_id in self.stats_groups:
-                        self.stats_groups[group_id].append(category)
-                    else:
-                        self.stats_groups[group_id] = [category]
-                    # to be used for group filtering feature -> category
-                    for f_id in details["f_ids"]:
-                        if f_id in self.stats_fgroups:
-                            self.stats_fgroups[f_id].append(category)
-                        else:
-                            self.stats_fgroups[f_id] = [category]
-
-                    for s_id in details["s_ids"]:
-                        if s_id in sample_to_group:
-                            sample_to_group[s_id].update({group_id.title(): category})
-                        else:
-                            sample_to_group[s_id] = {group_id.title(): category}
+    @staticmethod
+    def build_sample_row(
+        sample: str, sample_data: dict, group_list: list, sample_to_group: dict
+    ) -> dict:
+        """Builds the row of a sample in the sample overview table
 
-            for sample in f_sess.get("stats", {}).get("samples"):
-                total_features = len(
-                    f_sess.get("samples", {}).get(sample, {}).get("feature_ids")
-                )
-                remaining_features = total_features
+        Arguments:
+            sample: the sample identifier
+            sample_data: the entry of the sample in the 'samples' section
+            group_list: the list of group names
+            sample_to_group: the mapping of samples to categories per group
 
-                diversity = (
-                    f_sess.get("samples", {})
-                    .get(sample, {})
-                    .get("scores", {})
-                    .get("diversity")
-                )
-                specificity = (
-                    f_sess.get("samples", {})
-                    .get(sample, {})
-                    .get("scores", {})
-                    .get("specificity")
-                )
-                mean_novelty = (
-                    f_sess.get("samples", {})
-                    .get(sample, {})
-                    .get("scores", {})
-                    .get("mean_novelty")
-                )
+        Returns:
+            A dict representing the table row
+        """
+        total_features = len(sample_data.get("feature_ids"))
+        remaining_features = total_features
 
-                group_info = sample_to_group.get(sample, {})
-                if len(group_info.keys()) != len(group_list):
-                    for item in group_list:
-                        if item not in group_info:
-                            group_info[item] = "N/A"
-                ordered_group_info = {
-                    key: group_info.get(key, "N/A") for key in group_list
-                }
+        diversity = sample_data.get("scores", {}).get("diversity")
+        specificity = sample_data.get("scores", {}).get("specificity")
+        mean_novelty = sample_data.get("scores", {}).get("mean_novelty")
+
+        group_info = sample_to_group.get(sample, {})
+        if len(group_info.keys()) != len(group_list):
+            for item in group_list:
+                if item not in group_info:
+                    group_info[item] = "N/A"
+        ordered_group_info = {key: group_info.get(key, "N/A") for key in group_list}
+
+        return {
+            "Sample name": sample,
+            "Total features": total_features,
+            "Retained features": remaining_features,
+            "Diversity": diversity,
+            "Specificity": specificity,
+            "Mean novelty": mean_novelty,
+            **ordered_group_info,
+        }
+
+    def extract_groups_indexed(self: Self, store: "ColumnarStore") -> tuple[list, dict]:
+        """Extracts group labels and the sample-to-group mapping from the bitsets
+
+        Equivalent to extract_groups, but reads the membership index of the store
+        instead of walking the category lists of the session file.
+
+        Arguments:
+            store: a ColumnarStore of the job, up to date with the session file
+
+        Returns:
+            A tuple of the list of group names and the sample-to-group mapping
+        """
+        index = MembershipIndex(store=store)
+        self.stats_groups = index.group_categories()
+        self.stats_fgroups = index.feature_categories()
+        sample_to_group = {
+            s_id: {group_id.title(): category for group_id, category in groups.items()}
+            for s_id, groups in index.sample_categories().items()
+        }
+        return [group_id.title() for group_id in self.stats_groups], sample_to_group
+
+    def extract_stats_samples_dyn(
+        self: Self, f_sess: dict, store: Optional["ColumnarStore"] = None
+    ):
+        """Extracts dynamic stats of samples
 
+        Arguments:
+            f_sess: fermo session file
+            store: the ColumnarStore the session was assembled from, if any, to
+                read the group memberships from its index
+        """
+        try:
+            if store is not None:
+                group_list, sample_to_group = self.extract_groups_indexed(store)
+            else:
+                group_list, sample_to_group = self.extract_groups(
+                    f_sess.get("stats", {})
+                )
+            for sample in f_sess.get("stats", {}).get("samples"):
                 self.stats_samples_dyn.append(
-                    {
-                        "Sample name": sample,
-                        "Total features": total_features,
-                        "Retained features": remaining_features,
-                        "Diversity": diversity,
-                        "Specificity": specificity,
-                        "Mean novelty": mean_novelty,
-                        **ordered_group_info,
-                    }
+                    self.build_sample_row(
+                        sample,
+                        f_sess.get("samples", {}).get(sample, {}),
+                        group_list,
+                        sample_to_group,
+                    )
                 )
         except (TypeError, ValueError):
             self.stats_samples_dyn = {"error": "error during parsing of session file"}
 
+    @staticmethod
+    def build_network_index(summaries: dict) -> dict:
+        """Builds the index of network members, once per session
+
+        All members are listed, also of networks with 50 or more nodes that are not
+        rendered, since the chromatogram relates and filters features by them.
+
+        Arguments:
+            summaries: the network summaries (network ID to member feature IDs) by
+                networking algorithm
+
+        Returns:
+            A dict of member feature IDs (as int) by algorithm and network ID (as str)
+        """
+        index = {"modified_cosine": {}, "ms2deepscore": {}}
+        for algorithm, summary in summaries.items():
+            index[algorithm] = {
+                str(n_id): [int(f_id) for f_id in members]
+                for n_id, members in (summary or {}).items()
+            }
+        return index
+
+    def extract_network_index(self: Self, f_sess: dict):
+        """Extracts the index of network members from fermo.session file
+
+        Arguments:
+            f_sess: fermo session file
+        """
+        try:
+            networks = f_sess.get("stats", {}).get("networks") or {}
+            self.stats_network_index = self.build_network_index(
+                {
+                    algorithm: network.get("summary", {})
+                    for algorithm, network in networks.items()
+                }
+            )
+        except (TypeError, AttributeError):
+            self.stats_network_index = {"error": "error during parsing of session file"}
+
+    @staticmethod
+    def build_general_record(g_info: dict) -> dict:
+        """Builds the sample-independent part of a feature record
+
+        Network members are not copied into the record; 'n_cos_id' and 'n_ms2d_id'
+        reference them in the network index ('stats_network_index').
+
+        Arguments:
+            g_info: the general feature information
+
+        Returns:
+            A dict of general feature information used by the dashboard
+        """
+        novelty = g_info.get("scores", {}).get("novelty", {})
+        networks = g_info.get("networks", {})
+
+        return {
+            "rt_avg": g_info.get("rt"),
+            "blank": g_info.get("blank"),
+            "novelty": novelty if novelty else 0,
+            "mz": g_info.get("mz"),
+            "samples": g_info.get("samples"),
+            "f_group": g_info.get("group_factors"),
+            "f_sample": g_info.get("height_per_sample"),
+            "a_sample": g_info.get("area_per_sample"),
+            "annotations": g_info.get("annotations"),
+            "n_cos_id": networks.get("modified_cosine", {}).get("network_id", {}),
+            "n_ms2d_id": networks.get("ms2deepscore", {}).get("network_id", {}),
+        }
+
+    def extract_features(self: Self, f_sess: dict):
+        """Extracts the general information of all features
+
+        Arguments:
+            f_sess: fermo session file
+        """
+        try:
+            for f_id, g_info in f_sess.get("general_features", {}).items():
+                self.stats_features[str(f_id)] = {
+                    "f_id": int(f_id),
+                    **self.build_general_record(g_info),
+                }
+        except (TypeError, ValueError, AttributeError):
+            self.stats_features = {"error": "error during parsing of session file"}
+
+    @staticmethod
+    def build_feature_record(f_info: dict) -> dict:
+        """Builds the record of a feature in a sample for the chromatogram
+
+        General feature information is not repeated per sample; records reference
+        the feature table ('stats_features') by their feature ID.
+
+        Arguments:
+            f_info: the sample-specific feature information
+
+        Returns:
+            A dict of sample-specific feature information
+        """
+        return {
+            "f_id": f_info.get("f_id"),
+            "rt": f_info.get("rt"),
+            "trace_rt": f_info.get("trace_rt"),
+            "trace_int": f_info.get("trace_int"),
+            "abs_int": f_info.get("intensity"),
+            "rel_int": f_info.get("rel_intensity"),
+        }
+
+    def build_sample_records(self: Self, sample_data: dict) -> list:
+        """Builds the chromatogram records of all features in a sample
+
+        Arguments:
+            sample_data: the entry of the sample in the 'samples' section
+
+        Returns:
+            A list of feature records
+        """
+        return [
+            self.build_feature_record(
+                sample_data.get("sample_spec_features", {}).get(str(f_id), {})
+            )
+            for f_id in sample_data.get("feature_ids", [])
+        ]
+
     def create_chromatogram(self: Self, f_sess: dict):
         """Creates chromatogram from fermo.session file
 
@@ -186,69 +735,9 @@ class DashboardManager(BaseModel):
         try:
             samples = f_sess.get("stats", {}).get("samples") or []
             for sample in samples:
-                sample_data = f_sess.get("samples", {}).get(sample, {})
-                feature_data = []
-                for f_id in sample_data.get("feature_ids", []):
-                    f_info = sample_data.get("sample_spec_features", {}).get(
-                        str(f_id), {}
-                    )
-                    g_info = f_sess.get("general_features", {}).get(str(f_id), {})
-                    novelty = g_info.get("scores", {}).get("novelty", {})
-                    n_id_cosine = (
-                        g_info.get("networks", {})
-                        .get("modified_cosine", {})
-                        .get("network_id", {})
-                    )
-                    n_id_deepscore = (
-                        g_info.get("networks", {})
-                        .get("ms2deepscore", {})
-                        .get("network_id", {})
-                    )
-
-                    n_features_cosine = (
-                        f_sess.get("stats", {})
-                        .get("networks", {})
-                        .get("modified_cosine", {})
-                        .get("summary", {})
-                        .get(str(n_id_cosine), {})
-                    )
-                    n_features_deepscore = (
-                        f_sess.get("stats", {})
-                        .get("networks", {})
-                        .get("ms2deepscore", {})
-                        .get("summary", {})
-                        .get(str(n_id_deepscore), {})
-                    )
-                    if len(n_features_deepscore) >= 50:
-                        n_features_deepscore = {}
-                    if len(n_features_cosine) >= 50:
-                        n_features_cosine = {}
-
-                    feature_data.append(
-                        {
-                            "f_id": f_info.get("f_id"),
-                            "rt": f_info.get("rt"),
-                            "rt_avg": g_info.get("rt"),
-                            "trace_rt": f_info.get("trace_rt"),
-                            "trace_int": f_info.get("trace_int"),
-                            "abs_int": f_info.get("intensity"),
-                            "rel_int": f_info.get("rel_intensity"),
-                            "blank": g_info.get("blank"),
-                            "novelty": novelty if novelty else 0,
-                            "mz": g_info.get("mz"),
-                            "samples": g_info.get("samples"),
-                            "f_group": g_info.get("group_factors"),
-                            "f_sample": g_info.get("height_per_sample"),
-                            "a_sample": g_info.get("area_per_sample"),
-                            "annotations": g_info.get("annotations"),
-                            "n_cos_id": n_id_cosine,
-                            "n_ms2d_id": n_id_deepscore,
-                            "n_features_cosine": n_features_cosine,
-                            "n_features_deepscore": n_features_deepscore,
-                        }
-                    )
-                self.stats_chromatogram[sample] = feature_data
-
+                self.stats_chromatogram[sample] = self.build_sample_records(
+                    f_sess.get("samples", {}).get(sample, {})
+                )
         except TypeError:
             self.stats_chromatogram = {"error": "error during parsing of session file"}
 
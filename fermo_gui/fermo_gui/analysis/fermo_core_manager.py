@@ -24,7 +24,7 @@ SOFTWARE.
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Self
+from typing import Optional, Self
 
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
@@ -32,16 +32,33 @@ from fermo_core.input_output.class_file_manager import FileManager
 from fermo_core.input_output.class_parameter_manager import ParameterManager
 from fermo_core.input_output.class_validation_manager import ValidationManager
 from fermo_core.main import main
+from flask import current_app
 from pydantic import BaseModel, DirectoryPath
 
+from fermo_gui.analysis.artifact_manager import ArtifactManager
 from fermo_gui.analysis.general_manager import GeneralManager
+from fermo_gui.analysis.job_progress import JobProgress
+from fermo_gui.analysis.job_size import count_rows
 
+RUN_FAILURES = ("Job surpassed maximum time limit", "An error occurred")
+DASHBOARD_FAILURE = "Could not precompute dashboard data"
 
-@shared_task(ignore_result=False)
-def start_fermo_core_manager(metadata: dict) -> bool:
-    """Start fermo_core analysis via FermoAnalysisManager, sends email notification
+
+@shared_task(bind=True, ignore_result=False)
+def start_fermo_core_manager(self, metadata: dict) -> bool:
+    """Start fermo_core analysis via FermoAnalysisManager, notifies on failure
+
+    The success notification is only sent by build_dashboard_artifact, once the
+    results can be viewed.
+
+    While running, the progress derived from the fermo_core log is published as
+    custom task state 'PROGRESS' to the result backend (see JobProgress) and as
+    event to the job's channel (see JobEvents).
+    The time spent loading models and whether they were reused from a warm
+    worker process (see ModelCache) is appended to the job log.
 
     Arguments:
+        self: the bound task instance
         metadata: a dict containing metadata for running of the job
 
     Returns:
@@ -68,30 +85,146 @@ def start_fermo_core_manager(metadata: dict) -> bool:
                 job_id=metadata.get("job_id"),
             )
 
+    def _report_progress(state: dict):
+        self.update_state(state="PROGRESS", meta=state)
+        events = current_app.extensions.get("job_events")
+        if events is not None:
+            events.publish(metadata.get("job_id"), "running", state)
+
+    model_cache = current_app.extensions.get("model_cache")
+    if model_cache is not None:
+        model_cache.install()
+        model_cache.reset_stats()
+
     try:
         manager = FermoCoreManager(
             job_id=metadata.get("job_id"), uploads_dir=metadata.get("task_path")
         )
-        manager.run_fermo_core()
-
-        if metadata.get("email_notify"):
-            GeneralManager().email_notify_success(
-                root_url=metadata.get("root_url"),
-                address=metadata.get("email"),
-                job_id=metadata.get("job_id"),
-            )
+        manager.run_fermo_core(progress=JobProgress(callback=_report_progress))
         return True
     except SoftTimeLimitExceeded as e:
         _write_to_log(
-            f"Job surpassed maximum time limit of '{metadata.get('max_runtime')}' "
-            f"seconds: {e}"
+            f"{RUN_FAILURES[0]} of '{metadata.get('max_runtime')}' seconds: {e}"
         )
         _send_mail_fail()
         return False
     except Exception as e:
-        _write_to_log(f"An error occurred: {e}")
+        _write_to_log(f"{RUN_FAILURES[1]}: {e}")
         _send_mail_fail()
         return False
+    finally:
+        if model_cache is not None:
+            _write_to_log(f"\n{model_cache.describe()}\n")
+
+
+@shared_task(ignore_result=True)
+def send_success_email(metadata: dict):
+    """Send the email notification of a successful job, if requested
+
+    Called at the end of build_dashboard_artifact, or dispatched on its own if the
+    results of an identical job were reused.
+
+    Arguments:
+        metadata: a dict containing metadata for running of the job
+    """
+    if metadata.get("email_notify"):
+        GeneralManager().email_notify_success(
+            root_url=metadata.get("root_url"),
+            address=metadata.get("email"),
+            job_id=metadata.get("job_id"),
+        )
+
+
+def dashboard_task_id(job_id: str) -> str:
+    """Return the task ID of the dashboard stage of a job
+
+    The dashboard stage is the last task in the chain of a job; its state tells if
+    the job is finished.
+
+    Arguments:
+        job_id: the job identifier, also the task ID of the fermo_core run
+
+    Returns:
+        The task ID of build_dashboard_artifact
+    """
+    return f"{job_id}.dashboard"
+
+
+@shared_task(ignore_result=False)
+def build_dashboard_artifact(success: bool, metadata: dict) -> bool:
+    """Build the dashboard data after a successful fermo_core run
+
+    The session file is also registered as trusted, so that it skips the schema
+    validation if loaded again, and the job is recorded for reuse by identical
+    submissions. Chained after start_fermo_core_manager, which provides the
+    success flag, or dispatched on its own by dispatch_dashboard. Dashboard data
+    that is already current is not built again.
+
+    The final job status is published to the job's channel afterwards and the
+    email notification is sent; without dashboard data, the results cannot be
+    viewed and the job counts as failed.
+
+    Arguments:
+        success: the return value of the preceding fermo_core run
+        metadata: a dict containing metadata for running of the job
+
+    Returns:
+        True if the dashboard data was built, False otherwise
+    """
+    events = current_app.extensions.get("job_events")
+    if not success:
+        if events is not None:
+            events.publish(metadata.get("job_id"), "failed")
+        return False
+
+    results_dir = Path(metadata.get("task_path")).joinpath("results")
+    built = False
+    try:
+        artifacts = ArtifactManager(
+            results_dir=results_dir,
+            layout=current_app.extensions["network_layout"],
+        )
+        if not artifacts.is_current():
+            artifacts.build()
+        trusted_sessions = current_app.extensions.get("trusted_sessions")
+        if trusted_sessions is not None:
+            trusted_sessions.register(results_dir.joinpath("out.fermo.session.json"))
+        result_index = current_app.extensions.get("result_index")
+        if result_index is not None and metadata.get("result_key") is not None:
+            result_index.register(metadata["result_key"], metadata.get("job_id"))
+        built = True
+    except Exception as e:
+        with open(results_dir.joinpath("out.fermo.log"), "a") as logfile:
+            logfile.write(f"{DASHBOARD_FAILURE}: {e}\n")
+
+    if events is not None:
+        events.publish(metadata.get("job_id"), "done" if built else "failed")
+    if built:
+        send_success_email(metadata=metadata)
+    elif metadata.get("email_notify"):
+        GeneralManager().email_notify_fail(
+            root_url=metadata.get("root_url"),
+            address=metadata.get("email"),
+            job_id=metadata.get("job_id"),
+        )
+    return built
+
+
+def dispatch_dashboard(job_id: str, task_path: Path):
+    """Dispatch the dashboard stage of a job on its own, without fermo_core run
+
+    Used for uploaded session files and for dashboard data outdated by a change of
+    its format, so that it is never built on the request path.
+
+    Arguments:
+        job_id: the job identifier
+        task_path: the job dir, containing the results dir
+    """
+    build_dashboard_artifact.apply_async(
+        args=(True,),
+        kwargs={"metadata": {"job_id": job_id, "task_path": str(task_path.resolve())}},
+        task_id=dashboard_task_id(job_id),
+    )
 
 
 class FermoCoreManager(BaseModel):
@@ -129,8 +262,12 @@ class FermoCoreManager(BaseModel):
 
         return logger
 
-    def run_fermo_core(self: Self):
-        """Run fermo_core on the respective job id"""
+    def run_fermo_core(self: Self, progress: Optional[JobProgress] = None):
+        """Run fermo_core on the respective job id
+
+        Arguments:
+            progress: a JobProgress handler, attached to the logger during the run
+        """
         start_time = datetime.now()
         self.create_results_folder()
         logger = self.configure_logger()
@@ -146,4 +283,16 @@ class FermoCoreManager(BaseModel):
         param_manager = ParameterManager()
         param_manager.assign_parameters_cli(params_input)
 
-        main(param_manager, start_time, logger)
+        if progress is None:
+            main(param_manager, start_time, logger)
+            return
+
+        progress.n_features = count_rows(
+            params_input.get("files", {}).get("peaktable", {}).get("filepath")
+        )
+        logger.addHandler(progress)
+        try:
+            progress.report()
+            main(param_manager, start_time, logger)
+        finally:
+            logger.removeHandler(progress)
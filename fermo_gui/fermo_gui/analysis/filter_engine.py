@@ -0,0 +1,270 @@
+"""Evaluates dashboard filters over the features of a job with NumPy
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Literal, Optional, Self
+
+import numpy as np
+from pydantic import BaseModel
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.membership_index import MembershipIndex
+
+
+class FoldFilter(BaseModel):
+    """Retains features with a fold change of at least 'factor' between categories
+
+    Attributes:
+        group: the group both categories belong to
+        group1: the first category
+        group2: the second category; the order of the categories is irrelevant
+        factor: the minimum fold change
+    """
+
+    group: str
+    group1: str
+    group2: str
+    factor: float
+
+
+class NetworkFilter(BaseModel):
+    """Retains features in networks without blank or excluded category members
+
+    Attributes:
+        algorithm: the networking algorithm
+        exclude: category names, or 'blanks' for blank-associated features
+    """
+
+    algorithm: str
+    exclude: list[str]
+
+
+class FilterSpec(BaseModel):
+    """The dashboard filters; unset filters retain all features
+
+    Ranges are inclusive [min, max] pairs.
+
+    Attributes:
+        novelty: range of the novelty score
+        phenotype: range of the best phenotype score
+        match: range of the best match score
+        annotation: only retain features with adduct annotation
+        exclude_blank: exclude blank-associated features
+        f_id: only retain the feature with this ID
+        mz: range of the precursor m/z
+        samples: range of the number of samples a feature was detected in
+        fold: the fold change filter
+        groups: only retain features in one of these categories
+        network: the network filter
+    """
+
+    novelty: Optional[tuple[float, float]] = None
+    phenotype: Optional[tuple[float, float]] = None
+    match: Optional[tuple[float, float]] = None
+    annotation: bool = False
+    exclude_blank: bool = False
+    f_id: Optional[int] = None
+    mz: Optional[tuple[float, float]] = None
+    samples: Optional[tuple[float, float]] = None
+    fold: Optional[FoldFilter] = None
+    groups: Optional[list[str]] = None
+    network: Optional[NetworkFilter] = None
+
+
+class FilterQuery(BaseModel):
+    """A filter spec and the requested reductions of its result
+
+    Attributes:
+        filters: the filters
+        outputs: 'count' for the number of retained features, 'features' for
+            their IDs, and 'samples' for the number per sample
+    """
+
+    filters: FilterSpec = FilterSpec()
+    outputs: list[Literal["count", "features", "samples"]] = ["count"]
+
+
+class FilterEngine(BaseModel):
+    """Evaluates dashboard filters over the feature columns of the columnar store
+
+    A filter spec is answered by a boolean mask over the feature rows of the store,
+    which is reduced to the retained feature IDs or counts per sample. The
+    semantics follow the filters of the dashboard.
+
+    Attributes:
+        store: a ColumnarStore of the job, up to date with the session file
+        large_network: the size from which networks are not rendered and their
+            members therefore not retained by the network filter
+    """
+
+    store: ColumnarStore
+    large_network: int = 50
+
+    @staticmethod
+    def in_range(values: np.ndarray, bounds: tuple[float, float]) -> np.ndarray:
+        """Compare values against an inclusive range; NaN is never in range
+
+        Arguments:
+            values: the values to compare
+            bounds: the minimum and maximum
+
+        Returns:
+            A boolean mask
+        """
+        return (values >= bounds[0]) & (values <= bounds[1])
+
+    def category_mask(self: Self, categories: list[str]) -> np.ndarray:
+        """Return the features in any of the categories
+
+        Arguments:
+            categories: category names
+
+        Returns:
+            A boolean mask over the feature rows
+        """
+        return MembershipIndex(store=self.store).feature_mask(categories)
+
+    def fold_mask(self: Self, fold: FoldFilter) -> np.ndarray:
+        """Return the features with a sufficient fold change between categories
+
+        The direction of the change is ignored; of the two rows of the pair, one
+        holds the factor reported by fermo_core and the other its reciprocal.
+
+        Arguments:
+            fold: the fold change filter
+
+        Returns:
+            A boolean mask over the feature rows
+        """
+        forward = self.store.fold_change(fold.group, fold.group1, fold.group2)
+        backward = self.store.fold_change(fold.group, fold.group2, fold.group1)
+        if forward is None or backward is None:
+            return np.zeros(len(self.store.column("f_id")), dtype=bool)
+        return np.fmax(forward, backward) >= fold.factor
+
+    def network_mask(self: Self, network: NetworkFilter) -> np.ndarray:
+        """Return the features in networks without excluded members
+
+        Features without network or in large networks are not retained.
+
+        Arguments:
+            network: the network filter
+
+        Returns:
+            A boolean mask over the feature rows
+        """
+        network_ids = self.store.network_ids(network.algorithm)
+        if network_ids is None:
+            return np.zeros(len(self.store.column("f_id")), dtype=bool)
+
+        excluded = self.category_mask(network.exclude)
+        if "blanks" in network.exclude:
+            excluded |= np.asarray(self.store.column("blank")) == 1
+
+        in_network = network_ids >= 0
+        _, members = np.unique(network_ids[in_network], return_inverse=True)
+        size = np.bincount(members)
+        tainted = np.bincount(members, weights=excluded[in_network]) > 0
+
+        mask = np.zeros(len(network_ids), dtype=bool)
+        mask[in_network] = (size[members] < self.large_network) & ~tainted[members]
+        return mask
+
+    def mask(self: Self, spec: FilterSpec) -> np.ndarray:
+        """Evaluate a filter spec over all features
+
+        Arguments:
+            spec: the filters
+
+        Returns:
+            A boolean mask over the feature rows of the store
+        """
+        column = self.store.column
+        mask = np.ones(len(column("f_id")), dtype=bool)
+
+        if spec.novelty is not None:
+            mask &= self.in_range(np.nan_to_num(column("novelty")), spec.novelty)
+        if spec.phenotype is not None:
+            mask &= self.in_range(column("phenotype_score"), spec.phenotype)
+        if spec.match is not None:
+            mask &= self.in_range(column("match_score"), spec.match)
+        if spec.annotation:
+            mask &= column("has_adducts")
+        if spec.exclude_blank:
+            mask &= column("blank") != 1
+        if spec.f_id is not None:
+            mask &= column("f_id") == spec.f_id
+        if spec.mz is not None:
+            in_window = np.zeros(len(mask), dtype=bool)
+            in_window[self.store.sorted_range("mz", *spec.mz)] = True
+            mask &= in_window
+        if spec.samples is not None:
+            mask &= self.in_range(column("n_samples"), spec.samples)
+        if spec.groups:
+            mask &= self.category_mask(spec.groups)
+        if spec.fold is not None:
+            mask &= self.fold_mask(spec.fold)
+        if spec.network is not None:
+            mask &= self.network_mask(spec.network)
+        return mask
+
+    def sample_counts(self: Self, mask: np.ndarray) -> dict[str, int]:
+        """Count the retained features of each sample
+
+        Arguments:
+            mask: a boolean mask over the feature rows
+
+        Returns:
+            A dict of sample identifier to number of retained features
+        """
+        rows = self.store.lookup_rows(
+            self.store.column("f_id"), self.store.column("entry_f_id")
+        )
+        retained = np.asarray(self.store.column("entry_has_spec")) & (rows != -1)
+        retained[retained] = mask[rows[retained]]
+        cumulative = np.concatenate([[0], np.cumsum(retained)])
+        offsets = np.asarray(self.store.column("sample_offsets"))
+        counts = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+        return dict(
+            zip(
+                self.store.read_json("meta")["sample_ids"], counts.tolist(), strict=True
+            )
+        )
+
+    def evaluate(self: Self, query: FilterQuery) -> dict:
+        """Evaluate a filter query and reduce the mask to the requested outputs
+
+        Arguments:
+            query: the filters and requested outputs
+
+        Returns:
+            A json-compatible dict with the requested outputs
+        """
+        mask = self.mask(query.filters)
+        result = {}
+        if "count" in query.outputs:
+            result["count"] = int(mask.sum())
+        if "features" in query.outputs:
+            result["features"] = self.store.column("f_id")[mask].tolist()
+        if "samples" in query.outputs:
+            result["samples"] = self.sample_counts(mask)
+        return result
@@ -21,13 +21,13 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import json
 from pathlib import Path
 
 from celery import uuid
 from flask import render_template
 from flask_mail import Message
 
+from fermo_gui.analysis.json_codec import codec
 from fermo_gui.config.extensions import mail
 
 
@@ -57,10 +57,7 @@ class GeneralManager:
             location: the location of the upload dir
             filename: the filename identifier
         """
-        location = Path(location)
-        with open(location.joinpath(filename)) as infile:
-            params = json.load(infile)
-        return params
+        return codec.load(Path(location).joinpath(filename))
 
     @staticmethod
     def email_notify_success(root_url: str, address: str, job_id: str):
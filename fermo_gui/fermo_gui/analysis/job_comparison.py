@@ -0,0 +1,289 @@
+"""Matches the features of several jobs by m/z and retention time
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import ClassVar, Optional, Self
+
+import numpy as np
+from pydantic import BaseModel, Field, field_validator
+from werkzeug.utils import secure_filename
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+
+
+class ComparisonQuery(BaseModel):
+    """A comparison of the features of several jobs
+
+    Attributes:
+        job_ids: the jobs to compare; the first one is the reference of the ratios
+        ppm: the m/z tolerance in ppm
+        rt_tol: the retention time tolerance
+    """
+
+    job_ids: list[str] = Field(min_length=2, max_length=20)
+    ppm: float = Field(10.0, ge=0)
+    rt_tol: float = Field(0.1, ge=0)
+
+    @field_validator("job_ids")
+    @classmethod
+    def check_job_ids(cls, job_ids: list[str]) -> list[str]:
+        """Reject duplicated job IDs and IDs that are not plain file names"""
+        if len(set(job_ids)) != len(job_ids):
+            raise ValueError("Job IDs must be unique.")
+        for job_id in job_ids:
+            if not job_id or secure_filename(job_id) != job_id:
+                raise ValueError(f"Invalid job ID '{job_id}'.")
+        return job_ids
+
+    def cache_kind(self: Self) -> str:
+        """Return the kind under which the comparison is cached in SessionCache"""
+        return f"comparison:{self.ppm}:{self.rt_tol}"
+
+    def cache_key(self: Self) -> str:
+        """Return the key of the job set in SessionCache, independent of the order"""
+        return ",".join(sorted(self.job_ids))
+
+
+class JobComparison(BaseModel):
+    """Organizes matching of the features of several jobs
+
+    The jobs are merged into consensus features one after the other: the features
+    of each job are matched one-to-one to the consensus features so far, and
+    unmatched features become new consensus features. The m/z and retention time
+    of a consensus feature are those of the job in which it was first found.
+
+    Matching uses the m/z-sorted arrays of the columnar store: the candidates of
+    all features are found by bisection, filtered by retention time, and assigned
+    greedily in the order of their normalized distance.
+
+    Attributes:
+        stores: the ColumnarStore of each job, by job ID, in comparison order
+        ppm: the m/z tolerance in ppm, relative to the m/z of the matched feature
+        rt_tol: the retention time tolerance
+    """
+
+    stores: dict[str, ColumnarStore]
+    ppm: float = 10.0
+    rt_tol: float = 0.1
+    missing: ClassVar[int] = -1
+
+    @staticmethod
+    def match_features(
+        ref_mz: np.ndarray,
+        ref_rt: np.ndarray,
+        mz: np.ndarray,
+        rt: np.ndarray,
+        ppm: float,
+        rt_tol: float,
+    ) -> np.ndarray:
+        """Match features one-to-one to reference features within the tolerances
+
+        Arguments:
+            ref_mz: the m/z of the reference features
+            ref_rt: the retention times of the reference features
+            mz: the m/z of the features to match
+            rt: the retention times of the features to match
+            ppm: the m/z tolerance in ppm
+            rt_tol: the retention time tolerance
+
+        Returns:
+            The index of the matched reference feature for each feature, or -1
+        """
+        matches = np.full(len(mz), JobComparison.missing, dtype=np.int64)
+        order = np.argsort(ref_mz, kind="stable")
+        sorted_mz = ref_mz[order]
+        mz_tol = np.abs(mz) * ppm * 1e-6
+        low = np.searchsorted(sorted_mz, mz - mz_tol, side="left")
+        high = np.maximum(np.searchsorted(sorted_mz, mz + mz_tol, side="right"), low)
+        high[np.isnan(mz)] = low[np.isnan(mz)]
+        counts = high - low
+        if counts.sum() == 0:
+            return matches
+
+        query = np.repeat(np.arange(len(mz)), counts)
+        starts = np.repeat(low - (np.cumsum(counts) - counts), counts)
+        ref = order[starts + np.arange(len(query))]
+        drt = np.abs(rt[query] - ref_rt[ref])
+        keep = drt <= rt_tol
+        query, ref, drt = query[keep], ref[keep], drt[keep]
+
+        dmz = np.abs(mz[query] - ref_mz[ref])
+        distance = np.zeros(len(query))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if ppm > 0:
+                distance += (dmz / mz_tol[query]) ** 2
+            if rt_tol > 0:
+                distance += (drt / rt_tol) ** 2
+        distance = np.nan_to_num(distance)
+
+        ref_used = np.zeros(len(ref_mz), dtype=bool)
+        for i in np.lexsort((ref, query, distance)).tolist():
+            if matches[query[i]] == JobComparison.missing and not ref_used[ref[i]]:
+                matches[query[i]] = ref[i]
+                ref_used[ref[i]] = True
+        return matches
+
+    def merge(self: Self) -> np.ndarray:
+        """Merge the features of all jobs into consensus features
+
+        Returns:
+            The feature row of each job (columns) per consensus feature (rows), or -1
+        """
+        n_jobs = len(self.stores)
+        members = np.empty((0, n_jobs), dtype=np.int64)
+        cons_mz = np.empty(0)
+        cons_rt = np.empty(0)
+        for j, store in enumerate(self.stores.values()):
+            mz = np.asarray(store.column("mz"))
+            rt = np.asarray(store.column("rt"))
+            matches = self.match_features(
+                cons_mz, cons_rt, mz, rt, self.ppm, self.rt_tol
+            )
+            matched = matches != self.missing
+            members[matches[matched], j] = np.flatnonzero(matched)
+
+            new_rows = np.flatnonzero(~matched)
+            added = np.full((len(new_rows), n_jobs), self.missing, dtype=np.int64)
+            added[:, j] = new_rows
+            members = np.vstack((members, added))
+            cons_mz = np.concatenate((cons_mz, mz[new_rows]))
+            cons_rt = np.concatenate((cons_rt, rt[new_rows]))
+        return members
+
+    def compare(self: Self) -> dict:
+        """Compare the features of the jobs
+
+        Returns:
+            A json-compatible dict with a summary of the shared and unique features
+            and, per consensus feature, the m/z and retention time, and per job the
+            feature ID, area, and area ratio to the first job (None where absent)
+        """
+        members = self.merge()
+        present = members != self.missing
+        n_present = present.sum(axis=1)
+        job_ids = list(self.stores)
+
+        def _values(store: ColumnarStore, name: str, rows: np.ndarray) -> np.ndarray:
+            values = np.full(len(rows), np.nan)
+            found = rows != self.missing
+            values[found] = np.asarray(store.column(name))[rows[found]]
+            return values
+
+        def _listed(values: np.ndarray) -> list[Optional[float]]:
+            return [None if np.isnan(value) else value for value in values.tolist()]
+
+        mz = np.full(len(members), np.nan)
+        rt = np.full(len(members), np.nan)
+        f_ids, areas, ratios = {}, {}, {}
+        for j, (job_id, store) in enumerate(self.stores.items()):
+            rows = members[:, j]
+            job_mz = _values(store, "mz", rows)
+            job_rt = _values(store, "rt", rows)
+            unset = np.isnan(mz) & present[:, j]
+            mz[unset], rt[unset] = job_mz[unset], job_rt[unset]
+            f_ids[job_id] = [
+                None if row == self.missing else int(store.column("f_id")[row])
+                for row in rows.tolist()
+            ]
+            areas[job_id] = _values(store, "area", rows)
+
+        reference = areas[job_ids[0]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for job_id in job_ids[1:]:
+                ratio = areas[job_id] / reference
+                ratios[job_id] = _listed(np.where(np.isfinite(ratio), ratio, np.nan))
+
+        return {
+            "job_ids": job_ids,
+            "ppm": self.ppm,
+            "rt_tol": self.rt_tol,
+            "summary": {
+                "features": {
+                    job_id: int(present[:, j].sum()) for j, job_id in enumerate(job_ids)
+                },
+                "consensus": len(members),
+                "shared": int((n_present == len(job_ids)).sum()),
+                "unique": {
+                    job_id: int((present[:, j] & (n_present == 1)).sum())
+                    for j, job_id in enumerate(job_ids)
+                },
+            },
+            "features": {
+                "mz": _listed(mz),
+                "rt": _listed(rt),
+                "n_jobs": n_present.tolist(),
+                "f_id": f_ids,
+                "area": {job_id: _listed(value) for job_id, value in areas.items()},
+                "ratio": ratios,
+            },
+        }
+
+    @staticmethod
+    def with_reference(result: dict, job_ids: list[str]) -> dict:
+        """Present a comparison in the given job order, with ratios to the first job
+
+        Comparisons are computed and cached for the job set in a canonical order;
+        this orders the per-job entries as requested and recomputes the area
+        ratios. The cached result is not modified.
+
+        Arguments:
+            result: the result of compare() for the same job set
+            job_ids: the job IDs in the requested order
+
+        Returns:
+            A json-compatible dict structured like the result of compare()
+        """
+        features = result["features"]
+        areas = {
+            job_id: np.array(
+                [
+                    np.nan if value is None else value
+                    for value in features["area"][job_id]
+                ],
+                dtype=np.float64,
+            )
+            for job_id in job_ids
+        }
+        ratios = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for job_id in job_ids[1:]:
+                ratio = areas[job_id] / areas[job_ids[0]]
+                ratios[job_id] = [
+                    value if np.isfinite(value) else None for value in ratio.tolist()
+                ]
+
+        summary = result["summary"]
+        return {
+            **result,
+            "job_ids": list(job_ids),
+            "summary": {
+                **summary,
+                "features": {job_id: summary["features"][job_id] for job_id in job_ids},
+                "unique": {job_id: summary["unique"][job_id] for job_id in job_ids},
+            },
+            "features": {
+                **features,
+                "f_id": {job_id: features["f_id"][job_id] for job_id in job_ids},
+                "area": {job_id: features["area"][job_id] for job_id in job_ids},
+                "ratio": ratios,
+            },
+        }
@@ -0,0 +1,248 @@
+"""Publishes and streams job status events via Redis pub/sub
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from typing import Optional, Self
+
+import redis
+from redis.exceptions import RedisError
+
+from fermo_gui.analysis.json_codec import codec
+
+_LOST = object()
+
+
+class JobEvents:
+    """Publishes the status of jobs to one Redis pub/sub channel per job ID.
+
+    The Celery tasks publish progress and completion events; the web process
+    forwards the events of a job to the browser as server-sent events. Events are
+    not stored: subscribers must check the job status after subscribing to catch
+    up on events published before.
+
+    Each web process holds a single Redis connection, subscribed to the channels
+    of all jobs by pattern, from which a listener thread fans the events out to an
+    in-memory queue per subscriber. Under gunicorn's gevent workers, which
+    monkey-patch threading and queue, the listener runs as a greenlet, so idle
+    subscribers cost neither a socket nor an OS thread.
+
+    Attributes:
+        redis_url: URL of the Redis instance; None to disable events
+        timeout: the maximum time a subscription is held open, in seconds
+        heartbeat: the maximum time between two messages to a subscriber, in seconds
+    """
+
+    prefix = "fermo:events"
+    final = ("done", "failed")
+
+    def __init__(
+        self: Self,
+        redis_url: Optional[str] = None,
+        timeout: float = 600,
+        heartbeat: float = 15,
+    ):
+        self.redis_url = redis_url
+        self.timeout = timeout
+        self.heartbeat = heartbeat
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._pubsub = None
+        self._queues: dict[str, set[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self: Self) -> bool:
+        """Return True if events can be published and subscribed to"""
+        return self._redis is not None
+
+    def channel(self: Self, job_id: str) -> str:
+        """Assemble the name of the pub/sub channel of a job
+
+        Arguments:
+            job_id: the job identifier
+
+        Returns:
+            The channel name
+        """
+        return f"{self.prefix}:{job_id}"
+
+    @staticmethod
+    def format_event(data: Optional[dict]) -> str:
+        """Format a status event or a heartbeat as server-sent event
+
+        Arguments:
+            data: the json-compatible status, or None for a heartbeat comment
+
+        Returns:
+            The event text
+        """
+        if data is None:
+            return ": heartbeat\n\n"
+        return f"event: status\ndata: {codec.dumps(data)}\n\n"
+
+    def publish(self: Self, job_id: str, status: str, progress: Optional[dict] = None):
+        """Publish the status of a job; errors are ignored to never fail a job
+
+        Arguments:
+            job_id: the job identifier
+            status: 'running', 'done', or 'failed'
+            progress: the progress state of a running job
+        """
+        if self._redis is None:
+            return
+        with contextlib.suppress(RedisError):
+            self._redis.publish(
+                self.channel(job_id),
+                codec.dumpb({"status": status, "progress": progress}),
+            )
+
+    def subscribe(self: Self, job_id: str) -> "JobSubscription":
+        """Subscribe to the events of a job
+
+        Starts the shared listener of this process if not running yet.
+
+        Arguments:
+            job_id: the job identifier
+
+        Returns:
+            The subscription, to be iterated and closed by the caller
+
+        Raises:
+            RedisError: Redis is not available
+            RuntimeError: events are disabled
+        """
+        if self._redis is None:
+            raise RuntimeError("Job events are disabled.")
+
+        events = queue.Queue()
+        with self._lock:
+            if self._pubsub is None:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.psubscribe(f"{self.prefix}:*")
+                except RedisError:
+                    pubsub.close()
+                    raise
+                self._pubsub = pubsub
+                threading.Thread(
+                    target=self._listen, args=(pubsub,), daemon=True
+                ).start()
+            self._queues.setdefault(job_id, set()).add(events)
+        return JobSubscription(job_id=job_id, inbox=events, events=self)
+
+    def unsubscribe(self: Self, job_id: str, events: queue.Queue):
+        """Remove the queue of a subscriber
+
+        Arguments:
+            job_id: the job identifier
+            events: the queue of the subscriber
+        """
+        with self._lock:
+            queues = self._queues.get(job_id)
+            if queues is None:
+                return
+            queues.discard(events)
+            if not queues:
+                del self._queues[job_id]
+
+    def subscribers(self: Self) -> int:
+        """Return the number of subscribers in this process"""
+        with self._lock:
+            return sum(len(queues) for queues in self._queues.values())
+
+    def _listen(self: Self, pubsub: redis.client.PubSub):
+        """Distribute the events of the shared subscription to the subscribers
+
+        If the connection is lost, all current subscriptions are ended; the next
+        subscription connects again.
+
+        Arguments:
+            pubsub: the pattern subscription to all job channels
+        """
+        offset = len(self.prefix) + 1
+        try:
+            while self._pubsub is pubsub:
+                message = pubsub.get_message(timeout=self.heartbeat)
+                if message is None or message.get("type") != "pmessage":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                data = codec.loads(message["data"])
+                with self._lock:
+                    queues = list(self._queues.get(channel[offset:], ()))
+                for events in queues:
+                    events.put_nowait(data)
+        except RedisError:
+            with self._lock:
+                if self._pubsub is pubsub:
+                    self._pubsub = None
+                queues = [events for item in self._queues.values() for events in item]
+            for events in queues:
+                events.put_nowait(_LOST)
+
+        with contextlib.suppress(RedisError):
+            pubsub.close()
+
+    def close(self: Self):
+        """Stop the shared listener of this process after its current wait"""
+        with self._lock:
+            self._pubsub = None
+
+
+class JobSubscription:
+    """Iterates over the events of a job, received by the shared listener.
+
+    Yields the published status dicts, and None whenever no event arrived within
+    the heartbeat interval. Iteration stops after a final event ('done' or
+    'failed'), after the timeout, or if the connection to Redis is lost.
+    """
+
+    def __init__(self: Self, job_id: str, inbox: queue.Queue, events: JobEvents):
+        self.job_id = job_id
+        self.inbox = inbox
+        self.events = events
+
+    def __iter__(self: Self) -> Iterator[Optional[dict]]:
+        deadline = time.monotonic() + self.events.timeout
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    data = self.inbox.get(timeout=min(self.events.heartbeat, remaining))
+                except queue.Empty:
+                    yield None
+                    continue
+                if data is _LOST:
+                    return
+                yield data
+                if data.get("status") in self.events.final:
+                    return
+        finally:
+            self.close()
+
+    def close(self: Self):
+        """Stop receiving events of the job"""
+        self.events.unsubscribe(self.job_id, self.inbox)
@@ -0,0 +1,141 @@
+"""Reports the progress of fermo_core runs from the fermo_core log records
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import logging
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, ClassVar, Optional, Self
+
+
+class JobProgress(logging.Handler):
+    """Logging handler deriving the progress of a run from fermo_core log records.
+
+    fermo_core prefixes its log messages with the quoted name of the emitting
+    class (e.g. "'GroupAssigner': ..."). These names are mapped to the steps of a
+    run in 'modules'; the current step only advances, so that messages of helper
+    classes used across steps do not move it back. The progress state is passed
+    to 'callback' whenever the step changes, and otherwise at most once per
+    'min_interval' seconds.
+
+    Attributes:
+        callback: receives the progress state as json-compatible dict
+        n_features: the total number of features in the peaktable, if known
+        min_interval: the minimum time between two reports of the same step
+    """
+
+    modules: ClassVar[tuple[str, ...]] = (
+        "GeneralParser",
+        "FeatureFilter",
+        "BlankAssigner",
+        "GroupAssigner",
+        "GroupFactorAssigner",
+        "PhenotypeManager",
+        "SimNetworksManager",
+        "AnnotationManager",
+        "ScoreAssigner",
+        "ChromTraceCalculator",
+        "ExportManager",
+    )
+    aliases: ClassVar[dict[str, str]] = {
+        "PeakMzmine3Parser": "GeneralParser",
+        "FeatureBuilder": "GeneralParser",
+        "SampleBuilder": "GeneralParser",
+        "MgfParser": "GeneralParser",
+        "MetadataFermoParser": "GeneralParser",
+        "PhenotypeParser": "GeneralParser",
+        "SpecLibMgfParser": "GeneralParser",
+        "PhenQualAssigner": "PhenotypeManager",
+        "PhenQuantPercAssigner": "PhenotypeManager",
+        "PhenQuantConcAssigner": "PhenotypeManager",
+    }
+    pattern: ClassVar[re.Pattern] = re.compile(r"^'(\w+)[/']")
+
+    def __init__(
+        self: Self,
+        callback: Callable[[dict], Any],
+        n_features: Optional[int] = None,
+        min_interval: float = 1.0,
+    ):
+        super().__init__(level=logging.DEBUG)
+        self.callback = callback
+        self.n_features = n_features
+        self.min_interval = min_interval
+        self.index = -1
+        self.start = time.monotonic()
+        self.last_report = float("-inf")
+
+    @classmethod
+    def module_index(cls, message: str) -> Optional[int]:
+        """Find the step of a run that emitted a fermo_core log message
+
+        Arguments:
+            message: the log message
+
+        Returns:
+            The index of the step in 'modules' or None if not recognized
+        """
+        found = cls.pattern.match(message)
+        if found is None:
+            return None
+        name = cls.aliases.get(found.group(1), found.group(1))
+        return cls.modules.index(name) if name in cls.modules else None
+
+    def state(self: Self) -> dict:
+        """Return the current progress state
+
+        Returns:
+            A json-compatible dict with the current module, its 1-based index and
+            the total number of modules, the elapsed time in seconds, and the
+            total number of features of the run (fermo_core does not report how
+            many features a module has processed)
+        """
+        return {
+            "module": self.modules[self.index] if self.index >= 0 else None,
+            "module_index": self.index + 1,
+            "module_total": len(self.modules),
+            "elapsed": round(time.monotonic() - self.start, 1),
+            "features_total": self.n_features,
+        }
+
+    def report(self: Self):
+        """Pass the current progress state to the callback"""
+        self.last_report = time.monotonic()
+        self.callback(self.state())
+
+    def emit(self: Self, record: logging.LogRecord):
+        """Advance the current step from a log record and report if due
+
+        Arguments:
+            record: the log record of the 'fermo_core' logger
+        """
+        try:
+            index = self.module_index(record.getMessage())
+            if index is not None and index > self.index:
+                self.index = index
+                self.report()
+            elif time.monotonic() - self.last_report >= self.min_interval:
+                self.report()
+        except Exception:
+            self.handleError(record)
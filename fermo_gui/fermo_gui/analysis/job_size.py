@@ -0,0 +1,163 @@
+"""Estimates the size of fermo_core jobs to route them to a Celery queue
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from pathlib import Path
+from typing import ClassVar, Optional, Self
+
+from pydantic import BaseModel
+
+
+def count_rows(path: Optional[str | Path]) -> Optional[int]:
+    """Count the non-empty lines of a table file after the header
+
+    Arguments:
+        path: the path to the file, if any
+
+    Returns:
+        The number of rows, or None if no file is given or it cannot be read
+    """
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as infile:
+            return max(sum(1 for line in infile if line.strip()) - 1, 0)
+    except OSError:
+        return None
+
+
+class JobSize(BaseModel):
+    """Estimates the cost of a fermo_core job from its parameters and input files
+
+    The cost is approximated by the number of spectrum comparisons of the enabled
+    modules, weighted by their relative expense ('module_weights'), plus one per
+    feature. Spectral similarity networking compares all pairs of MS/MS spectra,
+    library matching compares each spectrum against each library spectrum. The
+    size of the antiSMASH KnownClusterBlast library is not known before the run
+    and assumed to be 'as_kcb_library'.
+
+    Attributes:
+        n_features: the number of features in the peaktable
+        n_spectra: the number of MS/MS spectra
+        n_library: the number of spectra in the spectral library
+        modules: the enabled modules that compare spectra, as '<section>/<module>'
+    """
+
+    n_features: int = 0
+    n_spectra: int = 0
+    n_library: int = 0
+    modules: list[str] = []
+
+    module_weights: ClassVar[dict[str, float]] = {
+        "spec_sim_networking/modified_cosine": 1.0,
+        "spec_sim_networking/ms2deepscore": 0.1,
+        "spectral_library_matching/modified_cosine": 1.0,
+        "spectral_library_matching/ms2deepscore": 0.1,
+        "as_kcb_matching/modified_cosine": 1.0,
+        "as_kcb_matching/ms2deepscore": 0.1,
+    }
+    as_kcb_library: ClassVar[int] = 1000
+
+    @staticmethod
+    def count_spectra(path: Optional[str]) -> int:
+        """Count the spectra of an MGF file
+
+        Arguments:
+            path: the path to the file, if any
+
+        Returns:
+            The number of spectra; 0 if no file is given or it cannot be read
+        """
+        if path is None:
+            return 0
+        try:
+            with open(path, "rb") as infile:
+                return sum(1 for line in infile if line.startswith(b"BEGIN IONS"))
+        except OSError:
+            return 0
+
+    @classmethod
+    def from_params(cls, params: dict, n_features: Optional[int] = None) -> Self:
+        """Estimate the size of a job from its parameters dict
+
+        Arguments:
+            params: the parameters as written to 'parameters.json'
+            n_features: the number of features, if already counted
+
+        Returns:
+            A JobSize instance
+        """
+        files = params.get("files", {})
+        modules = []
+        for section in ("core_modules", "additional_modules"):
+            for name, settings in params.get(section, {}).items():
+                for algorithm, values in settings.items():
+                    key = f"{name}/{algorithm}"
+                    if (
+                        key in cls.module_weights
+                        and isinstance(values, dict)
+                        and values.get("activate_module")
+                    ):
+                        modules.append(key)
+
+        if n_features is None:
+            n_features = count_rows(files.get("peaktable", {}).get("filepath")) or 0
+        return cls(
+            n_features=n_features,
+            n_spectra=cls.count_spectra(files.get("msms", {}).get("filepath")),
+            n_library=cls.count_spectra(
+                files.get("spectral_library", {}).get("filepath")
+            ),
+            modules=modules,
+        )
+
+    def cost(self: Self) -> float:
+        """Estimate the cost of the job
+
+        Returns:
+            The weighted number of spectrum comparisons plus the number of features
+        """
+        comparisons = {
+            "spec_sim_networking": self.n_spectra * (self.n_spectra - 1) / 2,
+            "spectral_library_matching": self.n_spectra * self.n_library,
+            "as_kcb_matching": self.n_spectra * self.as_kcb_library,
+        }
+        return self.n_features + sum(
+            self.module_weights[module] * comparisons[module.split("/")[0]]
+            for module in self.modules
+        )
+
+    def queue(self: Self, routes: list) -> str:
+        """Select the queue of the job from a routing table
+
+        Arguments:
+            routes: pairs of queue name and maximum cost (None for no limit), in
+                ascending order of maximum cost
+
+        Returns:
+            The name of the first queue accepting the cost; the last queue if none
+        """
+        cost = self.cost()
+        for name, max_cost in routes:
+            if max_cost is None or cost <= max_cost:
+                return name
+        return routes[-1][0]
@@ -0,0 +1,174 @@
+"""Pluggable JSON codec with an optional fast native backend
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Optional, Self, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """Encodes and decodes JSON with the fastest available backend.
+
+    The 'orjson' backend is used if the optional 'orjson' package is installed,
+    the stdlib 'json' module otherwise. Text that the native backend rejects (e.g.
+    the non-standard 'NaN' written by the stdlib) is decoded with the stdlib, and
+    encoding falls back to the stdlib for objects the native backend does not
+    support. Decoding errors are always raised as json.JSONDecodeError (a
+    ValueError). Unlike the stdlib, orjson encodes NaN and infinity as null.
+
+    Attributes:
+        backend: the name of the backend in use
+    """
+
+    backends = ("orjson", "json")
+
+    def __init__(self: Self, backend: Optional[str] = None):
+        if backend is None:
+            backend = "orjson" if orjson is not None else "json"
+        if backend not in self.available():
+            raise ValueError(f"JSON backend '{backend}' is not available.")
+        self.backend = backend
+
+    @classmethod
+    def available(cls) -> list[str]:
+        """Return the names of the installed backends
+
+        Returns:
+            A list of backend names, fastest first
+        """
+        return [
+            backend
+            for backend in cls.backends
+            if backend != "orjson" or orjson is not None
+        ]
+
+    def loads(self: Self, data: Union[str, bytes]) -> Any:
+        """Decode a JSON document
+
+        Arguments:
+            data: the JSON text as str or utf-8 encoded bytes
+
+        Returns:
+            The decoded object
+
+        Raises:
+            json.JSONDecodeError: invalid JSON
+        """
+        if self.backend == "orjson":
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(data)
+
+    def dumpb(
+        self: Self,
+        obj: Any,
+        indent: bool = False,
+        sort_keys: bool = False,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> bytes:
+        """Encode an object as utf-8 encoded JSON
+
+        Arguments:
+            obj: the json-compatible object
+            indent: indent nested structures by two spaces instead of compact output
+            sort_keys: sort the keys of objects
+            default: called for objects that cannot be serialized otherwise
+
+        Returns:
+            The JSON document as bytes
+        """
+        if self.backend == "orjson":
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=default, option=option)
+            except TypeError:
+                pass
+        return json.dumps(
+            obj,
+            indent=2 if indent else None,
+            separators=None if indent else (",", ":"),
+            sort_keys=sort_keys,
+            default=default,
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+    def dumps(
+        self: Self,
+        obj: Any,
+        indent: bool = False,
+        sort_keys: bool = False,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> str:
+        """Encode an object as JSON text
+
+        Arguments:
+            obj: the json-compatible object
+            indent: indent nested structures by two spaces instead of compact output
+            sort_keys: sort the keys of objects
+            default: called for objects that cannot be serialized otherwise
+
+        Returns:
+            The JSON document as str
+        """
+        return self.dumpb(obj, indent, sort_keys, default).decode("utf-8")
+
+    def load(self: Self, path: Union[str, Path]) -> Any:
+        """Read and decode a JSON file
+
+        Arguments:
+            path: the path to the file
+
+        Returns:
+            The decoded object
+
+        Raises:
+            json.JSONDecodeError: invalid JSON
+        """
+        with open(path, "rb") as infile:
+            return self.loads(infile.read())
+
+    def dump(self: Self, obj: Any, path: Union[str, Path], indent: bool = False):
+        """Encode an object and write it to a JSON file
+
+        Arguments:
+            obj: the json-compatible object
+            path: the path to the file
+            indent: indent nested structures by two spaces instead of compact output
+        """
+        with open(path, "wb") as outfile:
+            outfile.write(self.dumpb(obj, indent))
+
+
+codec = JsonCodec()
@@ -0,0 +1,178 @@
+"""Indexes the membership of features and samples in group categories
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Optional, Self
+
+import numpy as np
+from pydantic import BaseModel
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+
+
+class MembershipIndex(BaseModel):
+    """Answers group and category membership queries with bitsets
+
+    Each group category listed in the store metadata has a bitset over the feature
+    rows and one over the samples of the store. Queries over several categories
+    are answered by set algebra on the packed bitsets and only unpacked into
+    boolean masks at the end.
+
+    Attributes:
+        store: a ColumnarStore of the job, up to date with the session file
+    """
+
+    store: ColumnarStore
+
+    @property
+    def categories(self: Self) -> list[tuple[str, str]]:
+        """Return the (group, category) pairs in the order of the bitset rows"""
+        return [tuple(pair) for pair in self.store.read_json("meta")["categories"]]
+
+    def select(
+        self: Self,
+        categories: Optional[list[str]] = None,
+        group: Optional[str] = None,
+    ) -> list[int]:
+        """Return the bitset rows of categories, optionally restricted to a group
+
+        Arguments:
+            categories: category names; None for all categories
+            group: the group identifier; None for all groups
+
+        Returns:
+            A list of bitset row indices
+        """
+        return [
+            i
+            for i, (group_id, category) in enumerate(self.categories)
+            if (categories is None or category in categories)
+            and (group is None or group_id == group)
+        ]
+
+    @staticmethod
+    def union(bits: np.ndarray, rows: list[int]) -> np.ndarray:
+        """Combine the bitsets of several categories with bitwise or
+
+        Arguments:
+            bits: the packed bitsets, one row per category
+            rows: the rows to combine
+
+        Returns:
+            The packed bitset of elements in any of the categories
+        """
+        if not rows:
+            return np.zeros(bits.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(bits[rows], axis=0)
+
+    @staticmethod
+    def intersection(bits: np.ndarray, rows: list[int]) -> np.ndarray:
+        """Combine the bitsets of several categories with bitwise and
+
+        Arguments:
+            bits: the packed bitsets, one row per category
+            rows: the rows to combine
+
+        Returns:
+            The packed bitset of elements in all of the categories
+        """
+        if not rows:
+            return np.zeros(bits.shape[1], dtype=np.uint8)
+        return np.bitwise_and.reduce(bits[rows], axis=0)
+
+    def feature_mask(
+        self: Self, categories: list[str], every: bool = False
+    ) -> np.ndarray:
+        """Return the features in any (or every) of the categories
+
+        Arguments:
+            categories: category names
+            every: if True, features must be in all categories
+
+        Returns:
+            A boolean mask over the feature rows
+        """
+        combine = self.intersection if every else self.union
+        bits = combine(self.store.column("category_features"), self.select(categories))
+        return np.unpackbits(bits, count=len(self.store.column("f_id"))).astype(bool)
+
+    def sample_mask(
+        self: Self, categories: list[str], every: bool = False
+    ) -> np.ndarray:
+        """Return the samples in any (or every) of the categories
+
+        Arguments:
+            categories: category names
+            every: if True, samples must be in all categories
+
+        Returns:
+            A boolean mask over the samples, in the order of the store metadata
+        """
+        combine = self.intersection if every else self.union
+        bits = combine(self.store.column("category_samples"), self.select(categories))
+        return np.unpackbits(
+            bits, count=len(self.store.read_json("meta")["sample_ids"])
+        ).astype(bool)
+
+    def group_categories(self: Self) -> dict[str, list[str]]:
+        """Return the categories of each group
+
+        Returns:
+            A dict of group identifier to category names
+        """
+        groups = {}
+        for group_id, category in self.categories:
+            groups.setdefault(group_id, []).append(category)
+        return groups
+
+    def feature_categories(self: Self) -> dict[int, list[str]]:
+        """Return the categories of each feature that is in at least one
+
+        Returns:
+            A dict of feature identifier to category names
+        """
+        categories = self.categories
+        f_ids = self.store.column("f_id")
+        members = np.unpackbits(
+            self.store.column("category_features"), axis=1, count=len(f_ids)
+        )
+        result = {}
+        for i, row in zip(*np.nonzero(members.T), strict=True):
+            result.setdefault(int(f_ids[i]), []).append(categories[row][1])
+        return result
+
+    def sample_categories(self: Self) -> dict[str, dict[str, str]]:
+        """Return the category of each sample per group
+
+        Returns:
+            A dict of sample identifier to a dict of group identifier to category
+        """
+        categories = self.categories
+        sample_ids = self.store.read_json("meta")["sample_ids"]
+        members = np.unpackbits(
+            self.store.column("category_samples"), axis=1, count=len(sample_ids)
+        )
+        result = {}
+        for i, row in zip(*np.nonzero(members.T), strict=True):
+            group_id, category = categories[row]
+            result.setdefault(sample_ids[i], {})[group_id] = category
+        return result
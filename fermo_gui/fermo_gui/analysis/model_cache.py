@@ -0,0 +1,174 @@
+"""Keeps the fermo_core dependencies and models warm across worker tasks
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Self
+from urllib.parse import urlparse
+
+from fermo_core.config.class_default_settings import DefaultPaths
+from ms2deepscore.models import load_model
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCache:
+    """Loads the ms2deepscore model once per worker process and reuses it.
+
+    fermo_core loads the model from disk in each run of the ms2deepscore networking
+    and library matching modules. 'install' replaces the 'load_model' function
+    these modules imported with 'load_model' of this cache, which keeps loaded
+    models if enabled and always measures the time spent loading, so that each
+    job can record whether its setup was cold or warm.
+
+    'preload' is meant to be called once per worker process (Celery signal
+    'worker_process_init'): it imports the heavy modules and loads the default
+    model, if already downloaded, before the first task arrives.
+
+    Attributes:
+        enabled: keep loaded models across tasks
+        modules: the modules importing 'load_model' from ms2deepscore
+    """
+
+    modules = (
+        "fermo_core.data_analysis.sim_networks_manager.class_ms2deepscore_networker",
+        "fermo_core.data_analysis.annotation_manager.class_ms2deepscore_annotator",
+    )
+    preload_modules = ("matchms", "ms2deepscore", "ms2deepscore.models", *modules)
+
+    def __init__(self: Self, enabled: bool = True):
+        self.enabled = enabled
+        self.preloaded = False
+        self.preload_seconds = 0.0
+        self._models: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._load_seconds = 0.0
+        self._loads = 0
+        self._hits = 0
+
+    @staticmethod
+    def default_model_path() -> Path:
+        """Return the path of the default (positive mode) ms2deepscore model"""
+        paths = DefaultPaths()
+        file = urlparse(paths.url_ms2deepscore_pos).path.split("/")[-1]
+        return paths.dirpath_ms2deepscore_pos.joinpath(file)
+
+    def install(self: Self):
+        """Replace 'load_model' in the fermo_core modules by the cached variant"""
+        for name in self.modules:
+            module = importlib.import_module(name)
+            if module.load_model != self.load_model:
+                module.load_model = self.load_model
+
+    def load_model(self: Self, path: Path) -> Any:
+        """Load an ms2deepscore model, from the cache if enabled and present
+
+        Arguments:
+            path: the path to the model file
+
+        Returns:
+            The model
+        """
+        key = str(Path(path).resolve())
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._hits += 1
+                return model
+
+        start = time.perf_counter()
+        model = load_model(path)
+        with self._lock:
+            self._load_seconds += time.perf_counter() - start
+            self._loads += 1
+            if self.enabled:
+                self._models[key] = model
+        return model
+
+    def preload(self: Self):
+        """Import the heavy modules and load the default model if available
+
+        Errors are logged and not raised, to never prevent a worker from starting.
+        """
+        if not self.enabled:
+            return
+        start = time.perf_counter()
+        try:
+            for name in self.preload_modules:
+                importlib.import_module(name)
+            self.install()
+            path = self.default_model_path()
+            if path.exists():
+                self.load_model(path)
+            else:
+                logger.info(f"ms2deepscore model '{path}' not downloaded - SKIP.")
+        except Exception as e:
+            logger.warning(f"Could not preload fermo_core models: {e}")
+        self.preloaded = True
+        self.preload_seconds = time.perf_counter() - start
+        with self._lock:
+            self._load_seconds = 0.0
+            self._loads = 0
+
+    def reset_stats(self: Self):
+        """Reset the load counters, at the start of a task"""
+        with self._lock:
+            self._load_seconds = 0.0
+            self._loads = 0
+            self._hits = 0
+
+    def stats(self: Self) -> dict:
+        """Return the model setup of the current task
+
+        Returns:
+            A dict with 'setup' ('cold' if a model was loaded from disk during the
+            task, 'warm' if models were only reused, 'none' if no model was used),
+            the load time, and the load and hit counts
+        """
+        with self._lock:
+            return {
+                "setup": "cold" if self._loads else "warm" if self._hits else "none",
+                "load_seconds": round(self._load_seconds, 2),
+                "loads": self._loads,
+                "hits": self._hits,
+                "preloaded": self.preloaded,
+            }
+
+    def describe(self: Self, stats: Optional[dict] = None) -> str:
+        """Describe the model setup of the current task for the job log
+
+        Arguments:
+            stats: the stats to describe; the current ones if None
+
+        Returns:
+            A single-line description
+        """
+        stats = stats or self.stats()
+        return (
+            f"Worker setup: {stats['setup']} (ms2deepscore models loaded: "
+            f"{stats['loads']} in {stats['load_seconds']} s, reused: {stats['hits']}; "
+            f"worker preloaded: {stats['preloaded']})."
+        )
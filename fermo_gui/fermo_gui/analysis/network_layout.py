@@ -0,0 +1,114 @@
+"""Computes node coordinates of spectral similarity networks
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Literal, Optional, Self
+
+import networkx as nx
+from pydantic import BaseModel
+
+
+class NetworkLayout(BaseModel):
+    """Computes node coordinates of the subnetworks of a session file
+
+    Coordinates are computed once per job and shipped with the network elements,
+    so that the dashboard can render networks with Cytoscape's 'preset' layout
+    instead of running a force layout in the browser on every view. Layouts are
+    seeded and therefore reproducible.
+
+    Networks with 'max_nodes' or more nodes are not rendered as a whole by the
+    dashboard and are therefore not laid out.
+
+    Attributes:
+        algorithm: 'spring' (Fruchterman-Reingold), 'kamada_kawai', or 'none' to
+            leave the layout to the browser
+        iterations: the iteration budget of the 'spring' layout
+        max_nodes: the size from which networks are not laid out
+        scale: half the width of the layout, in pixels
+        seed: the seed of the initial node positions
+    """
+
+    algorithm: Literal["spring", "kamada_kawai", "none"] = "spring"
+    iterations: int = 50
+    max_nodes: int = 50
+    scale: float = 150.0
+    seed: int = 0
+
+    def layout(self: Self, network: dict) -> Optional[dict[str, dict]]:
+        """Compute the node coordinates of a single subnetwork
+
+        Edges are weighted by their similarity score.
+
+        Arguments:
+            network: a subnetwork in Cytoscape JSON format, as in the session file
+
+        Returns:
+            A dict of node ID to position or None if the network is not laid out
+        """
+        elements = network.get("elements", {})
+        nodes = [str(node["data"]["id"]) for node in elements.get("nodes", [])]
+        if self.algorithm == "none" or not nodes or len(nodes) >= self.max_nodes:
+            return None
+
+        graph = nx.Graph()
+        graph.add_nodes_from(nodes)
+        for edge in elements.get("edges", []):
+            edge_data = edge.get("data", {})
+            graph.add_edge(
+                str(edge_data["source"]),
+                str(edge_data["target"]),
+                weight=float(edge_data.get("weight") or 0.0),
+            )
+
+        if self.algorithm == "spring":
+            positions = nx.spring_layout(
+                graph,
+                iterations=self.iterations,
+                weight="weight",
+                scale=self.scale,
+                seed=self.seed,
+            )
+        else:
+            positions = nx.kamada_kawai_layout(graph, scale=self.scale)
+
+        return {
+            node: {"x": round(float(x), 2), "y": round(float(y), 2)}
+            for node, (x, y) in positions.items()
+        }
+
+    def layout_networks(self: Self, networks: dict) -> dict:
+        """Compute the node coordinates of all subnetworks
+
+        Arguments:
+            networks: the 'networks' section of the session file stats
+
+        Returns:
+            A dict of node positions by algorithm and network ID
+        """
+        layouts = {}
+        for algorithm, network in networks.items():
+            layouts[algorithm] = {}
+            for n_id, subnetwork in (network.get("subnetworks") or {}).items():
+                positions = self.layout(subnetwork)
+                if positions is not None:
+                    layouts[algorithm][str(n_id)] = positions
+        return layouts
@@ -0,0 +1,257 @@
+"""Reuses the results of completed jobs for identical submissions
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Optional, Self
+
+from fermo_gui.analysis.artifact_manager import ArtifactManager
+from fermo_gui.analysis.json_codec import codec
+
+
+class ResultIndex:
+    """Content-addressed index of completed jobs, to skip repeated fermo_core runs.
+
+    A submission is identified by a key over the contents of its input files, its
+    parameters (without file paths or job IDs), and the fermo_core version. At job
+    completion, the key is recorded in 'index_dir' with the job ID. If the same
+    key is submitted again within 'ttl' seconds, the results of that job are
+    hard-linked (or copied, across file systems) into the new job dir instead of
+    starting a new run.
+
+    Each entry counts the submissions it served; the counters of this process are
+    available via 'stats'.
+
+    Attributes:
+        index_dir: the directory holding one entry file per key
+        ttl: the time in seconds a completed job is reused; 0 to disable
+    """
+
+    session_name = ArtifactManager.session_name
+
+    def __init__(self: Self, index_dir: Path, ttl: int = 604800):
+        self.index_dir = Path(index_dir)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "registered": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self: Self) -> bool:
+        """Check if results are reused at all"""
+        return self.ttl > 0
+
+    @staticmethod
+    def hash_dir(path: Path) -> str:
+        """Calculate the sha256 hash over the relative paths and contents of a dir
+
+        Arguments:
+            path: the path to the directory
+
+        Returns:
+            The hexadecimal digest
+        """
+        sha = hashlib.sha256()
+        for file in sorted(item for item in path.rglob("*") if item.is_file()):
+            sha.update(file.relative_to(path).as_posix().encode())
+            sha.update(ArtifactManager.hash_file(file).encode())
+        return sha.hexdigest()
+
+    @classmethod
+    def normalize(cls, params: Any) -> Any:
+        """Replace file and directory paths in the parameters by content hashes
+
+        Arguments:
+            params: the parameters dict, or a value nested in it
+
+        Returns:
+            A copy of the parameters without paths
+        """
+        if isinstance(params, list):
+            return [cls.normalize(item) for item in params]
+        if not isinstance(params, dict):
+            return params
+
+        normalized = {}
+        for key, value in params.items():
+            if key == "filepath" and isinstance(value, str) and Path(value).is_file():
+                normalized[key] = ArtifactManager.hash_file(Path(value))
+            elif key == "directory_path" and isinstance(value, str):
+                path = Path(value)
+                normalized[key] = cls.hash_dir(path) if path.is_dir() else None
+            else:
+                normalized[key] = cls.normalize(value)
+        return normalized
+
+    @classmethod
+    def fingerprint(cls, params: dict) -> str:
+        """Calculate the key of a submission
+
+        Arguments:
+            params: the parameters dict of the job, referencing the input files
+
+        Returns:
+            The hexadecimal sha256 digest
+        """
+        try:
+            core_version = version("fermo_core")
+        except PackageNotFoundError:
+            core_version = None
+        content = codec.dumpb(
+            {"fermo_core": core_version, "parameters": cls.normalize(params)},
+            sort_keys=True,
+        )
+        return hashlib.sha256(content).hexdigest()
+
+    def entry_path(self: Self, key: str) -> Path:
+        """Return the path to the entry file of a key
+
+        Arguments:
+            key: the key of the submission
+
+        Returns:
+            The path to the entry file
+        """
+        return self.index_dir.joinpath(f"{key}.json")
+
+    def _count(self: Self, counter: str):
+        """Increment a counter of this process
+
+        Arguments:
+            counter: the name of the counter
+        """
+        with self._lock:
+            self._counters[counter] += 1
+
+    def register(self: Self, key: str, job_id: str):
+        """Record the completed job for the key, replacing an older entry
+
+        Arguments:
+            key: the key of the submission
+            job_id: the job identifier
+        """
+        if not self.enabled:
+            return
+        entry = {"job_id": job_id, "created": time.time(), "hits": 0}
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            ArtifactManager.write_atomic(self.entry_path(key), codec.dumpb(entry))
+            self._count("registered")
+        except OSError:
+            self._count("errors")
+
+    def lookup(self: Self, key: str, upload_dir: Path) -> Optional[Path]:
+        """Find the results dir of a completed job with the key
+
+        Entries older than 'ttl' or referencing jobs whose results are gone are
+        removed. A hit is counted in the entry.
+
+        Arguments:
+            key: the key of the submission
+            upload_dir: the directory holding the job dirs
+
+        Returns:
+            The path to the results dir or None if no reusable job exists
+        """
+        if not self.enabled:
+            return None
+
+        path = self.entry_path(key)
+        try:
+            entry = codec.load(path)
+            results_dir = Path(upload_dir).joinpath(entry["job_id"], "results")
+            age = time.time() - entry["created"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._count("misses")
+            return None
+
+        if age > self.ttl:
+            self._count("expired")
+            path.unlink(missing_ok=True)
+            return None
+        if not results_dir.joinpath(self.session_name).is_file():
+            self._count("misses")
+            path.unlink(missing_ok=True)
+            return None
+
+        entry["hits"] += 1
+        entry["last_hit"] = time.time()
+        try:
+            ArtifactManager.write_atomic(path, codec.dumpb(entry))
+        except OSError:
+            self._count("errors")
+        self._count("hits")
+        return results_dir
+
+    def link_results(self: Self, source: Path, task_path: Path) -> bool:
+        """Hard-link the results of a job into the dir of a new job
+
+        Files are copied if they cannot be linked. The results dir is assembled
+        next to its final location and moved into place at the end.
+
+        Arguments:
+            source: the results dir of the completed job
+            task_path: the dir of the new job
+
+        Returns:
+            True if the results are in place, False otherwise
+        """
+
+        def _link(src: str, dst: str):
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+        tmp_dir = task_path.joinpath(".results.tmp")
+        try:
+            shutil.copytree(source, tmp_dir, copy_function=_link)
+            os.replace(tmp_dir, task_path.joinpath("results"))
+            return True
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._count("errors")
+            return False
+
+    def stats(self: Self) -> dict:
+        """Return the counters of this process and the number of entries
+
+        Returns:
+            A json-compatible dict
+        """
+        try:
+            entries = sum(1 for _ in self.index_dir.glob("*.json"))
+        except OSError:
+            entries = 0
+        with self._lock:
+            return {**self._counters, "entries": entries, "ttl": self.ttl}
@@ -0,0 +1,211 @@
+"""Searches the features of a job by ID, m/z and retention time, and annotation
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from bisect import bisect_left
+from typing import ClassVar, Optional, Self
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+
+
+class SearchQuery(BaseModel):
+    """A feature search; all given criteria must be met
+
+    Attributes:
+        q: free text matched against the tokens of the annotation names; the last
+            token also matches as prefix
+        f_id: the feature ID
+        mz: the precursor m/z
+        ppm: the m/z tolerance in ppm; used if 'da' is not set
+        da: the m/z tolerance in Da
+        rt: the retention time
+        rt_tol: the retention time tolerance
+        limit: the maximum number of results
+    """
+
+    q: Optional[str] = None
+    f_id: Optional[int] = None
+    mz: Optional[float] = None
+    ppm: float = Field(10.0, ge=0)
+    da: Optional[float] = Field(None, ge=0)
+    rt: Optional[float] = None
+    rt_tol: float = Field(0.1, ge=0)
+    limit: int = Field(50, ge=1, le=1000)
+
+    @model_validator(mode="after")
+    def check_criteria(self: Self) -> Self:
+        """Require at least one search criterion"""
+        if not (self.q and self.q.strip()) and all(
+            value is None for value in (self.f_id, self.mz, self.rt)
+        ):
+            raise ValueError("No search criterion given.")
+        return self
+
+
+class SearchIndex(BaseModel):
+    """Answers feature searches from the search arrays of the columnar store
+
+    m/z and retention time windows are found by bisection of the sorted values,
+    text by bisection of the sorted annotation tokens. Each criterion scores the
+    features it retains between 0 and 1 (text: per query token, weighted by the
+    field it matched in); results are ranked by the sum of the scores.
+
+    Attributes:
+        store: a ColumnarStore of the job, up to date with the session file
+        field_weights: the weight of a token match by field
+        prefix_weight: the factor applied to prefix instead of exact matches
+    """
+
+    store: ColumnarStore
+    field_weights: ClassVar[dict[str, float]] = {
+        "match": 1.0,
+        "class": 0.5,
+        "adduct": 0.8,
+    }
+    prefix_weight: ClassVar[float] = 0.5
+
+    def window_scores(
+        self: Self, name: str, center: float, tolerance: float
+    ) -> np.ndarray:
+        """Score the features by closeness to a value, within a tolerance
+
+        Arguments:
+            name: 'mz' or 'rt'
+            center: the searched value
+            tolerance: the maximum absolute difference
+
+        Returns:
+            Scores over the feature rows; 0 outside of the window
+        """
+        scores = np.zeros(len(self.store.column("f_id")))
+        rows = self.store.sorted_range(name, center - tolerance, center + tolerance)
+        distance = np.abs(np.asarray(self.store.column(name))[rows] - center)
+        scores[rows] = 1.0 - distance / tolerance if tolerance > 0 else 1.0
+        scores[rows] = np.maximum(scores[rows], 1e-6)
+        return scores
+
+    def token_scores(
+        self: Self, tokens: list[str], token: str, prefix: bool
+    ) -> np.ndarray:
+        """Score the features by their best match of a query token
+
+        Arguments:
+            tokens: the sorted indexed tokens
+            token: the query token
+            prefix: also match indexed tokens starting with the query token
+
+        Returns:
+            Scores over the feature rows; 0 where the token does not match
+        """
+        offsets = self.store.column("search_offsets")
+        weights = np.asarray(
+            [self.field_weights[field] for field in ColumnarStore.search_fields]
+        )
+        scores = np.zeros(len(self.store.column("f_id")))
+        start = bisect_left(tokens, token)
+        end = start + 1 if start < len(tokens) and tokens[start] == token else start
+        if prefix:
+            end = bisect_left(tokens, f"{token}￿", lo=start)
+        for i in range(start, end):
+            factor = 1.0 if tokens[i] == token else self.prefix_weight
+            rows = self.store.column("search_rows")[offsets[i] : offsets[i + 1]]
+            fields = self.store.column("search_fields")[offsets[i] : offsets[i + 1]]
+            np.maximum.at(scores, rows, weights[fields] * factor)
+        return scores
+
+    def text_scores(self: Self, text: str) -> np.ndarray:
+        """Score the features by the tokens of a query text; all must match
+
+        A text indexed verbatim (e.g. the adduct '[M+H]+') is searched as a whole.
+
+        Arguments:
+            text: the query text
+
+        Returns:
+            Scores over the feature rows; 0 where any token does not match
+        """
+        index = self.store.read_json("search_tokens")
+        verbatim = text.strip().lower()
+        tokens = ColumnarStore.tokenize(text)
+        if tokens != [verbatim]:
+            i = bisect_left(index, verbatim)
+            if i < len(index) and index[i] == verbatim:
+                return self.token_scores(index, verbatim, prefix=False)
+        if not tokens:
+            return np.zeros(len(self.store.column("f_id")))
+
+        scores = np.zeros(len(self.store.column("f_id")))
+        matched = np.ones(len(scores), dtype=bool)
+        for i, token in enumerate(tokens):
+            token_scores = self.token_scores(index, token, prefix=i == len(tokens) - 1)
+            matched &= token_scores > 0
+            scores += token_scores
+        return np.where(matched, scores / len(tokens), 0.0)
+
+    def search(self: Self, query: SearchQuery) -> dict:
+        """Find and rank the features meeting all criteria of a query
+
+        Arguments:
+            query: the search query
+
+        Returns:
+            A json-compatible dict with the total number of hits and the ranked
+            results, with their m/z, retention time, and samples
+        """
+        f_ids = self.store.column("f_id")
+        criteria = []
+        if query.f_id is not None:
+            scores = np.zeros(len(f_ids))
+            row = self.store.feature_row(query.f_id)
+            if row is not None:
+                scores[row] = 1.0
+            criteria.append(scores)
+        if query.mz is not None:
+            tolerance = (
+                query.da if query.da is not None else query.mz * query.ppm * 1e-6
+            )
+            criteria.append(self.window_scores("mz", query.mz, tolerance))
+        if query.rt is not None:
+            criteria.append(self.window_scores("rt", query.rt, query.rt_tol))
+        if query.q and query.q.strip():
+            criteria.append(self.text_scores(query.q))
+
+        scores = np.sum(criteria, axis=0)
+        hits = np.flatnonzero(np.all(np.asarray(criteria) > 0, axis=0))
+        ranked = hits[np.lexsort((f_ids[hits], -scores[hits]))][: query.limit]
+
+        results = []
+        for row in ranked.tolist():
+            g_info = self.store.general_feature(row)
+            results.append(
+                {
+                    "f_id": int(f_ids[row]),
+                    "score": round(float(scores[row]), 4),
+                    "mz": g_info.get("mz"),
+                    "rt": g_info.get("rt"),
+                    "samples": g_info.get("samples") or [],
+                }
+            )
+        return {"total": len(hits), "results": results}
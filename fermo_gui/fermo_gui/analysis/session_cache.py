@@ -0,0 +1,314 @@
+"""Caches parsed session files and dashboard data across requests
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any, Optional, Self, Union
+
+import redis
+from redis.exceptions import RedisError
+
+from fermo_gui.analysis.json_codec import codec
+
+
+class SessionCache:
+    """Two-tiered cache for data derived from a job's session file.
+
+    Entries are keyed by job ID and kind (e.g. 'session', 'dashboard') and stamped
+    with the modification time and size of the session file they were derived
+    from. A changed session file therefore never returns stale data. The first
+    tier is an in-process LRU cache limited by a memory budget, the second tier an
+    optional Redis instance shared between gunicorn workers.
+
+    Cached values are shared between requests and must be treated as read-only.
+
+    Attributes:
+        max_bytes: memory budget of the in-process tier, approximated by the size
+            of the session files the entries were derived from
+        redis_url: URL of the Redis instance for the shared tier; None to disable
+        redis_ttl: expiration time of entries in the shared tier, in seconds
+    """
+
+    prefix = "fermo:cache"
+
+    def __init__(
+        self: Self,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        redis_ttl: int = 3600,
+    ):
+        self.max_bytes = max_bytes
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "redis_errors": 0,
+        }
+
+    @staticmethod
+    def get_stamp(path: Union[Path, Sequence[Path]]) -> tuple[int, int]:
+        """Get the modification time and size of the source file(s)
+
+        Values derived from several session files (e.g. job comparisons) are
+        stamped with a digest of the modification times and sizes of all files in
+        place of the modification time, and their total size.
+
+        Arguments:
+            path: the path to the session file, or a sequence of paths
+
+        Returns:
+            A tuple of modification time in ns (or digest) and size in bytes
+
+        Raises:
+            FileNotFoundError: a session file does not exist
+        """
+        if isinstance(path, str | Path):
+            stat = Path(path).stat()
+            return stat.st_mtime_ns, stat.st_size
+
+        stamps = [SessionCache.get_stamp(item) for item in path]
+        digest = hashlib.sha256(repr(stamps).encode()).hexdigest()
+        return int(digest[:15], 16), sum(size for _, size in stamps)
+
+    def redis_key(self: Self, job_id: str, kind: str, stamp: tuple[int, int]) -> str:
+        """Assemble the key of an entry in the shared tier
+
+        Arguments:
+            job_id: the job identifier
+            kind: the kind of cached data
+            stamp: the modification time and size of the session file
+
+        Returns:
+            The Redis key
+        """
+        return f"{self.prefix}:{kind}:{job_id}:{stamp[0]}:{stamp[1]}"
+
+    def get_or_build(
+        self: Self,
+        job_id: str,
+        kind: str,
+        path: Union[Path, Sequence[Path]],
+        builder: Callable[[], Any],
+    ) -> Any:
+        """Return the cached value or build, cache, and return it
+
+        Arguments:
+            job_id: the job identifier
+            kind: the kind of cached data
+            path: the path to the session file(s) the value is derived from
+            builder: a callable without arguments returning a json-compatible value
+
+        Returns:
+            The cached or newly built value
+
+        Raises:
+            FileNotFoundError: session file does not exist
+        """
+        stamp = self.get_stamp(path)
+
+        value = self.get_local(job_id, kind, stamp)
+        if value is not None:
+            return value
+
+        value = self.get_redis(job_id, kind, stamp)
+        if value is not None:
+            self.put_local(job_id, kind, stamp, value)
+            return value
+
+        with self._lock:
+            self._counters["misses"] += 1
+
+        value = builder()
+        self.put_local(job_id, kind, stamp, value)
+        self.put_redis(job_id, kind, stamp, value)
+        return value
+
+    def get_local(
+        self: Self, job_id: str, kind: str, stamp: tuple[int, int]
+    ) -> Optional[Any]:
+        """Look up the value in the in-process tier
+
+        Arguments:
+            job_id: the job identifier
+            kind: the kind of cached data
+            stamp: the modification time and size of the session file
+
+        Returns:
+            The cached value or None if not present or outdated
+        """
+        with self._lock:
+            entry = self._entries.get((job_id, kind))
+            if entry is None:
+                return None
+            if entry["stamp"] != stamp:
+                self._remove_local((job_id, kind))
+                return None
+            self._entries.move_to_end((job_id, kind))
+            self._counters["local_hits"] += 1
+            return entry["value"]
+
+    def put_local(
+        self: Self, job_id: str, kind: str, stamp: tuple[int, int], value: Any
+    ):
+        """Store the value in the in-process tier, evicting least recently used ones
+
+        Arguments:
+            job_id: the job identifier
+            kind: the kind of cached data
+            stamp: the modification time and size of the session file
+            value: the value to cache
+        """
+        cost = stamp[1]
+        if cost > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove_local((job_id, kind))
+            while self._entries and self._bytes + cost > self.max_bytes:
+                key = next(iter(self._entries))
+                self._remove_local(key)
+                self._counters["evictions"] += 1
+            self._entries[(job_id, kind)] = {
+                "stamp": stamp,
+                "value": value,
+                "cost": cost,
+            }
+            self._bytes += cost
+
+    def _remove_local(self: Self, key: tuple[str, str]):
+        """Remove an entry from the in-process tier; caller must hold the lock
+
+        Arguments:
+            key: the job identifier and kind of cached data
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["cost"]
+
+    def get_redis(
+        self: Self, job_id: str, kind: str, stamp: tuple[int, int]
+    ) -> Optional[Any]:
+        """Look up the value in the shared tier
+
+        Arguments:
+            job_id: the job identifier
+            kind: the kind of cached data
+            stamp: the modification time and size of the session file
+
+        Returns:
+            The cached value or None if not present or the tier is unavailable
+        """
+        if self._redis is None:
+            return None
+
+        try:
+            raw = self._redis.get(self.redis_key(job_id, kind, stamp))
+        except RedisError:
+            with self._lock:
+                self._counters["redis_errors"] += 1
+            return None
+
+        if raw is None:
+            return None
+
+        with self._lock:
+            self._counters["redis_hits"] += 1
+        return codec.loads(raw)
+
+    def put_redis(
+        self: Self, job_id: str, kind: str, stamp: tuple[int, int], value: Any
+    ):
+        """Store the value in the shared tier
+
+        Arguments:
+            job_id: the job identifier
+            kind: the kind of cached data
+            stamp: the modification time and size of the session file
+            value: the json-compatible value to cache
+        """
+        if self._redis is None:
+            return
+
+        try:
+            self._redis.set(
+                self.redis_key(job_id, kind, stamp),
+                codec.dumpb(value),
+                ex=self.redis_ttl,
+            )
+        except RedisError:
+            with self._lock:
+                self._counters["redis_errors"] += 1
+
+    def invalidate(self: Self, job_id: str):
+        """Remove all entries of a job from both tiers
+
+        Arguments:
+            job_id: the job identifier
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == job_id]:
+                self._remove_local(key)
+            self._counters["invalidations"] += 1
+
+        if self._redis is None:
+            return
+
+        try:
+            keys = list(self._redis.scan_iter(match=f"{self.prefix}:*:{job_id}:*"))
+            if keys:
+                self._redis.delete(*keys)
+        except RedisError:
+            with self._lock:
+                self._counters["redis_errors"] += 1
+
+    def clear(self: Self):
+        """Remove all entries from the in-process tier"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self: Self) -> dict:
+        """Return the hit/miss counters and the current size of the in-process tier
+
+        Returns:
+            A json-compatible dict
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "redis": self._redis is not None,
+            }
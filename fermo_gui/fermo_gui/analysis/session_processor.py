@@ -21,14 +21,19 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import json
 from pathlib import Path
-from typing import Any, Self
+from typing import Any, Optional, Self
 
 import jsonschema
 from pydantic import BaseModel
 from werkzeug.datastructures import FileStorage
 
+from fermo_gui.analysis.json_codec import codec
+from fermo_gui.analysis.session_validator import (
+    TrustedSessionRegistry,
+    validate_session,
+)
+
 
 class SessionProcessor(BaseModel):
     """Responsible for session file input, storage, validation.
@@ -38,73 +43,95 @@ class SessionProcessor(BaseModel):
         form: SessionLoadForm object containing the form data
         online: bool to indicate if application is running online (not local)
         maxsize_file: maximum size of file, in bytes in web-version
+        trusted_sessions: registry of session files that skip schema validation
     """
 
     task_dir: Path
     form: Any
     online: bool
     maxsize_file: int = 8000000
+    trusted_sessions: Optional[TrustedSessionRegistry] = None
+
+    def save_file(self: Self, f: FileStorage) -> tuple[str, Optional[str]]:
+        """Stream the input file to the user-specific dir, counting and hashing it
 
-    def save_file(self: Self, f: FileStorage) -> str:
-        """Store the input file securely in user-specific dir
+        The upload is read in chunks; in the web-version, it is rejected as soon as
+        it surpasses the maximum file size.
 
         Arguments:
             f: A Filestorage instance from input form
 
         Returns:
-            The secured filename used for storage
+            The secured filename used for storage and its trusted session digest,
+            or None if no registry of trusted sessions is available
+
+        Raises:
+            ValueError: file size surpasses maxsize_file value
         """
         filename = "out.fermo.session.json"
-        f.save(self.task_dir.joinpath(filename))
-        return filename
+        mac = self.trusted_sessions.new_mac() if self.trusted_sessions else None
+        size = 0
+        with open(self.task_dir.joinpath(filename), "wb") as outfile:
+            for chunk in iter(lambda: f.stream.read(1048576), b""):
+                size += len(chunk)
+                if self.online and size > self.maxsize_file:
+                    raise ValueError(
+                        f"File '{f.filename}' is too large (maximum size: "
+                        f"'{self.maxsize_file}' bytes."
+                    )
+                if mac is not None:
+                    mac.update(chunk)
+                outfile.write(chunk)
+        return filename, mac.hexdigest() if mac is not None else None
 
     @staticmethod
-    def check_file_size(f: FileStorage, maxsize: int):
-        """Check the specified file size
+    def validate_session_format(filename: str, sess: dict):
+        """Validate a parsed session file against json schema
 
         Arguments:
-            f: A Filestorage instance from input form
-            maxsize: the maximum allowed file size
+            filename: the name of the session file, used in the error message
+            sess: the parsed session file
 
         Raises:
-            ValueError: file size surpasses maxsize value
+            ValueError: invalid session file format
         """
-        file_size = len(f.read())
-        f.seek(0)
-        if file_size > maxsize:
-            raise ValueError(
-                f"File '{f.filename}' is too large (maximum size: '{maxsize}' bytes."
-            )
+        try:
+            validate_session(sess)
+        except jsonschema.exceptions.ValidationError as e:
+            lines = str(e).splitlines()
+            msg = f"{filename}: {lines[0]}"
+            raise ValueError(f"Session file has invalid format: '{msg}'") from e
 
     @staticmethod
-    def verify_session_format(filepath: Path):
+    def verify_session_format(
+        filepath: Path, trusted_sessions: Optional[TrustedSessionRegistry] = None
+    ):
         """Validate uploaded session file against json schema
 
+        Session files registered as produced by this application are not validated.
+
+        Arguments:
+            filepath: the path to the session file
+            trusted_sessions: the registry of trusted session files, if any
+
         Raises:
             ValueError: invalid session file format
         """
-        with open(filepath) as userfile:
-            user_input = json.load(userfile)
+        if trusted_sessions is not None and trusted_sessions.is_trusted(filepath):
+            return
 
-        with open(Path(__file__).parent.parent.joinpath("schema.json")) as infile:
-            schema = json.load(infile)
-
-        try:
-            jsonschema.validate(instance=user_input, schema=schema)
-        except jsonschema.exceptions.ValidationError as e:
-            lines = str(e).splitlines()
-            msg = f"{filepath.name}: {lines[0]}"
-            raise ValueError(f"Session file has invalid format: '{msg}'") from e
+        SessionProcessor.validate_session_format(filepath.name, codec.load(filepath))
 
     @staticmethod
-    def create_params_json(sess_path: Path):
+    def create_params_json(sess_path: Path, sess: Optional[dict] = None):
         """Create a parameters.json file from session.json
 
         Arguments:
             sess_path: a Path pointing towards the session file
+            sess: the parsed session file; read from sess_path if not provided
         """
-        with open(sess_path) as userfile:
-            sess = json.load(userfile)
+        if sess is None:
+            sess = codec.load(sess_path)
 
         params = {
             "files": {},
@@ -428,29 +455,30 @@ class SessionProcessor(BaseModel):
         job_id = sess_path.parent.parent.name
         params_path = sess_path.parent.parent.joinpath(f"{job_id}.parameters.json")
 
-        with open(params_path, "w") as outfile:
-            json.dump(params, outfile, indent=2)
+        codec.dump(params, params_path, indent=True)
 
     def process_forms_session(self: Self):
         """Processes the session input form data
 
+        The upload is streamed to disk once and parsed once; validation and the
+        parameters file are both derived from the parsed session. Trusted session
+        files skip the validation. The dashboard data is built by the worker (see
+        dispatch_dashboard).
+
         Raises:
-            ValueError: session file is empty
+            ValueError: session file is empty, too large, or invalid
         """
         if self.form.session_file.data is None:
             raise ValueError("No FERMO session file was provided.")
 
-        if self.online:
-            self.check_file_size(
-                f=self.form.session_file.data, maxsize=self.maxsize_file
-            )
-
-        f_name = self.save_file(self.form.session_file.data)
+        f_name, digest = self.save_file(self.form.session_file.data)
         f_path = self.task_dir.joinpath(f_name)
 
-        self.verify_session_format(f_path)
+        sess = codec.load(f_path)
+        if digest is None or not self.trusted_sessions.is_registered(digest):
+            self.validate_session_format(f_name, sess)
 
-        self.create_params_json(f_path)
+        self.create_params_json(f_path, sess)
 
     def run_processor(self: Self):
         """Runs the processor steps"""
@@ -0,0 +1,184 @@
+"""Incremental reader for large session files
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Self, TextIO
+
+from pydantic import BaseModel
+
+
+class SessionStreamReader(BaseModel):
+    """Reads a session file section by section without loading it at once.
+
+    Top-level sections are parsed as a whole and collected in 'sections', except
+    for sections with a registered handler: these must be JSON objects and are
+    passed to the handler item by item, without being retained.
+
+    Attributes:
+        path: the path to the session file
+        chunk_size: the number of characters to read from the file at once
+        sections: the fully parsed top-level sections, filled while reading
+        streamed: the keys of the streamed sections that were read completely
+    """
+
+    path: Path
+    chunk_size: int = 1048576
+    sections: dict = {}
+    streamed: list = []
+
+    def read(self: Self, handlers: dict[str, Callable[[str, Any], None]]) -> dict:
+        """Read the session file and dispatch streamed sections to handlers
+
+        Arguments:
+            handlers: maps top-level keys to callables receiving (key, value) items
+
+        Returns:
+            The fully parsed top-level sections without handler
+
+        Raises:
+            ValueError: the file is not a valid JSON object
+        """
+        with open(self.path, encoding="utf-8") as infile:
+            parser = _ChunkParser(infile, self.chunk_size)
+            parser.expect("{")
+            for key in parser.iter_keys():
+                if key in handlers:
+                    parser.expect("{")
+                    for item_key in parser.iter_keys():
+                        handlers[key](item_key, parser.decode_value())
+                    self.streamed.append(key)
+                else:
+                    self.sections[key] = parser.decode_value()
+        return self.sections
+
+
+class _ChunkParser:
+    """Walks a JSON text in chunks, decoding values with the stdlib decoder.
+
+    Only the currently decoded value and the unconsumed part of the last chunk are
+    held in memory.
+    """
+
+    def __init__(self: Self, infile: TextIO, chunk_size: int):
+        self.infile = infile
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self: Self, size: int) -> bool:
+        """Append characters from the file to the buffer
+
+        Arguments:
+            size: the minimum number of characters to read
+
+        Returns:
+            False if the end of the file was reached before, True otherwise
+        """
+        if self.eof:
+            return False
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+        chunk = self.infile.read(max(size, self.chunk_size))
+        if chunk == "":
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self: Self) -> str:
+        """Return the next non-whitespace character without consuming it
+
+        Raises:
+            ValueError: unexpected end of file
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill(self.chunk_size):
+                raise ValueError("Session file ended unexpectedly.")
+
+    def expect(self: Self, char: str):
+        """Consume the next non-whitespace character, which must be 'char'
+
+        Raises:
+            ValueError: a different character was found
+        """
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                f"Session file malformed: expected '{char}' but found '{found}'."
+            )
+        self.pos += 1
+
+    def decode_value(self: Self) -> Any:
+        """Decode the next complete JSON value, reading more data as needed
+
+        A value ending exactly at the end of the buffer (e.g. a number) might be
+        truncated and is therefore only accepted at the end of the file.
+
+        Raises:
+            ValueError: invalid JSON
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(len(self.buf) - self.pos)
+
+    def iter_keys(self: Self):
+        """Iterate over the keys of the object whose '{' was already consumed.
+
+        After each yielded key, the caller must consume the corresponding value.
+
+        Yields:
+            The keys of the object
+        """
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(
+                    f"Session file malformed: expected ',' or '}}' but found "
+                    f"'{separator}'."
+                )
@@ -0,0 +1,141 @@
+"""Validates session files against the schema, with a trusted fast path
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import hmac
+from functools import lru_cache
+from pathlib import Path
+from typing import Self
+
+import jsonschema
+from pydantic import BaseModel
+
+from fermo_gui.analysis.json_codec import codec
+
+SCHEMA_PATH = Path(__file__).parent.parent.joinpath("schema.json")
+
+
+@lru_cache(maxsize=1)
+def get_validator() -> jsonschema.protocols.Validator:
+    """Load the session schema and compile its validator once per process
+
+    Returns:
+        The validator instance for the session schema
+    """
+    schema = codec.load(SCHEMA_PATH)
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+def validate_session(session: dict):
+    """Validate a parsed session against the session schema
+
+    Raises the same error as jsonschema.validate, without rebuilding the validator.
+
+    Arguments:
+        session: the parsed session file
+
+    Raises:
+        jsonschema.exceptions.ValidationError: session does not match the schema
+    """
+    error = jsonschema.exceptions.best_match(get_validator().iter_errors(session))
+    if error is not None:
+        raise error
+
+
+class TrustedSessionRegistry(BaseModel):
+    """Registry of session files produced by this application's workers.
+
+    At job completion, an HMAC of the session file (keyed with the app's secret
+    key) is recorded as empty marker file in 'registry_dir'. A session file with a
+    registered HMAC is byte-identical to one written by a worker and can skip the
+    schema validation when loaded again.
+
+    Attributes:
+        registry_dir: the directory holding the marker files
+        secret_key: the key of the HMAC
+        enabled: if False, no session is trusted and nothing is registered
+    """
+
+    registry_dir: Path
+    secret_key: str
+    enabled: bool = True
+
+    def new_mac(self: Self) -> hmac.HMAC:
+        """Create an HMAC-SHA256 object keyed with the secret key
+
+        Returns:
+            The HMAC object, to be fed with the session file content
+        """
+        return hmac.new(self.secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def digest(self: Self, path: Path) -> str:
+        """Calculate the HMAC-SHA256 of a file in chunks
+
+        Arguments:
+            path: the path to the file
+
+        Returns:
+            The hexadecimal digest
+        """
+        mac = self.new_mac()
+        with open(path, "rb") as infile:
+            for chunk in iter(lambda: infile.read(1048576), b""):
+                mac.update(chunk)
+        return mac.hexdigest()
+
+    def register(self: Self, path: Path):
+        """Record a session file as trusted
+
+        Arguments:
+            path: the path to the session file
+        """
+        if not self.enabled:
+            return
+        self.registry_dir.mkdir(parents=True, exist_ok=True)
+        self.registry_dir.joinpath(self.digest(path)).touch()
+
+    def is_registered(self: Self, digest: str) -> bool:
+        """Check if a session file digest was registered
+
+        Arguments:
+            digest: the hexadecimal HMAC-SHA256 of the session file
+
+        Returns:
+            True if the digest belongs to a registered session file
+        """
+        if not self.enabled:
+            return False
+        return self.registry_dir.joinpath(digest).exists()
+
+    def is_trusted(self: Self, path: Path) -> bool:
+        """Check if a session file was registered
+
+        Arguments:
+            path: the path to the session file
+
+        Returns:
+            True if the file is byte-identical to a registered session file
+        """
+        return self.enabled and self.is_registered(self.digest(path))
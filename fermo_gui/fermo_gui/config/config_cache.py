@@ -0,0 +1,50 @@
+"""Configuration for the session and dashboard data cache.
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from flask import Flask
+
+from fermo_gui.analysis.session_cache import SessionCache
+
+
+def configure_cache(app: Flask) -> Flask:
+    """Configure the cache for parsed session files and dashboard data.
+
+    The in-process tier is always active; the shared Redis tier only if
+    'SESSION_CACHE_REDIS_URL' is set.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with added extension SessionCache
+    """
+    app.config.setdefault("SESSION_CACHE_MAX_BYTES", 256000000)
+    app.config.setdefault("SESSION_CACHE_REDIS_URL", None)
+    app.config.setdefault("SESSION_CACHE_REDIS_TTL", 3600)
+
+    app.extensions["session_cache"] = SessionCache(
+        max_bytes=app.config["SESSION_CACHE_MAX_BYTES"],
+        redis_url=app.config["SESSION_CACHE_REDIS_URL"],
+        redis_ttl=app.config["SESSION_CACHE_REDIS_TTL"],
+    )
+    return app
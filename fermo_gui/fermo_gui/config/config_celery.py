@@ -23,11 +23,18 @@ SOFTWARE.
 
 from celery import Celery, Task
 from flask import Flask
+from kombu import Queue
 
 
 def configure_celery(app: Flask) -> Flask:
     """Configure the celery task manager.
 
+    Jobs are routed by their estimated cost (see JobSize) to the queues in
+    'JOB_QUEUES': pairs of queue name and maximum cost (None for no limit), in
+    ascending order of maximum cost. Each queue can be consumed by a separate
+    worker pool ('celery worker -Q <name>'); workers started without '-Q'
+    consume all of them.
+
     Arguments:
         app: The Flask app instance
 
@@ -46,6 +53,7 @@ def configure_celery(app: Flask) -> Flask:
         )
 
     app.config.from_prefixed_env()
+    app.config.setdefault("JOB_QUEUES", [("fast", 10000000), ("heavy", None)])
 
     class FlaskTask(Task):
         """Configure Celery Task to work with app Factory."""
@@ -56,6 +64,8 @@ def configure_celery(app: Flask) -> Flask:
 
     celery_app = Celery(app.name, task_cls=FlaskTask)
     celery_app.config_from_object(app.config["CELERY"])
+    celery_app.conf.task_queues = [Queue(name) for name, _ in app.config["JOB_QUEUES"]]
+    celery_app.conf.task_default_queue = app.config["JOB_QUEUES"][0][0]
     celery_app.set_default()
     app.extensions["celery"] = celery_app
     return app
@@ -0,0 +1,54 @@
+"""Configures the Redis pub/sub channels for job status events
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from flask import Flask
+
+from fermo_gui.analysis.job_events import JobEvents
+
+
+def configure_events(app: Flask) -> Flask:
+    """Configure the publishing and streaming of job status events.
+
+    Events use the Redis instance of the Celery result backend unless
+    'JOB_EVENTS_REDIS_URL' is set; setting it to an empty string disables them,
+    in which case clients fall back to polling the status route.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with added extension JobEvents
+    """
+    app.config.setdefault(
+        "JOB_EVENTS_REDIS_URL", app.config.get("CELERY", {}).get("result_backend")
+    )
+    app.config.setdefault("JOB_EVENTS_TIMEOUT", 600)
+    app.config.setdefault("JOB_EVENTS_HEARTBEAT", 15)
+
+    redis_url = app.config["JOB_EVENTS_REDIS_URL"]
+    app.extensions["job_events"] = JobEvents(
+        redis_url=redis_url if redis_url and redis_url.startswith("redis") else None,
+        timeout=app.config["JOB_EVENTS_TIMEOUT"],
+        heartbeat=app.config["JOB_EVENTS_HEARTBEAT"],
+    )
+    return app
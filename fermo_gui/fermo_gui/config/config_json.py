@@ -0,0 +1,80 @@
+"""Configures the JSON provider of the Flask app
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Any, Self, Union
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from fermo_gui.analysis.json_codec import codec
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider delegating to the shared JSON codec.
+
+    Used by 'jsonify', 'request.get_json', and the 'tojson' template filter.
+    """
+
+    def dumps(self: Self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as JSON text
+
+        Arguments:
+            obj: the data to serialize
+            kwargs: 'indent', 'sort_keys', and 'default' are honored
+
+        Returns:
+            The JSON document as str
+        """
+        return codec.dumps(
+            obj,
+            indent=bool(kwargs.get("indent")),
+            sort_keys=kwargs.get("sort_keys", self.sort_keys),
+            default=kwargs.get("default", self.default),
+        )
+
+    def loads(self: Self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize data from JSON text
+
+        Arguments:
+            s: the JSON text
+            kwargs: ignored
+
+        Returns:
+            The decoded object
+        """
+        return codec.loads(s)
+
+
+def configure_json(app: Flask) -> Flask:
+    """Configure the app to encode and decode JSON with the shared codec.
+
+    Must be called before the Jinja environment is created.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with the CodecJSONProvider
+    """
+    app.json = CodecJSONProvider(app)
+    return app
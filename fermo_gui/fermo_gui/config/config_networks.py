@@ -0,0 +1,49 @@
+"""Configures the precomputed layouts of the spectral similarity networks
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from flask import Flask
+
+from fermo_gui.analysis.network_layout import NetworkLayout
+
+
+def configure_networks(app: Flask) -> Flask:
+    """Configure the layout of networks, computed once per job.
+
+    'NETWORK_LAYOUT' selects the layout algorithm ('spring', 'kamada_kawai', or
+    'none' to lay out networks in the browser) and 'NETWORK_LAYOUT_ITERATIONS'
+    the iteration budget of the 'spring' layout.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with added extension NetworkLayout
+    """
+    app.config.setdefault("NETWORK_LAYOUT", "spring")
+    app.config.setdefault("NETWORK_LAYOUT_ITERATIONS", 50)
+
+    app.extensions["network_layout"] = NetworkLayout(
+        algorithm=app.config["NETWORK_LAYOUT"],
+        iterations=app.config["NETWORK_LAYOUT_ITERATIONS"],
+    )
+    return app
@@ -0,0 +1,43 @@
+"""Configures the delivery of precompressed dashboard resources
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from flask import Flask
+
+
+def configure_resources(app: Flask) -> Flask:
+    """Configure the delivery of precompressed dashboard resources.
+
+    If 'RESOURCE_ACCEL_REDIRECT' is set (e.g. "/_fermo_resources/"), resource files
+    are not sent by the app but handed to nginx via 'X-Accel-Redirect', with the
+    prefix mapped to the upload folder in an internal nginx location.
+    'RESOURCE_MAX_AGE' is the browser cache lifetime of versioned resource URLs.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with resource delivery settings
+    """
+    app.config.setdefault("RESOURCE_ACCEL_REDIRECT", None)
+    app.config.setdefault("RESOURCE_MAX_AGE", 31536000)
+    return app
@@ -0,0 +1,50 @@
+"""Configures the reuse of results for identical submissions
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from pathlib import Path
+
+from flask import Flask
+
+from fermo_gui.analysis.result_index import ResultIndex
+
+
+def configure_reuse(app: Flask) -> Flask:
+    """Configure the index of completed jobs reused for identical submissions.
+
+    A submission with the same input files and parameters as a job completed in
+    the last 'RESULT_REUSE_TTL' seconds gets that job's results without a new
+    fermo_core run; set to 0 to disable.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with added extension ResultIndex
+    """
+    app.config.setdefault("RESULT_REUSE_TTL", 604800)
+
+    app.extensions["result_index"] = ResultIndex(
+        index_dir=Path(app.instance_path).joinpath("result_index"),
+        ttl=app.config["RESULT_REUSE_TTL"],
+    )
+    return app
@@ -0,0 +1,51 @@
+"""Configures the registry of trusted session files
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from pathlib import Path
+
+from flask import Flask
+
+from fermo_gui.analysis.session_validator import TrustedSessionRegistry
+
+
+def configure_validation(app: Flask) -> Flask:
+    """Configure the registry of session files produced by the app's workers.
+
+    Session files registered at job completion skip the schema validation when
+    loaded again; disable with 'TRUSTED_SESSIONS' set to False. Must be called
+    after the 'SECRET_KEY' is set.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with added extension TrustedSessionRegistry
+    """
+    app.config.setdefault("TRUSTED_SESSIONS", True)
+
+    app.extensions["trusted_sessions"] = TrustedSessionRegistry(
+        registry_dir=Path(app.instance_path).joinpath("trusted_sessions"),
+        secret_key=app.config["SECRET_KEY"],
+        enabled=app.config["TRUSTED_SESSIONS"],
+    )
+    return app
@@ -0,0 +1,54 @@
+"""Configures the preloading of fermo_core models in Celery worker processes
+
+Copyright (c) 2022-present Mitja Maximilian Zdouc, PhD
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from celery.signals import worker_process_init
+from flask import Flask
+
+from fermo_gui.analysis.model_cache import ModelCache
+
+
+def configure_worker(app: Flask) -> Flask:
+    """Configure the model cache of the Celery worker processes.
+
+    If 'WORKER_PRELOAD' is enabled, each worker process imports fermo_core's heavy
+    dependencies and loads the ms2deepscore model once when it starts, and keeps
+    the model across tasks; otherwise, each job loads it again.
+
+    Arguments:
+        app: The Flask app instance
+
+    Returns:
+        The Flask app instance with added extension ModelCache
+    """
+    app.config.setdefault("WORKER_PRELOAD", True)
+
+    model_cache = ModelCache(enabled=app.config["WORKER_PRELOAD"])
+    app.extensions["model_cache"] = model_cache
+
+    def _preload(**kwargs):
+        model_cache.preload()
+
+    worker_process_init.connect(
+        _preload, weak=False, dispatch_uid="fermo_gui.model_cache.preload"
+    )
+    return app
@@ -28,6 +28,7 @@ from typing import Union
 from flask import Response, current_app, flash, redirect, render_template, url_for
 from werkzeug.utils import secure_filename
 
+from fermo_gui.analysis.fermo_core_manager import dispatch_dashboard
 from fermo_gui.analysis.general_manager import GeneralManager as GenManager
 from fermo_gui.analysis.session_processor import SessionProcessor
 from fermo_gui.forms.session_load_forms import SessionLoadForm
@@ -37,6 +38,9 @@ from fermo_gui.routes import bp
 def setup_session_load(form: SessionLoadForm) -> Union[str, Response]:
     """Set up conditions for loading a fermo session file
 
+    The dashboard data is built by the worker; the job status page is shown until
+    it is available.
+
     Arguments:
         form: the filled SessionLoadForm instance
 
@@ -54,15 +58,17 @@ def setup_session_load(form: SessionLoadForm) -> Union[str, Response]:
             form=form,
             task_dir=task_path_results,
             online=current_app.config.get("ONLINE"),
+            trusted_sessions=current_app.extensions.get("trusted_sessions"),
         )
         processor.run_processor()
+        dispatch_dashboard(task_id, task_path)
     except Exception as e:
         flash(str(e))
         if task_path.exists():
             shutil.rmtree(task_path, ignore_errors=True)
         return render_template("load_session.html", form=form)
 
-    return redirect(url_for("routes.task_result", job_id=task_id))
+    return redirect(url_for("routes.job_submitted", job_id=task_id))
 
 
 def redirect_existing_job(form: SessionLoadForm) -> Union[str, Response]:
@@ -22,12 +22,35 @@ SOFTWARE.
 """
 
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
+from urllib.parse import quote
 
-from flask import Response, current_app, redirect, render_template, request, url_for
+from celery.result import AsyncResult
+from flask import (
+    Response,
+    current_app,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from redis.exceptions import RedisError
 
+from fermo_gui.analysis.artifact_manager import ArtifactManager
+from fermo_gui.analysis.column_codec import ColumnCodec
+from fermo_gui.analysis.columnar_store import ColumnarStore
 from fermo_gui.analysis.dashboard_manager import DashboardManager
-from fermo_gui.analysis.general_manager import GeneralManager
+from fermo_gui.analysis.fermo_core_manager import (
+    DASHBOARD_FAILURE,
+    RUN_FAILURES,
+    dashboard_task_id,
+    dispatch_dashboard,
+)
+from fermo_gui.analysis.filter_engine import FilterEngine, FilterQuery
+from fermo_gui.analysis.job_comparison import ComparisonQuery, JobComparison
+from fermo_gui.analysis.search_index import SearchIndex, SearchQuery
 from fermo_gui.routes import bp
 
 
@@ -79,27 +102,664 @@ def job_not_found(job_id: str) -> str:
 def task_result(job_id: str) -> Union[str, Response]:
     """Render the result dashboard page for the given job id if found.
 
+    Dashboard overview data is read from the precomputed artifact and kept in the
+    session cache. If the artifact is missing or outdated, its build is dispatched
+    to the worker and the job status page is shown until it is current. The
+    feature table and the sample records are fetched by the page from the resource
+    routes below, and features and networks from the JSON routes when needed.
+
     Arguments:
         job_id: the job identifier, provided by the URL variable
 
     Returns:
-        The dashboard page or the job_not_found page
+        The dashboard page, the job status page, or the job_not_found page
     """
     try:
-        f_sess = GeneralManager().read_data_from_json(
-            location=str(
-                Path(current_app.config.get("UPLOAD_FOLDER"))
-                .joinpath(job_id)
-                .joinpath("results")
-            ),
-            filename="out.fermo.session.json",
-        )
+        data = _load_dashboard(job_id)
     except FileNotFoundError:
         return redirect(url_for("routes.job_not_found", job_id=job_id))
 
+    if data is None:
+        _request_dashboard(job_id)
+        return redirect(url_for("routes.job_submitted", job_id=job_id))
+
     if request.method == "GET":
-        manager = DashboardManager()
-        manager.prepare_data_get(f_sess)
+        samples = data.get("stats_samples") or []
         return render_template(
-            "dashboard.html", data=manager.provide_data_get(), job_id=job_id
+            "dashboard.html",
+            data=data,
+            job_id=job_id,
+            first_sample=samples[0] if samples else None,
+        )
+
+
+def _results_dir(job_id: str) -> Path:
+    """Return the results directory of a job.
+
+    Arguments:
+        job_id: the job identifier
+
+    Returns:
+        The path to the results directory
+    """
+    return (
+        Path(current_app.config.get("UPLOAD_FOLDER"))
+        .joinpath(job_id)
+        .joinpath("results")
+    )
+
+
+def _load_dashboard(job_id: str) -> Optional[dict]:
+    """Load the dashboard overview data of a job, if its artifact is current.
+
+    The artifact is only built by the dashboard stage of the job in the worker
+    (see build_dashboard_artifact), never on the request path. The cached data is
+    stamped with the artifact metadata, so that it is replaced once rebuilt.
+
+    Arguments:
+        job_id: the job identifier
+
+    Returns:
+        The dashboard overview data, referencing the stored resources, or None if
+        the artifact is missing or outdated
+
+    Raises:
+        FileNotFoundError: session file does not exist
+    """
+    results_dir = _results_dir(job_id)
+    session_path = results_dir.joinpath(ArtifactManager.session_name)
+    artifacts = ArtifactManager(results_dir=results_dir)
+    if not artifacts.is_current():
+        session_path.stat()
+        return None
+
+    return current_app.extensions["session_cache"].get_or_build(
+        job_id,
+        "dashboard",
+        [session_path, results_dir.joinpath(ArtifactManager.meta_name)],
+        artifacts.read,
+    )
+
+
+def _request_dashboard(job_id: str):
+    """Dispatch the dashboard stage of a job, unless it is underway or failed.
+
+    The stage is dispatched with the chain of a fermo_core run; it is dispatched
+    on its own if it finished before the artifact became outdated, or if no run
+    is known (e.g. the job was loaded from a session file, or its task states
+    expired).
+
+    Arguments:
+        job_id: the job identifier
+    """
+    results_dir = _results_dir(job_id)
+    if _log_contains(results_dir, (DASHBOARD_FAILURE,)):
+        return
+
+    celery_app = current_app.extensions["celery"]
+    dashboard_state = AsyncResult(dashboard_task_id(job_id), app=celery_app).state
+    if (
+        dashboard_state == "PENDING"
+        and AsyncResult(job_id, app=celery_app).state != "PENDING"
+    ):
+        return
+    dispatch_dashboard(job_id, results_dir.parent)
+
+
+def _dashboard_pending(job_id: str) -> tuple[Response, int]:
+    """Answer a request for dashboard data that is not available (yet).
+
+    Arguments:
+        job_id: the job identifier
+
+    Returns:
+        The job status with the URL to continue with, and status 503
+    """
+    status = _job_status(job_id) or {"status": "running", "progress": None}
+    response = jsonify(_with_url(job_id, status))
+    response.retry_after = 5
+    response.cache_control.no_store = True
+    return response, 503
+
+
+def _send_resource(
+    job_id: str, data: dict, name: str, mimetype: str = "application/json"
+) -> Union[Response, tuple[Response, int]]:
+    """Send a stored dashboard resource, precompressed if the client accepts it.
+
+    The strong ETag is derived from the resource version (format version and
+    session hash), the resource name, and the content coding; requests with a
+    matching 'If-None-Match' header are answered with 304. Requests carrying the
+    current version as 'v' argument may be cached without revalidation.
+    If 'RESOURCE_ACCEL_REDIRECT' is configured, the file is sent by nginx.
+
+    Arguments:
+        job_id: the job identifier
+        data: the dashboard overview data of the job
+        name: the resource name, relative to the resource directory
+        mimetype: the media type of the resource
+
+    Returns:
+        The resource response, or the job status with status 503 if the resource
+        is missing
+    """
+    artifacts = ArtifactManager(results_dir=_results_dir(job_id))
+    version = data["resources"]["version"]
+    if not artifacts.resource_path(name).exists():
+        return _dashboard_pending(job_id)
+
+    accel_prefix = current_app.config.get("RESOURCE_ACCEL_REDIRECT")
+    if accel_prefix:
+        encoding = None
+        response = Response(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = quote(
+            f"{accel_prefix.rstrip('/')}/{job_id}/results/"
+            f"{ArtifactManager.resource_dir_name}/{name}"
+        )
+    else:
+        encoding = request.accept_encodings.best_match(
+            [
+                encoding
+                for encoding in ArtifactManager.encodings
+                if artifacts.resource_path(name, encoding).exists()
+            ]
+        )
+        response = send_file(
+            artifacts.resource_path(name, encoding).resolve(),
+            mimetype=mimetype,
+            etag=False,
+            conditional=False,
+        )
+        if encoding is not None:
+            response.content_encoding = encoding
+
+    response.set_etag(f"{version}-{name}-{encoding or 'identity'}")
+    response.vary.add("Accept-Encoding")
+    if request.args.get("v") == version:
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config.get("RESOURCE_MAX_AGE")
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@bp.route("/results/<job_id>/features/")
+def feature_table(job_id: str) -> Union[Response, tuple[Response, int]]:
+    """Return the feature table of a job as precompressed JSON resource.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+
+    Returns:
+        The feature table, the job status with status 503 while the dashboard data
+        is built, or an error with status 404
+    """
+    try:
+        data = _load_dashboard(job_id)
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+    if data is None:
+        return _dashboard_pending(job_id)
+    return _send_resource(job_id, data, data["resources"]["features"])
+
+
+@bp.route("/results/<job_id>/networks/")
+def network_index(job_id: str) -> Union[Response, tuple[Response, int]]:
+    """Return the member features of all networks as precompressed JSON resource.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+
+    Returns:
+        The network index, the job status with status 503 while the dashboard data
+        is built, or an error with status 404
+    """
+    try:
+        data = _load_dashboard(job_id)
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+    if data is None:
+        return _dashboard_pending(job_id)
+    return _send_resource(job_id, data, data["resources"]["networks"])
+
+
+@bp.route("/results/<job_id>/samples/<path:sample>/")
+def sample_data(job_id: str, sample: str) -> Union[Response, tuple[Response, int]]:
+    """Return the chromatogram records of a single sample as JSON resource.
+
+    With the optional argument 'max_points' set to one of the precomputed trace
+    levels, the traces are downsampled to at most that many points. Clients
+    preferring the ColumnCodec media type in their 'Accept' header receive the
+    records as binary container of typed arrays instead.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+        sample: the sample identifier, provided by the URL variable
+
+    Returns:
+        The list of feature records, the job status with status 503 while the dashboard data
+        is built, or an error with status 404
+    """
+    try:
+        data = _load_dashboard(job_id)
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+    if data is None:
+        return _dashboard_pending(job_id)
+
+    name = data["resources"]["samples"].get(sample)
+    if name is None:
+        return jsonify({"error": "Sample not found"}), 404
+
+    max_points = request.args.get("max_points", type=int)
+    if max_points is not None:
+        if max_points not in data["resources"]["trace_levels"]:
+            return jsonify({"error": "Trace level not found"}), 404
+        name = data["resources"]["sample_levels"][sample].get(str(max_points), name)
+
+    mimetype = request.accept_mimetypes.best_match(
+        ["application/json", ColumnCodec.mimetype], default="application/json"
+    )
+    if mimetype == ColumnCodec.mimetype:
+        name = ArtifactManager.binary_name(name)
+    response = _send_resource(job_id, data, name, mimetype)
+    response.vary.add("Accept")
+    return response
+
+
+def _open_store(results_dir: Path) -> ColumnarStore:
+    """Open the columnar store of a job, (re)building it if outdated.
+
+    Arguments:
+        results_dir: the results directory of the job
+
+    Returns:
+        The up-to-date ColumnarStore
+
+    Raises:
+        FileNotFoundError: session file does not exist
+    """
+    store = ColumnarStore(
+        results_dir=results_dir, layout=current_app.extensions["network_layout"]
+    )
+    if not store.is_current():
+        store.convert()
+    return store
+
+
+@bp.route("/results/<job_id>/features/<int:f_id>/")
+def feature_data(job_id: str, f_id: int) -> Union[Response, tuple[Response, int]]:
+    """Return the general information of a single feature as JSON.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+        f_id: the feature identifier, provided by the URL variable
+
+    Returns:
+        The feature information or an error with status 404
+    """
+    try:
+        store = _open_store(_results_dir(job_id))
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+
+    feature = DashboardManager().build_feature_data(store, f_id)
+    if feature is None:
+        return jsonify({"error": "Feature not found"}), 404
+    return jsonify(feature)
+
+
+@bp.route("/results/<job_id>/networks/<network_type>/<n_id>/")
+def network_data(
+    job_id: str, network_type: str, n_id: str
+) -> Union[Response, tuple[Response, int]]:
+    """Return a single spectral similarity network as JSON.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+        network_type: the networking algorithm, provided by the URL variable
+        n_id: the network identifier, provided by the URL variable
+
+    Returns:
+        The network elements and node features or an error with status 404
+    """
+    try:
+        store = _open_store(_results_dir(job_id))
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+
+    network = DashboardManager().build_network_data(store, network_type, n_id)
+    if network is None:
+        return jsonify({"error": "Network not found"}), 404
+    return jsonify(network)
+
+
+@bp.route("/results/<job_id>/networks/<network_type>/neighborhood/<int:f_id>/")
+def network_neighborhood(
+    job_id: str, network_type: str, f_id: int
+) -> Union[Response, tuple[Response, int]]:
+    """Return a bounded view of the network around a single feature as JSON.
+
+    Used for networks too large to be rendered as a whole. The optional arguments
+    'hops', 'max_nodes', and 'max_edges' limit the returned neighborhood.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+        network_type: the networking algorithm, provided by the URL variable
+        f_id: the feature identifier, provided by the URL variable
+
+    Returns:
+        The neighborhood elements and applied limits or an error with status 404
+    """
+    try:
+        store = _open_store(_results_dir(job_id))
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+
+    neighborhood = DashboardManager().build_network_neighborhood(
+        store,
+        network_type,
+        f_id,
+        hops=request.args.get("hops", 2, type=int),
+        max_nodes=request.args.get("max_nodes", 50, type=int),
+        max_edges=request.args.get("max_edges", 150, type=int),
+    )
+    if neighborhood is None:
+        return jsonify({"error": "Feature not found"}), 404
+    return jsonify(neighborhood)
+
+
+@bp.route("/results/<job_id>/fold_changes/<group>/<group1>/<group2>/")
+def fold_overview(
+    job_id: str, group: str, group1: str, group2: str
+) -> Union[Response, tuple[Response, int]]:
+    """Return the fold changes of all features between two categories as JSON.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+        group: the group identifier, provided by the URL variable
+        group1: the category in the numerator, provided by the URL variable
+        group2: the category in the denominator, provided by the URL variable
+
+    Returns:
+        The fold changes by feature or an error with status 404
+    """
+    try:
+        store = _open_store(_results_dir(job_id))
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+
+    overview = DashboardManager.build_fold_overview(store, group, group1, group2)
+    if overview is None:
+        return jsonify({"error": "Category pair not found"}), 404
+    return jsonify(overview)
+
+
+@bp.route("/results/<job_id>/filter/", methods=["POST"])
+def filter_features(job_id: str) -> Union[Response, tuple[Response, int]]:
+    """Evaluate the dashboard filters of a job and return the retained features.
+
+    The request body is a JSON-serialized FilterQuery.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+
+    Returns:
+        The requested counts and feature IDs, or an error with status 400 or 404
+    """
+    try:
+        query = FilterQuery.model_validate(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter query: {e}"}), 400
+
+    try:
+        store = _open_store(_results_dir(job_id))
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(FilterEngine(store=store).evaluate(query))
+
+
+@bp.route("/results/<job_id>/search/")
+def search_features(job_id: str) -> Union[Response, tuple[Response, int]]:
+    """Search the features of a job by ID, m/z, retention time, and annotation.
+
+    The query string holds the fields of a SearchQuery.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+
+    Returns:
+        The ranked features with their samples, or an error with status 400 or 404
+    """
+    try:
+        query = SearchQuery.model_validate(request.args.to_dict())
+    except ValueError as e:
+        return jsonify({"error": f"Invalid search query: {e}"}), 400
+
+    try:
+        store = _open_store(_results_dir(job_id))
+    except FileNotFoundError:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(SearchIndex(store=store).search(query))
+
+
+@bp.route("/results/compare/")
+def compare_jobs() -> Union[Response, tuple[Response, int]]:
+    """Match the features of several jobs by m/z and retention time.
+
+    The query string holds the fields of a ComparisonQuery, with one 'job_id'
+    argument per job. Jobs are merged in the order of their IDs, so that
+    comparisons are cached per job set and tolerances regardless of the order
+    of the arguments; the area ratios refer to the first job given.
+
+    Returns:
+        The shared and unique features with their area ratios, or an error with
+        status 400 or 404
+    """
+    try:
+        query = ComparisonQuery.model_validate(
+            {**request.args.to_dict(), "job_ids": request.args.getlist("job_id")}
         )
+    except ValueError as e:
+        return jsonify({"error": f"Invalid comparison query: {e}"}), 400
+
+    stores = {}
+    for job_id in sorted(query.job_ids):
+        try:
+            stores[job_id] = _open_store(_results_dir(job_id))
+        except FileNotFoundError:
+            return jsonify({"error": f"Job '{job_id}' not found"}), 404
+
+    comparison = JobComparison(stores=stores, ppm=query.ppm, rt_tol=query.rt_tol)
+    result = current_app.extensions["session_cache"].get_or_build(
+        query.cache_key(),
+        query.cache_kind(),
+        [store.results_dir.joinpath(store.session_name) for store in stores.values()],
+        comparison.compare,
+    )
+    return jsonify(JobComparison.with_reference(result, query.job_ids))
+
+
+def _job_status(job_id: str) -> Optional[dict]:
+    """Derive the status of a job from its task states and its results dir.
+
+    A job is only done once the last task of its chain, the dashboard stage, has
+    stored current dashboard data; until then, a successful fermo_core run is
+    reported as running.
+    The task states are read from the result backend, without parsing any
+    results. If they are not available (e.g. expired, or the job was loaded from a
+    session file), the status is derived from the files in the job dir.
+
+    Arguments:
+        job_id: the job identifier
+
+    Returns:
+        A dict with the status ('queued', 'running', 'done', or 'failed') and the
+        progress of a running job, or None if the job does not exist
+    """
+    results_dir = _results_dir(job_id)
+    if not results_dir.parent.is_dir():
+        return None
+
+    celery_app = current_app.extensions["celery"]
+    try:
+        dashboard_state = AsyncResult(dashboard_task_id(job_id), app=celery_app).state
+        task = AsyncResult(job_id, app=celery_app)
+        state, info = task.state, task.info
+    except RedisError:
+        dashboard_state, state, info = None, None, None
+
+    if state in ("STARTED", "PROGRESS"):
+        return {"status": "running", "progress": info if state == "PROGRESS" else None}
+    if state == "SUCCESS" and not info:
+        return {"status": "failed", "progress": None}
+    if state == "SUCCESS":
+        if dashboard_state in ("SUCCESS", "FAILURE", "REVOKED"):
+            return _dashboard_status(results_dir, dashboard_state)
+        return {"status": "running", "progress": None}
+    if state in ("FAILURE", "REVOKED"):
+        return {"status": "failed", "progress": None}
+
+    if results_dir.joinpath("out.fermo.session.json").exists():
+        return _dashboard_status(results_dir, dashboard_state)
+    if _log_contains(results_dir, RUN_FAILURES):
+        return {"status": "failed", "progress": None}
+    if results_dir.joinpath("out.fermo.log").exists():
+        return {"status": "running", "progress": None}
+    return {"status": "queued", "progress": None}
+
+
+def _dashboard_status(results_dir: Path, dashboard_state: Optional[str]) -> dict:
+    """Derive the status of a job with fermo_core results from its dashboard stage.
+
+    Without current dashboard data, the results cannot be viewed; a job is only
+    done once it is stored.
+
+    Arguments:
+        results_dir: the results directory of the job
+        dashboard_state: the state of the dashboard task, if known
+
+    Returns:
+        A dict with the status: 'done' if the dashboard data is current, 'failed'
+        if building it failed, and 'running' otherwise
+    """
+    if ArtifactManager(results_dir=results_dir).is_current():
+        status = "done"
+    elif dashboard_state in ("FAILURE", "REVOKED") or _log_contains(
+        results_dir, (DASHBOARD_FAILURE,)
+    ):
+        status = "failed"
+    else:
+        status = "running"
+    return {"status": status, "progress": None}
+
+
+def _log_contains(results_dir: Path, markers: tuple[str, ...]) -> bool:
+    """Check if the job log contains a line starting with one of the markers.
+
+    The log is created by fermo_core as soon as a job runs; only the lines
+    written on failure mark a job as failed.
+
+    Arguments:
+        results_dir: the results directory of the job
+        markers: the beginnings of the failure lines
+
+    Returns:
+        True if a line starts with one of the markers
+    """
+    try:
+        with open(results_dir.joinpath("out.fermo.log")) as logfile:
+            return any(line.startswith(markers) for line in logfile)
+    except OSError:
+        return False
+
+
+@bp.route("/results/<job_id>/status/")
+def job_status(job_id: str) -> Union[Response, tuple[Response, int]]:
+    """Return the status and progress of a job as JSON, for polling clients.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+
+    Returns:
+        The status, the progress of a running job, and the URL to continue with
+        once the job is finished, or an error with status 404
+    """
+    status = _job_status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    response = jsonify(_with_url(job_id, status))
+    response.cache_control.no_store = True
+    return response
+
+
+def _with_url(job_id: str, status: dict) -> dict:
+    """Add the job ID and the URL to continue with to a job status.
+
+    Arguments:
+        job_id: the job identifier
+        status: the status dict, with 'status' and 'progress'
+
+    Returns:
+        The status dict, with the results page URL for done jobs and the log page
+        URL for failed jobs
+    """
+    urls = {
+        "done": url_for("routes.task_result", job_id=job_id),
+        "failed": url_for("routes.job_failed", job_id=job_id),
+    }
+    return {**status, "job_id": job_id, "url": urls.get(status.get("status"))}
+
+
+@bp.route("/results/<job_id>/events/")
+def job_events(job_id: str) -> Union[Response, tuple[Response, int]]:
+    """Stream the status of a job as server-sent events until it is finished.
+
+    The status is sent once on connection, then on every event published to the
+    job's channel, with heartbeat comments in between. The stream ends after the
+    final status or after 'JOB_EVENTS_TIMEOUT'; browsers then reconnect.
+
+    Arguments:
+        job_id: the job identifier, provided by the URL variable
+
+    Returns:
+        The event stream, or an error with status 404 or 503 (clients should
+        then poll the status route)
+    """
+    events = current_app.extensions["job_events"]
+    status = _job_status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    subscription = None
+    if status["status"] not in events.final:
+        if not events.enabled:
+            return jsonify({"error": "Job events are disabled"}), 503
+        try:
+            subscription = events.subscribe(job_id)
+        except RedisError:
+            return jsonify({"error": "Job events are unavailable"}), 503
+        status = _job_status(job_id) or status
+
+    first = _with_url(job_id, status)
+    urls = {name: _with_url(job_id, {"status": name})["url"] for name in events.final}
+
+    def _stream():
+        yield events.format_event(first)
+        if subscription is None or first["status"] in events.final:
+            return
+        for data in subscription:
+            if data is not None:
+                data = {**data, "job_id": job_id, "url": urls.get(data.get("status"))}
+            yield events.format_event(data)
+
+    response = Response(_stream(), mimetype="text/event-stream")
+    if subscription is not None:
+        response.call_on_close(subscription.close)
+    response.cache_control.no_store = True
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -21,11 +21,11 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import json
 import shutil
 from pathlib import Path
 from typing import Union
 
+from celery import chain
 from flask import (
     Response,
     current_app,
@@ -37,9 +37,16 @@ from flask import (
 )
 from werkzeug.utils import secure_filename
 
-from fermo_gui.analysis.fermo_core_manager import start_fermo_core_manager
+from fermo_gui.analysis.fermo_core_manager import (
+    build_dashboard_artifact,
+    dashboard_task_id,
+    send_success_email,
+    start_fermo_core_manager,
+)
 from fermo_gui.analysis.general_manager import GeneralManager as GenManager
 from fermo_gui.analysis.input_processor import InputProcessor
+from fermo_gui.analysis.job_size import JobSize
+from fermo_gui.analysis.json_codec import codec
 from fermo_gui.forms.analysis_input_forms import AnalysisForm
 from fermo_gui.routes import bp
 
@@ -47,6 +54,10 @@ from fermo_gui.routes import bp
 def setup_fermo_run(form: AnalysisForm) -> Union[str, Response]:
     """Set up conditions for fermo_core run
 
+    If the results of a completed job with identical input files and parameters
+    are available (see ResultIndex), they are linked into the new job dir and no
+    fermo_core run is started; only the email notification is sent.
+
     Arguments:
         form: the filled AnalysisForm instance
 
@@ -67,8 +78,12 @@ def setup_fermo_run(form: AnalysisForm) -> Union[str, Response]:
         processor.run_processor()
         parameters_dict = processor.return_params()
 
-        with open(f"{task_path}/{task_id}.parameters.json", "w") as outfile:
-            outfile.write(json.dumps(parameters_dict, indent=2, ensure_ascii=False))
+        codec.dump(
+            parameters_dict,
+            task_path.joinpath(f"{task_id}.parameters.json"),
+            indent=True,
+        )
+        job_size = JobSize.from_params(parameters_dict, processor.n_features)
 
     except Exception as e:
         flash(str(e))
@@ -101,11 +116,29 @@ def setup_fermo_run(form: AnalysisForm) -> Union[str, Response]:
             True if (len(form.email.data) != 0 and processor.online) else False
         ),
         "root_url": root_url,
+        "job_cost": job_size.cost(),
+        "queue": job_size.queue(current_app.config["JOB_QUEUES"]),
+        "result_key": None,
     }
-    start_fermo_core_manager.apply_async(
-        kwargs={"metadata": metadata},
-        task_id=metadata["job_id"],
-    )
+
+    result_index = current_app.extensions.get("result_index")
+    if result_index is not None and result_index.enabled:
+        metadata["result_key"] = result_index.fingerprint(parameters_dict)
+        source = result_index.lookup(metadata["result_key"], Path(location))
+        if source is not None and result_index.link_results(source, task_path):
+            send_success_email.apply_async(
+                kwargs={"metadata": metadata}, queue=metadata["queue"]
+            )
+            return redirect(url_for("routes.job_submitted", job_id=task_id))
+
+    chain(
+        start_fermo_core_manager.si(metadata=metadata).set(
+            task_id=metadata["job_id"], queue=metadata["queue"]
+        ),
+        build_dashboard_artifact.s(metadata=metadata).set(
+            task_id=dashboard_task_id(metadata["job_id"]), queue=metadata["queue"]
+        ),
+    ).apply_async()
 
     return redirect(url_for("routes.job_submitted", job_id=metadata["job_id"]))
 
@@ -36,6 +36,17 @@ export function visualizeData(sampleData, networkType = "modified_cosine",
         Plotly.purge('featureChromatogram');
         return;
     } else {
+        const featureIdToBlankId = Object.fromEntries(
+            sampleData.featureId.map((id, index) => [id, sampleData.blankAs?.[index]])
+        );
+        // Category memberships are resolved once per pass into sets of feature IDs
+        const groupMembers = groupFilterValues ? getCategoryMembers(statsFIdGroups, groupFilterValues) : null;
+        const networkExcluded = networkFilterValues ? getCategoryMembers(statsFIdGroups, networkFilterValues) : null;
+        if (networkExcluded && networkFilterValues.includes("blanks")) {
+            Object.entries(featureIdToBlankId).forEach(([id, blank]) => {
+                if (blank === true) networkExcluded.add(String(id));
+            });
+        }
         const combinedData = sampleData.traceRt.map((rt, i) => ({
             traceRt: rt,
             traceInt: sampleData.traceInt[i],
@@ -51,7 +62,6 @@ export function visualizeData(sampleData, networkType = "modified_cosine",
             mz: sampleData.precMz[i],
             sampleCount: sampleData.samples?.[i].length ?? null,
             foldChange: sampleData.fGroupData?.[i]?.[foldSelectGroup] ?? [],
-            featureGroups: Object(statsFIdGroups)?.[sampleData.featureId[i]] ?? [],
             networkFIds: sampleData.fNetwork?.[i] ?? []
         })).sort((a, b) => b.maxPeak - a.maxPeak);
 
@@ -90,17 +100,10 @@ export function visualizeData(sampleData, networkType = "modified_cosine",
                 }
             }
 
-            const groupFilterValid = groupFilterValues ? groupFilterValues.some(value => dataItem.featureGroups.includes(value)) : true;
+            const groupFilterValid = groupMembers ? groupMembers.has(String(dataItem.featureId)) : true;
 
-            const featureIdToBlankId = Object.fromEntries(
-                sampleData.featureId.map((id, index) => [id, sampleData.blankAs?.[index]])
-            );
-            const networkFilterValid = networkFilterValues ? (dataItem.networkFIds.length > 0
-            && !dataItem.networkFIds.some(id =>
-                networkFilterValues.some(value =>
-                    (value === "blanks" && featureIdToBlankId[id] === true) ||
-                    (statsFIdGroups[id] && statsFIdGroups[id].includes(value))
-                ))) : true;
+            const networkFilterValid = networkExcluded ? (dataItem.networkFIds.length > 0
+            && !dataItem.networkFIds.some(id => networkExcluded.has(String(id)))) : true;
 
             if (!isFeatureVisualization &&
                 ((dataItem.novScore < minScore || dataItem.novScore > maxScore) ||
@@ -180,6 +183,27 @@ export function addBoxVisualization(traceInt, traceRt) {
     Plotly.relayout('mainChromatogram', update);
 }
 
+const categoryIndexCache = new WeakMap();
+
+function getCategoryMembers(statsFIdGroups, categories) {
+    // Inverts the feature-to-categories mapping once, then unites the member sets
+    if (!statsFIdGroups) return new Set();
+    let index = categoryIndexCache.get(statsFIdGroups);
+    if (!index) {
+        index = new Map();
+        Object.entries(statsFIdGroups).forEach(([id, featureCategories]) => {
+            featureCategories.forEach(category => {
+                if (!index.has(category)) index.set(category, new Set());
+                index.get(category).add(id);
+            });
+        });
+        categoryIndexCache.set(statsFIdGroups, index);
+    }
+    const members = new Set();
+    categories.forEach(category => index.get(category)?.forEach(id => members.add(id)));
+    return members;
+}
+
 function createLegendItem(name, color, lineCol, type = 'line') {
     return {
         x: [null],
@@ -21,20 +21,30 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 */
 
-import { getSampleData, getFeatureData } from './parsing.js';
+import { getSampleData, getFeatureData, fetchFeatureTable, fetchNetworkIndex, fetchSampleRecords, fetchFilterResult,
+         fetchSearchResults, parseFeatureId } from './parsing.js';
 import { updateFeatureTables, hideTables, clearHeatmaps } from './dynamic_tables.js';
 import { visualizeData, addBoxVisualization } from './chromatogram.js';
 import { visualizeNetwork, hideNetwork } from './network.js';
 import { enableDragAndDrop, disableDragAndDrop } from './dragdrop.js';
-import { initializeFilters, getFeaturesWithinRange, getFilterGroupSelectionFields, populateDropdown } from './filters.js';
+import { initializeFilters, buildFilterSpec, getFilterGroupSelectionFields, populateDropdown } from './filters.js';
 
 document.addEventListener('DOMContentLoaded', function() {
     let dragged;
     let currentBoxParams = null;
     let sampleData;
-    let statsChromatogram;
-    let statsNetwork;
     let statsGroups;
+    let featureTable;
+    let networkIndex;
+    const sampleRecords = {};
+    const pendingSamples = {};
+    let latestSampleRequest = 0;
+    let retainedFeaturesTimer;
+    let latestFilterRequest = 0;
+    let searchTimer;
+    let latestSearchRequest = 0;
+    const filterDebounceMs = 150;
+    const jobId = document.querySelector('.container').getAttribute('data-job-id');
 
     const getCurrentBoxParams = () => currentBoxParams;
 
@@ -46,18 +56,44 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     const chromatogramElement = document.getElementById('mainChromatogram');
-    const networkElement = document.getElementById('cy');
     const groupElement = document.getElementById('groupInfo');
     const featureGroupElement = document.getElementById('statsFIdGroups');
-    statsChromatogram = JSON.parse(chromatogramElement.getAttribute('data-stats-chromatogram'));
-    statsNetwork = JSON.parse(networkElement.getAttribute('data-stats-network'));
+    const rtRange = JSON.parse(chromatogramElement.getAttribute('data-rt-range'));
+    const resourceVersion = chromatogramElement.getAttribute('data-resource-version');
+    // Trace levels in ascending detail; the last level (null) holds the full traces
+    const traceLevels = [...JSON.parse(chromatogramElement.getAttribute('data-trace-levels') ?? '[]'), null];
+    let activeSampleName;
+    let activeTraceLevel;
     statsGroups = JSON.parse(groupElement.getAttribute('data-stats-groups'));
     const statsFIdGroups = JSON.parse(featureGroupElement.getAttribute('data-stats-fgroups'));
 
     const firstSample = document.querySelector('.select-sample');
     if (firstSample) {
         const firstSampleName = firstSample.getAttribute('data-sample-name');
-        sampleData = getSampleData(firstSampleName, statsChromatogram);
+        Promise.all([
+            fetchFeatureTable(jobId, resourceVersion),
+            fetchNetworkIndex(jobId, resourceVersion),
+            loadSample(firstSampleName)
+        ])
+            .then(([table, index, records]) => {
+                featureTable = table;
+                networkIndex = index;
+                initializeDashboard(firstSampleName, records);
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('The dashboard data could not be loaded.');
+            });
+    } else {
+        initializeFilters(drawChromatogram, handleChromatogramClick, addBoxVisualization, updateRetainedFeatures,
+            sampleData, chromatogramElement, getCurrentBoxParams);
+    }
+
+    function initializeDashboard(firstSampleName, records) {
+        // Draw the first sample once the feature table and its records are loaded
+        sampleData = getSampleData(records, featureTable, rtRange, networkIndex);
+        activeSampleName = firstSampleName;
+        activeTraceLevel = 0;
         document.getElementById('activeSample').textContent = `Sample: ${firstSampleName}`;
 
         const networkType = 'modified_cosine';
@@ -70,6 +106,7 @@ document.addEventListener('DOMContentLoaded', function() {
         document.getElementById('networkSelect').addEventListener('change', handleNetworkTypeChange);
         document.getElementById('showBlankFeatures').addEventListener('change', updateRange);
         document.getElementById('findInput').addEventListener('input', updateRange);
+        document.getElementById('findInput').addEventListener('input', updateFindSuggestions);
         document.getElementById('mz1Input').addEventListener('input', updateRange);
         document.getElementById('mz2Input').addEventListener('input', updateRange);
         document.getElementById('sample1Input').addEventListener('input', updateRange);
@@ -88,7 +125,83 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
 
+        initializeFilters(drawChromatogram, handleChromatogramClick, addBoxVisualization, updateRetainedFeatures,
+            sampleData, chromatogramElement, getCurrentBoxParams);
         updateRange();
+        prefetchSamples();
+    }
+
+    function loadSample(sampleName, level = 0) {
+        // Fetch the records of a sample at a trace level once; concurrent requests share the same promise
+        const key = `${traceLevels[level]}/${sampleName}`;
+        if (sampleRecords[key]) {
+            return Promise.resolve(sampleRecords[key]);
+        }
+        if (!pendingSamples[key]) {
+            pendingSamples[key] = fetchSampleRecords(jobId, sampleName, resourceVersion, traceLevels[level])
+                .then(records => {
+                    sampleRecords[key] = records;
+                    return records;
+                })
+                .finally(() => delete pendingSamples[key]);
+        }
+        return pendingSamples[key];
+    }
+
+    async function prefetchSamples() {
+        // Load the remaining samples at the coarsest trace level in the background
+        for (const row of document.querySelectorAll('.select-sample')) {
+            try {
+                await loadSample(row.getAttribute('data-sample-name'));
+            } catch (error) {
+                console.error('Error:', error);
+            }
+        }
+    }
+
+    function drawChromatogram(...args) {
+        // Redrawing removes all listeners of the chromatogram
+        visualizeData(...args);
+        chromatogramElement.on('plotly_relayout', handleChromatogramZoom);
+    }
+
+    function handleChromatogramZoom(event) {
+        // Replace the traces with more detailed ones when zooming in; the zoom window is kept
+        const start = event['xaxis.range[0]'] ?? event['xaxis.range']?.[0];
+        const end = event['xaxis.range[1]'] ?? event['xaxis.range']?.[1];
+        if (start === undefined || end === undefined || !Array.isArray(rtRange)) {
+            return;
+        }
+        const fraction = (end - start) / (rtRange[1] - rtRange[0]);
+        const level = fraction < 0.2 ? traceLevels.length - 1 : (fraction < 0.5 ? traceLevels.length - 2 : 0);
+        if (level <= activeTraceLevel) {
+            return;
+        }
+        const sampleName = activeSampleName;
+        loadSample(sampleName, level)
+            .then(records => {
+                if (sampleName !== activeSampleName || level <= activeTraceLevel) {
+                    return;
+                }
+                activeTraceLevel = level;
+                sampleData.traceRt = records.trace_rt.slice();
+                sampleData.traceInt = records.trace_int.slice();
+                const rows = new Map(records.f_id.map((id, row) => [String(id), row]));
+                const update = { x: [], y: [] };
+                const indices = [];
+                chromatogramElement.data.forEach((trace, i) => {
+                    const row = rows.get(trace.name);
+                    if (row !== undefined && trace.mode === 'lines') {
+                        update.x.push(records.trace_rt[row]);
+                        update.y.push(records.trace_int[row]);
+                        indices.push(i);
+                    }
+                });
+                if (indices.length) {
+                    Plotly.restyle(chromatogramElement, update, indices);
+                }
+            })
+            .catch(error => console.error('Error:', error));
     }
 
     function handleChromatogramClick(data) {
@@ -99,7 +212,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const sampleId = updateFeatureTables(featureId, sampleData, filteredSampleData);
         currentBoxParams = { traceInt: sampleData.traceInt[sampleId], traceRt: sampleData.traceRt[sampleId] };
         addBoxVisualization(currentBoxParams.traceInt, currentBoxParams.traceRt);
-        visualizeNetwork(featureId, statsNetwork, filteredSampleData, sampleData, sampleId, statsChromatogram, networkType);
+        visualizeNetwork(featureId, filteredSampleData, sampleData, sampleId, networkType, jobId);
     }
 
     function handleNetworkTypeChange() {
@@ -109,7 +222,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const sampleId = updateFeatureTables(featureId, sampleData, filteredSampleData);
         updateRange();
         currentBoxParams = { traceInt: sampleData.traceInt[sampleId], traceRt: sampleData.traceRt[sampleId] };
-        visualizeNetwork(featureId, statsNetwork, filteredSampleData, sampleData, sampleId, statsChromatogram, networkType);
+        visualizeNetwork(featureId, filteredSampleData, sampleData, sampleId, networkType, jobId);
     }
 
     function toggleDropdown(containerId) {
@@ -136,8 +249,6 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
 
-    const jobId = document.querySelector('.container').getAttribute('data-job-id');
-
     // Check and enable options based on file availability
     checkAndEnableOption(jobId, 'out.fermo.summary.txt', 'summary');
     checkAndEnableOption(jobId, 'out.fermo.abbrev.csv', 'abbrev');
@@ -164,9 +275,26 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('networkExcludeButton').addEventListener('click', () => toggleDropdown('dropdownNetworkContainer'));
 
     document.querySelectorAll('.select-sample').forEach(row => {
-        row.addEventListener('click', function() {
+        row.addEventListener('click', async function() {
+            if (!featureTable) {
+                return;
+            }
             const sampleName = this.getAttribute('data-sample-name');
-            sampleData = getSampleData(sampleName, statsChromatogram);
+            const requestId = ++latestSampleRequest;
+            let records;
+            try {
+                records = await loadSample(sampleName);
+            } catch (error) {
+                console.error('Error:', error);
+                alert(`The data of sample '${sampleName}' could not be loaded.`);
+                return;
+            }
+            if (requestId !== latestSampleRequest) {
+                return;
+            }
+            sampleData = getSampleData(records, featureTable, rtRange, networkIndex);
+            activeSampleName = sampleName;
+            activeTraceLevel = 0;
             hideNetwork();
             hideTables();
             document.getElementById('activeSample').textContent = `Sample: ${sampleName}`;
@@ -200,13 +328,41 @@ document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('groupFilter').addEventListener('change', updateRange);
             document.getElementById('networkFilter').addEventListener('change', updateRange);
 
-            initializeFilters(visualizeData, handleChromatogramClick, addBoxVisualization, updateRetainedFeatures,
+            initializeFilters(drawChromatogram, handleChromatogramClick, addBoxVisualization, updateRetainedFeatures,
                 sampleData, chromatogramElement, getCurrentBoxParams);
 
             updateRange();
         });
     });
 
+    function updateFindSuggestions() {
+        // Suggest features matching an m/z value or annotation text typed in the find box
+        const value = document.getElementById('findInput').value.trim();
+        const datalist = document.getElementById('findSuggestions');
+        clearTimeout(searchTimer);
+        if (value.length < 2 || !Number.isNaN(parseFeatureId(value))) {
+            datalist.replaceChildren();
+            return;
+        }
+        const query = Number.isNaN(Number(value)) ? { q: value } : { mz: value, da: 0.01 };
+        searchTimer = setTimeout(() => {
+            const requestId = ++latestSearchRequest;
+            fetchSearchResults(jobId, { ...query, limit: 20 })
+                .then(result => {
+                    if (requestId !== latestSearchRequest) {
+                        return;
+                    }
+                    datalist.replaceChildren(...result.results.map(entry => {
+                        const option = document.createElement('option');
+                        option.value = entry.f_id;
+                        option.label = `m/z ${entry.mz} | RT ${entry.rt} | ${entry.samples.length} sample(s)`;
+                        return option;
+                    }));
+                })
+                .catch(error => console.error('Error:', error));
+        }, filterDebounceMs);
+    }
+
     function updateRange() {
         const minScore = parseFloat(document.getElementById('noveltyRange1').value);
         const maxScore = parseFloat(document.getElementById('noveltyRange2').value);
@@ -218,7 +374,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const showOnlyMatchFeatures = document.getElementById('showMatchFeatures').checked;
         const showOnlyAnnotationFeatures = document.getElementById('showAnnotationFeatures').checked;
         const showOnlyBlankFeatures = document.getElementById('showBlankFeatures').checked;
-        const findFeatureId = parseFloat(document.getElementById('findInput').value);
+        const findFeatureId = parseFeatureId(document.getElementById('findInput').value);
         const minMzScore = parseFloat(document.getElementById('mz1Input').value);
         const maxMzScore = parseFloat(document.getElementById('mz2Input').value);
         const minSampleCount = parseFloat(document.getElementById('sample1Input').value);
@@ -237,7 +393,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
         const foldScoreInputsFilled = foldScore && foldGroup1 && foldGroup2 && foldSelectGroup;
 
-        visualizeData(sampleData, networkType, false, minScore, maxScore, findFeatureId,
+        drawChromatogram(sampleData, networkType, false, minScore, maxScore, findFeatureId,
                       minPhenotypeScore, maxPhenotypeScore, showOnlyPhenotypeFeatures,
                       minMatchScore, maxMatchScore, showOnlyMatchFeatures,
                       showOnlyAnnotationFeatures, showOnlyBlankFeatures,
@@ -264,25 +420,38 @@ document.addEventListener('DOMContentLoaded', function() {
 
     function updateRetainedFeatures(minScore, maxScore, findFeatureId,
                                     minPhenotypeScore, maxPhenotypeScore, showOnlyPhenotypeFeatures,
-                                    minMatchRange, maxMatchRange, showOnlyMatchFeatures,
-                                    showAnnotationFeatures, showBlankFeatures,
-                                    minMzScore, maxMzScore, minSampleScore, maxSampleScore,
+                                    minMatchScore, maxMatchScore, showOnlyMatchFeatures,
+                                    showOnlyAnnotationFeatures, showOnlyBlankFeatures,
+                                    minMzScore, maxMzScore, minSampleCount, maxSampleCount,
                                     foldScore, foldGroup1, foldGroup2, foldSelectGroup,
-                                    groupFilterValues, networkFilterValues, statsFIdGroups) {
-        document.querySelectorAll('.select-sample').forEach(row => {
-            const sampleName = row.getAttribute('data-sample-name');
-            const sampleData = getSampleData(sampleName, statsChromatogram);
-            const featuresWithinRange = getFeaturesWithinRange(sampleData, minScore, maxScore, findFeatureId,
-                minPhenotypeScore, maxPhenotypeScore, showOnlyPhenotypeFeatures,
-                minMatchRange, maxMatchRange, showOnlyMatchFeatures,
-                showAnnotationFeatures, showBlankFeatures,
-                minMzScore, maxMzScore, minSampleScore, maxSampleScore,
-                foldScore, foldGroup1, foldGroup2, foldSelectGroup,
-                groupFilterValues, networkFilterValues, statsFIdGroups);
-            row.children[2].textContent = featuresWithinRange;
+                                    groupFilterValues, networkFilterValues) {
+        // Retained features of all samples are counted by the server, once input settles
+        const filters = buildFilterSpec({
+            minScore, maxScore, findFeatureId,
+            minPhenotypeScore, maxPhenotypeScore, showOnlyPhenotypeFeatures,
+            minMatchScore, maxMatchScore, showOnlyMatchFeatures,
+            showOnlyAnnotationFeatures, showOnlyBlankFeatures,
+            minMzScore, maxMzScore, minSampleCount, maxSampleCount,
+            foldScore, foldGroup1, foldGroup2, foldSelectGroup,
+            groupFilterValues, networkFilterValues,
+            networkType: document.getElementById('networkSelect').value
         });
+        clearTimeout(retainedFeaturesTimer);
+        retainedFeaturesTimer = setTimeout(() => {
+            const requestId = ++latestFilterRequest;
+            fetchFilterResult(jobId, filters, ['samples'])
+                .then(result => {
+                    if (requestId !== latestFilterRequest) {
+                        return;
+                    }
+                    document.querySelectorAll('.select-sample').forEach(row => {
+                        const count = result.samples[row.getAttribute('data-sample-name')];
+                        if (count !== undefined) {
+                            row.children[2].textContent = count;
+                        }
+                    });
+                })
+                .catch(error => console.error('Error:', error));
+        }, filterDebounceMs);
     }
-
-    initializeFilters(visualizeData, handleChromatogramClick, addBoxVisualization, updateRetainedFeatures,
-        sampleData, chromatogramElement, getCurrentBoxParams);
 });
\ No newline at end of file
@@ -21,6 +21,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 */
 
+import { parseFeatureId } from './parsing.js';
+
 export function initializeFilters(visualizeData, handleChromatogramClick, addBoxVisualization, updateRetainedFeatures,
                                   sampleData, chromatogramElement, getCurrentBoxParams) {
     const elements = {
@@ -65,7 +67,7 @@ export function initializeFilters(visualizeData, handleChromatogramClick, addBox
         const showOnlyMatchFeatures = elements.showMatchFeatures.checked;
         const showOnlyAnnotationFeatures = elements.showAnnotationFeatures.checked;
         const showOnlyBlankFeatures = elements.showBlankFeatures.checked;
-        const findFeatureId = parseFloat(elements.findFId.value);
+        const findFeatureId = parseFeatureId(elements.findFId.value);
         const minMzScore = parseFloat(elements.mz1Input.value);
         const maxMzScore = parseFloat(elements.mz2Input.value);
         const minSampleCount = parseFloat(elements.sample1Input.value);
@@ -156,62 +158,30 @@ export function initializeFilters(visualizeData, handleChromatogramClick, addBox
     updateRange();
 }
 
-export function getFeaturesWithinRange(sampleData, minScore, maxScore, findFeatureId,
-                                       minPhenotypeScore, maxPhenotypeScore, showOnlyPhenotypeFeatures,
-                                       minMatchScore, maxMatchScore, showOnlyMatchFeatures,
-                                       showOnlyAnnotationFeatures, showOnlyBlankFeatures,
-                                       minMzScore, maxMzScore, minSampleCount, maxSampleCount,
-                                       foldScore, foldGroup1, foldGroup2, foldSelectGroup,
-                                       groupFilterValues, networkFilterValues, statsFIdGroups, networkType) {
-    return sampleData.novScore.reduce((count, score, index) => {
-        const phenotypeScore = sampleData.annotations?.[index]?.phenotypes?.[0]?.score;
-        const matchScore = sampleData.annotations?.[index]?.matches?.[0]?.score;
-        const annotation = sampleData.annotations?.[index]?.adducts ?? null;
-        const mz = sampleData.precMz[index];
-        const blanks = sampleData.blankAs?.[index];
-        const findFeature = sampleData.featureId?.[index];
-        const sampleCount = sampleData.samples[index].length;
-        const foldChanges = sampleData.fGroupData?.[index]?.[foldSelectGroup] ?? [];
-        const featureGroups = Object(statsFIdGroups)?.[findFeature] ?? [];
-        const networkFIds = sampleData.fNetworkCosine?.[index] ?? [];
-
-        const groupFilterValid = groupFilterValues ? groupFilterValues.some(value => featureGroups.includes(value)) : true;
-        const featureIdToBlankId = Object.fromEntries(
-            sampleData.featureId.map((id, index) => [id, sampleData.blankAs?.[index]])
-        );
-        const networkFilterValid = networkFilterValues ? (networkFIds.length > 0 && !networkFIds.some(id =>
-            networkFilterValues.some(value =>
-                (value === "blanks" && featureIdToBlankId[id] === true) ||
-                (statsFIdGroups[id] && statsFIdGroups[id].includes(value))
-            ))) : true;
-
-        let foldValid = !foldScore || !foldGroup1 || !foldGroup2 || !foldSelectGroup;
-        if (!foldValid) {
-            for (const foldChange of foldChanges) {
-                if ((foldChange.group1 === foldGroup1 && foldChange.group2 === foldGroup2) ||
-                    (foldChange.group1 === foldGroup2 && foldChange.group2 === foldGroup1)) {
-                    if (foldChange.factor >= foldScore) {
-                        foldValid = true;
-                        break;
-                    }
-                }
-            }
-        }
-
-        if ((score >= minScore && score <= maxScore) &&
-            (!showOnlyPhenotypeFeatures || (phenotypeScore !== null && phenotypeScore >= minPhenotypeScore && phenotypeScore <= maxPhenotypeScore)) &&
-            (!showOnlyMatchFeatures || (matchScore !== null && matchScore >= minMatchScore && matchScore <= maxMatchScore)) &&
-            (!showOnlyAnnotationFeatures || (annotation !== null)) &&
-            (!showOnlyBlankFeatures || (blanks !== true)) &&
-            (!findFeatureId || (findFeatureId === findFeature)) &&
-            (!maxMzScore || (mz >= minMzScore && mz <= maxMzScore)) &&
-            (!maxSampleCount || (sampleCount >= minSampleCount && sampleCount <= maxSampleCount))
-            && foldValid && groupFilterValid && networkFilterValid
-            ) {
-            return count + 1;
-        }
-        return count;
-    }, 0);
+export function buildFilterSpec({ minScore, maxScore, findFeatureId,
+                                 minPhenotypeScore, maxPhenotypeScore, showOnlyPhenotypeFeatures,
+                                 minMatchScore, maxMatchScore, showOnlyMatchFeatures,
+                                 showOnlyAnnotationFeatures, showOnlyBlankFeatures,
+                                 minMzScore, maxMzScore, minSampleCount, maxSampleCount,
+                                 foldScore, foldGroup1, foldGroup2, foldSelectGroup,
+                                 groupFilterValues, networkFilterValues, networkType }) {
+    // Filter spec evaluated by the server (see filter_engine.py); mirrors visualizeData
+    const orZero = value => Number.isFinite(value) ? value : 0;
+    return {
+        novelty: Number.isFinite(minScore) && Number.isFinite(maxScore) ? [minScore, maxScore] : null,
+        phenotype: showOnlyPhenotypeFeatures ? [orZero(minPhenotypeScore), orZero(maxPhenotypeScore)] : null,
+        match: showOnlyMatchFeatures ? [orZero(minMatchScore), orZero(maxMatchScore)] : null,
+        annotation: showOnlyAnnotationFeatures,
+        exclude_blank: showOnlyBlankFeatures,
+        f_id: Number.isInteger(findFeatureId) && findFeatureId !== 0 ? findFeatureId : null,
+        mz: maxMzScore ? [orZero(minMzScore), maxMzScore] : null,
+        samples: maxSampleCount ? [orZero(minSampleCount), maxSampleCount] : null,
+        fold: foldScore && foldGroup1 && foldGroup2 && foldSelectGroup
+            ? { group: foldSelectGroup, group1: foldGroup1, group2: foldGroup2, factor: foldScore }
+            : null,
+        groups: groupFilterValues,
+        network: networkFilterValues ? { algorithm: networkType, exclude: networkFilterValues } : null
+    };
 }
 
 export function getFilterGroupSelectionFields(statsGroups) {
@@ -0,0 +1,96 @@
+/* Polls the status of a submitted job and opens its results once finished
+
+Copyright (c) 2024-present Hannah Esther Augustijn, MSc
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+*/
+
+const statusElement = document.getElementById('jobStatus');
+const statusText = document.getElementById('jobStatusText');
+const statusBar = document.getElementById('jobStatusBar');
+const minPollMs = 3000;
+const maxPollMs = 30000;
+
+function showProgress(progress) {
+    // Show the current fermo_core module and the elapsed time of a running job
+    if (!progress || !progress.module) {
+        statusText.textContent = 'The job is running...';
+        return;
+    }
+    const minutes = Math.floor(progress.elapsed / 60);
+    const seconds = Math.floor(progress.elapsed % 60);
+    const features = progress.features_total !== null ?
+        `, ${progress.features_total} features in total` : '';
+    statusText.textContent = `Running '${progress.module}' (step ${progress.module_index} of ` +
+        `${progress.module_total}${features}), ${minutes} min ${seconds} s elapsed`;
+    statusBar.style.width = `${Math.round(100 * progress.module_index / progress.module_total)}%`;
+}
+
+function pollStatus(delay) {
+    // Poll with growing intervals; go to the results or the error log once finished
+    fetch(statusElement.getAttribute('data-status-url'), { cache: 'no-store' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Could not get the job status (${response.status}).`);
+            }
+            return response.json();
+        })
+        .then(status => {
+            if (status.url) {
+                window.location.assign(status.url);
+                return;
+            }
+            if (status.status === 'running') {
+                showProgress(status.progress);
+            }
+            setTimeout(() => pollStatus(Math.min(delay * 1.5, maxPollMs)), delay);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            setTimeout(() => pollStatus(maxPollMs), maxPollMs);
+        });
+}
+
+function listenStatus() {
+    // Receive status events from the server; fall back to polling if unavailable
+    const source = new EventSource(statusElement.getAttribute('data-events-url'));
+    source.addEventListener('status', event => {
+        const status = JSON.parse(event.data);
+        if (status.url) {
+            source.close();
+            window.location.assign(status.url);
+        } else if (status.status === 'running') {
+            showProgress(status.progress);
+        }
+    });
+    source.onerror = () => {
+        // The browser reconnects after a stream ended; a refused stream is closed
+        if (source.readyState === EventSource.CLOSED) {
+            pollStatus(minPollMs);
+        }
+    };
+}
+
+if (statusElement) {
+    if (window.EventSource) {
+        listenStatus();
+    } else {
+        pollStatus(minPollMs);
+    }
+}
@@ -21,48 +21,98 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 */
 
-import { getUniqueFeatureIds, getFeatureDetails, getFeatureData } from './parsing.js';
+import { getUniqueFeatureIds, getFeatureDetails, getFeatureData, fetchNetworkData, fetchNetworkNeighborhood } from './parsing.js';
 import { updateFeatureTables } from './dynamic_tables.js';
 
-export function visualizeNetwork(fId, statsNetwork, filteredSampleData, sampleData, sampleId, statsChromatogram, networkType) {
+const networkCache = new Map();
+let latestNetworkRequest = 0;
+
+function cachedRequest(key, fetchData) {
+    if (!networkCache.has(key)) {
+        const request = fetchData();
+        request.catch(() => networkCache.delete(key));
+        networkCache.set(key, request);
+    }
+    return networkCache.get(key);
+}
+
+function loadNetwork(jobId, networkType, networkId) {
+    return cachedRequest(`${networkType}/${networkId}`,
+        () => fetchNetworkData(jobId, networkType, networkId));
+}
+
+function loadNeighborhood(jobId, networkType, fId) {
+    // Large networks are not sent as a whole; only the neighborhood of the feature
+    return cachedRequest(`${networkType}/neighborhood/${fId}`,
+        () => fetchNetworkNeighborhood(jobId, networkType, fId)
+            .then(networkInfo => networkInfo ?? { network: "large_network" }));
+}
+
+export function visualizeNetwork(fId, filteredSampleData, sampleData, sampleId, networkType, jobId) {
     const cos_id = sampleData.idNetCos[sampleId];
     const ms_id = sampleData.idNetMs[sampleId];
     const networkId = networkType === 'modified_cosine' ? cos_id : ms_id;
 
     const filteredFeatureIds = filteredSampleData.featureId.filter(id => id.toString() !== fId);
 
-    if (statsNetwork[networkType]) {
-        // Check the size of the network. Label set in the dashboard_manager.py
-        if (statsNetwork[networkType][networkId] === "large_network") {
-            hideNetwork();
-            document.getElementById('legend').style.display = '';
-            document.getElementById('activeFeature').textContent =
-            "Network is too big to render on the dashboard for feature: " + fId;;
-            return;
-        } else if (statsNetwork[networkType][networkId]) {
-            const networkData = statsNetwork[networkType][networkId].elements;
-            const uniqueNIds = networkData.nodes.map(node => node.data.id);
-            const uniqueFIds = getUniqueFeatureIds(statsChromatogram);
-            const featureDetails = getFeatureDetails(uniqueNIds, statsChromatogram);
-
-            const cy = cytoscape({
-                container: document.getElementById('cy'),
-                elements: networkData,
-                layout: { name: 'cose', rows: 1 },
-                style: getCyStyles(fId, filteredFeatureIds, uniqueFIds)
-            });
-
-            const tooltip = createTooltip();
-            setupCyEvents(cy, tooltip, featureDetails, sampleData, fId, statsNetwork, statsChromatogram, networkType);
-            showNetwork();
-        } else {
-            hideNetwork();
-            document.getElementById('activeFeature').textContent = "There are no networks found for this feature.";
-        }
-    } else {
+    if (networkId === null || networkId === undefined || typeof networkId === 'object') {
         hideNetwork();
         document.getElementById('activeFeature').textContent = "There are no networks found for this feature.";
+        return;
     }
+
+    const requestId = ++latestNetworkRequest;
+    loadNetwork(jobId, networkType, networkId)
+        .then(networkInfo => {
+            // Check the size of the network. Label set in the dashboard_manager.py
+            if (networkInfo && networkInfo.network === "large_network") {
+                return loadNeighborhood(jobId, networkType, fId);
+            }
+            return networkInfo;
+        })
+        .then(networkInfo => {
+            if (requestId !== latestNetworkRequest) {
+                return;
+            }
+            if (networkInfo && networkInfo.network === "large_network") {
+                hideNetwork();
+                document.getElementById('legend').style.display = '';
+                document.getElementById('activeFeature').textContent =
+                "Network is too big to render on the dashboard for feature: " + fId;
+            } else if (networkInfo) {
+                const networkData = networkInfo.network.elements;
+                const uniqueNIds = networkData.nodes.map(node => node.data.id.toString());
+                const uniqueFIds = getUniqueFeatureIds(uniqueNIds, sampleData.featureTable);
+                const featureDetails = getFeatureDetails(uniqueNIds, sampleData.featureTable);
+
+                // Positions are precomputed with the job; fall back to a force layout
+                const isPreset = networkData.nodes.every(node => node.position);
+                const cy = cytoscape({
+                    container: document.getElementById('cy'),
+                    elements: networkData,
+                    layout: isPreset ? { name: 'preset' } : { name: 'cose', rows: 1 },
+                    style: getCyStyles(fId, filteredFeatureIds, uniqueFIds)
+                });
+
+                const tooltip = createTooltip();
+                setupCyEvents(cy, tooltip, featureDetails, sampleData, fId, networkType, jobId);
+                showNetwork();
+                if (networkInfo.neighborhood) {
+                    document.getElementById('activeFeature').textContent =
+                    `Network is too big to render on the dashboard; showing the ` +
+                    `${networkInfo.neighborhood.hops}-hop neighborhood ` +
+                    `(${networkData.nodes.length} nodes) of feature: ${fId}`;
+                }
+            } else {
+                hideNetwork();
+                document.getElementById('activeFeature').textContent = "There are no networks found for this feature.";
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            hideNetwork();
+            document.getElementById('activeFeature').textContent = "The network could not be loaded.";
+        });
 }
 
 function getCyStyles(fId, filteredFeatureIds, uniqueFIds) {
@@ -87,7 +137,7 @@ function createTooltip() {
     return tooltip;
 }
 
-function setupCyEvents(cy, tooltip, featureDetails, sampleData, fId, statsNetwork, statsChromatogram, networkType) {
+function setupCyEvents(cy, tooltip, featureDetails, sampleData, fId, networkType, jobId) {
     cy.on('mouseover', 'node', event => showNodeTooltip(event.target, featureDetails, tooltip));
     cy.on('mousemove', 'node', event => moveTooltip(event, tooltip));
     cy.on('mouseout', 'node', () => hideTooltip(tooltip));
@@ -95,7 +145,7 @@ function setupCyEvents(cy, tooltip, featureDetails, sampleData, fId, statsNetwor
     cy.on('mousemove', 'edge', event => moveTooltip(event, tooltip));
     cy.on('mouseout', 'edge', () => hideTooltip(tooltip));
 
-    cy.on('select', 'node', event => handleNodeSelect(event.target, featureDetails, sampleData, fId, statsNetwork, statsChromatogram, networkType, tooltip));
+    cy.on('select', 'node', event => handleNodeSelect(event.target, featureDetails, sampleData, fId, networkType, jobId, tooltip));
     document.getElementById('cy').addEventListener('mouseleave', () => hideTooltip(tooltip));
 }
 
@@ -134,7 +184,7 @@ function hideTooltip(tooltip) {
     tooltip.style.display = 'none';
 }
 
-function handleNodeSelect(node, featureDetails, sampleData, fId, statsNetwork, statsChromatogram, networkType, tooltip) {
+function handleNodeSelect(node, featureDetails, sampleData, fId, networkType, jobId, tooltip) {
     hideTooltip(tooltip);
     const featureId = node.id();
     const filteredSampleData = getFeatureData(featureId, sampleData, networkType);
@@ -143,7 +193,7 @@ function handleNodeSelect(node, featureDetails, sampleData, fId, statsNetwork, s
         alert('This feature is not found in this sample.');
     } else {
         const sampleId = updateFeatureTables(featureId, sampleData, filteredSampleData);
-        visualizeNetwork(featureId, statsNetwork, filteredSampleData, sampleData, sampleId, statsChromatogram, networkType);
+        visualizeNetwork(featureId, filteredSampleData, sampleData, sampleId, networkType, jobId);
     }
 }
 
@@ -21,36 +21,189 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 */
 
-export function getSampleData(sampleName, statsChromatogram) {
-    // Extract sample data for plotting chromatogram lines
-    var activeSampleData = statsChromatogram[sampleName];
+export function fetchFeatureTable(jobId, version) {
+    // Fetch the general information of all features; versioned URLs are cached by the browser
+    const url = `/results/${encodeURIComponent(jobId)}/features/?v=${encodeURIComponent(version)}`;
+    return fetch(url).then(response => {
+        if (!response.ok) {
+            throw new Error(`Could not load the feature table (${response.status}).`);
+        }
+        return response.json();
+    });
+}
+
+export function fetchNetworkIndex(jobId, version) {
+    // Fetch the member features of all networks by algorithm and network ID
+    const url = `/results/${encodeURIComponent(jobId)}/networks/?v=${encodeURIComponent(version)}`;
+    return fetch(url).then(response => {
+        if (!response.ok) {
+            throw new Error(`Could not load the network index (${response.status}).`);
+        }
+        return response.json();
+    });
+}
+
+const COLUMNS_MIMETYPE = 'application/vnd.fermo.columns';
+const COLUMN_TYPES = { int32: Int32Array, float32: Float32Array, float64: Float64Array };
+
+export function fetchSampleRecords(jobId, sampleName, version, maxPoints = null) {
+    // Fetch the chromatogram records of a single sample as columns, with traces downsampled
+    // to maxPoints; the binary container is preferred, JSON records are the fallback
+    const url = `/results/${encodeURIComponent(jobId)}/samples/${encodeURIComponent(sampleName)}/` +
+        `?v=${encodeURIComponent(version)}` + (maxPoints ? `&max_points=${maxPoints}` : '');
+    return fetch(url, { headers: { Accept: `${COLUMNS_MIMETYPE}, application/json;q=0.5` } }).then(response => {
+        if (!response.ok) {
+            throw new Error(`Could not load sample '${sampleName}' (${response.status}).`);
+        }
+        if ((response.headers.get('Content-Type') ?? '').startsWith(COLUMNS_MIMETYPE)) {
+            return response.arrayBuffer().then(decodeColumns);
+        }
+        return response.json().then(recordsToColumns);
+    });
+}
 
-    // Get the max and min RT across all samples to use as plot range
-    const allTraceRtValues = Object.values(statsChromatogram).
-    flatMap(sample => sample.flatMap(obj => obj.trace_rt));
-    const maxRt = Math.max(...allTraceRtValues);
-    const minRt = Math.min(...allTraceRtValues);
+export function decodeColumns(buffer) {
+    // Decode a container of typed arrays (see ColumnCodec in column_codec.py); buffers
+    // are viewed in place, list fields are split into subarrays per record
+    const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+    if (magic !== 'FRMC') {
+        throw new Error('Not a column container.');
+    }
+    const headerLength = new DataView(buffer).getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const start = 8 + headerLength;
+    const arrays = {};
+    Object.entries(header.columns).forEach(([name, column]) => {
+        arrays[name] = new COLUMN_TYPES[column.dtype](buffer, start + column.offset, column.count);
+    });
 
+    const columns = {};
+    Object.entries(arrays).forEach(([name, array]) => {
+        if (name.endsWith('.offsets')) {
+            return;
+        }
+        const offsets = arrays[header.columns[name].offsets];
+        if (offsets) {
+            columns[name] = Array.from({ length: header.length }, (_, i) => array.subarray(offsets[i], offsets[i + 1]));
+        } else if (array instanceof Int32Array) {
+            columns[name] = Array.from(array);
+        } else {
+            columns[name] = Array.from(array, value => Number.isNaN(value) ? null : value);
+        }
+    });
+    return columns;
+}
+
+function recordsToColumns(records) {
+    // Convert JSON records into the columns produced by decodeColumns
     return {
-        traceInt: activeSampleData.map(obj => obj.trace_int),
-        traceRt: activeSampleData.map(obj => obj.trace_rt),
-        featureId: activeSampleData.map(obj => obj.f_id),
-        absInt: activeSampleData.map(obj => obj.abs_int),
-        relInt: activeSampleData.map(obj => obj.rel_int),
-        retTime: activeSampleData.map(obj => obj.rt),
-        precMz: activeSampleData.map(obj => obj.mz),
-        novScore: activeSampleData.map(obj => obj.novelty),
-        blankAs: activeSampleData.map(obj => obj.blank),
-        fNetworkCosine: activeSampleData.map(obj => obj.n_features_cosine),
-        fNetworkDeepScore: activeSampleData.map(obj => obj.n_features_deepscore),
-        idNetCos: activeSampleData.map(obj => obj.n_cos_id),
-        idNetMs: activeSampleData.map(obj => obj.n_ms2d_id),
-        samples: activeSampleData.map(obj => obj.samples),
-        fGroupData: activeSampleData.map(obj => obj.f_group),
-        fSampleData: activeSampleData.map(obj => obj.f_sample),
-        aSampleData: activeSampleData.map(obj => obj.a_sample),
-        annotations: activeSampleData.map(obj => obj.annotations),
-        retTimeAvg: activeSampleData.map(obj => obj.rt_avg),
+        f_id: records.map(obj => obj.f_id),
+        rt: records.map(obj => obj.rt),
+        abs_int: records.map(obj => obj.abs_int),
+        rel_int: records.map(obj => obj.rel_int),
+        trace_rt: records.map(obj => obj.trace_rt ?? []),
+        trace_int: records.map(obj => obj.trace_int ?? [])
+    };
+}
+
+export function fetchNetworkData(jobId, networkType, networkId) {
+    // Fetch a single network with the features of its nodes; null if not found
+    const url = `/results/${encodeURIComponent(jobId)}/networks/` +
+        `${encodeURIComponent(networkType)}/${encodeURIComponent(networkId)}/`;
+    return fetch(url).then(response => {
+        if (response.status === 404) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`Could not load network '${networkId}' (${response.status}).`);
+        }
+        return response.json();
+    });
+}
+
+export function fetchNetworkNeighborhood(jobId, networkType, featureId) {
+    // Fetch the bounded neighborhood of a feature in a large network; null if not found
+    const url = `/results/${encodeURIComponent(jobId)}/networks/` +
+        `${encodeURIComponent(networkType)}/neighborhood/${encodeURIComponent(featureId)}/`;
+    return fetch(url).then(response => {
+        if (response.status === 404) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`Could not load the neighborhood of feature '${featureId}' (${response.status}).`);
+        }
+        return response.json();
+    });
+}
+
+export function fetchFilterResult(jobId, filters, outputs) {
+    // Evaluate the dashboard filters on the server; see FilterQuery in filter_engine.py
+    return fetch(`/results/${encodeURIComponent(jobId)}/filter/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filters, outputs })
+    }).then(response => {
+        if (!response.ok) {
+            throw new Error(`Could not evaluate the filters (${response.status}).`);
+        }
+        return response.json();
+    });
+}
+
+export function fetchSearchResults(jobId, query) {
+    // Search features by ID, m/z, retention time or annotation text; see SearchQuery in search_index.py
+    const params = new URLSearchParams(query);
+    return fetch(`/results/${encodeURIComponent(jobId)}/search/?${params}`).then(response => {
+        if (!response.ok) {
+            throw new Error(`Could not search the features (${response.status}).`);
+        }
+        return response.json();
+    });
+}
+
+export function parseFeatureId(value) {
+    // Return the feature ID typed in the find box, or NaN if it holds a search text
+    return /^\s*\d+\s*$/.test(value) ? parseInt(value, 10) : NaN;
+}
+
+export function getSampleData(activeSampleData, featureTable, rtRange, networkIndex) {
+    // Extract sample data for plotting chromatogram lines, joining the sample columns
+    // with the general feature information of the feature table and the network
+    // members of the network index (shared, not copied per feature)
+    const features = activeSampleData.f_id.map(id => featureTable[id] ?? {});
+
+    // Use the max and min RT across all samples as plot range, provided by the server
+    let minRt;
+    let maxRt;
+    if (Array.isArray(rtRange) && rtRange.length === 2) {
+        [minRt, maxRt] = rtRange;
+    } else {
+        const allTraceRtValues = activeSampleData.trace_rt.flatMap(trace => Array.from(trace));
+        maxRt = Math.max(...allTraceRtValues);
+        minRt = Math.min(...allTraceRtValues);
+    }
+
+    return {
+        traceInt: activeSampleData.trace_int.slice(),
+        traceRt: activeSampleData.trace_rt.slice(),
+        featureId: activeSampleData.f_id.slice(),
+        absInt: activeSampleData.abs_int.slice(),
+        relInt: activeSampleData.rel_int.slice(),
+        retTime: activeSampleData.rt.slice(),
+        precMz: features.map(obj => obj.mz),
+        novScore: features.map(obj => obj.novelty),
+        blankAs: features.map(obj => obj.blank),
+        fNetworkCosine: features.map(obj => networkIndex?.modified_cosine?.[obj.n_cos_id] ?? []),
+        fNetworkDeepScore: features.map(obj => networkIndex?.ms2deepscore?.[obj.n_ms2d_id] ?? []),
+        idNetCos: features.map(obj => obj.n_cos_id),
+        idNetMs: features.map(obj => obj.n_ms2d_id),
+        samples: features.map(obj => obj.samples ?? []),
+        fGroupData: features.map(obj => obj.f_group),
+        fSampleData: features.map(obj => obj.f_sample),
+        aSampleData: features.map(obj => obj.a_sample),
+        annotations: features.map(obj => obj.annotations),
+        retTimeAvg: features.map(obj => obj.rt_avg),
+        featureTable: featureTable,
         upLowRange: [minRt - minRt * 0.05, maxRt + maxRt * 0.02]
     }
 }
@@ -71,6 +224,9 @@ export function getFeatureData(featureId, sampleData, networkType) {
         target: []
     };
 
+    // Networks are indexed with all members, so look them up by feature ID
+    const featureIndex = new Map(sampleData.featureId.map((fId, i) => [fId, i]));
+
     // Iterate through the original sampleData to find matching features
     for (var i = 0; i < sampleData.featureId.length; i++) {
         if (sampleData.featureId[i] == featureId) {
@@ -86,7 +242,7 @@ export function getFeatureData(featureId, sampleData, networkType) {
             // Iterate through the fNetwork array to find the corresponding features
             for (var j = 0; j < sampleData[networkType2][i].length; j++) {
                 let key = sampleData[networkType2][i][j];
-                let index = sampleData.featureId.indexOf(key);
+                let index = featureIndex.get(key) ?? -1;
 
                 if (index >= 0 && index < sampleData.traceInt.length) {
                     filteredData.target.push(sampleData.featureId[index] == featureId ? 'selected' : 'related');
@@ -106,51 +262,12 @@ export function getFeatureData(featureId, sampleData, networkType) {
     return filteredData;
 }
 
-export function getUniqueFeatureIds(sampleData) {
-    const fIdCounts = {};
-
-    for (const sampleName in sampleData) {
-        if (sampleData.hasOwnProperty(sampleName)) {
-            const sampleFeatures = sampleData[sampleName];
-            sampleFeatures.forEach(feature => {
-                const fId = feature.f_id;
-                if (fIdCounts[fId]) {
-                    fIdCounts[fId]++;
-                } else {
-                    fIdCounts[fId] = 1;
-                }
-            });
-        }
-    }
-
-    const uniqueFIds = [];
-    for (const fId in fIdCounts) {
-        if (fIdCounts[fId] === 1) {
-            uniqueFIds.push(fId);
-        }
-    }
-
-    return uniqueFIds;
+export function getUniqueFeatureIds(featureIds, featureTable) {
+    // Features detected in a single sample only
+    return featureIds.filter(id => featureTable[id]?.samples?.length === 1);
 }
 
-export function getFeatureDetails(uniqueNIds, sampleData) {
-    const result = [];
-    const seenIds = new Set();
-
-    const uniqueNIdsStr = uniqueNIds.map(id => id.toString());
-
-    for (const sampleName in sampleData) {
-        if (sampleData.hasOwnProperty(sampleName)) {
-            const features = sampleData[sampleName];
-            for (const feature of features) {
-                const featureIdStr = feature.f_id.toString();
-                if (uniqueNIdsStr.includes(featureIdStr) && !seenIds.has(featureIdStr)) {
-                    result.push(feature);
-                    seenIds.add(featureIdStr);
-                }
-            }
-        }
-    }
-
-    return result;
+export function getFeatureDetails(featureIds, featureTable) {
+    // General information of the given features, as found in the feature table
+    return featureIds.filter(id => featureTable[id]).map(id => featureTable[id]);
 }
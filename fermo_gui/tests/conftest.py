@@ -1,6 +1,20 @@
+from pathlib import Path
+
 import pytest
 
 from fermo_gui import create_app
+from fermo_gui.analysis.artifact_manager import ArtifactManager
+
+
+@pytest.fixture(scope="session")
+def example_artifact():
+    app = create_app({"TESTING": True})
+    artifacts = ArtifactManager(
+        results_dir=Path(app.config["UPLOAD_FOLDER"]).joinpath("example/results"),
+        layout=app.extensions["network_layout"],
+    )
+    if not artifacts.is_current():
+        artifacts.build()
 
 
 @pytest.fixture
@@ -10,7 +24,7 @@ def app():
 
 
 @pytest.fixture
-def client(app):
+def client(app, example_artifact):
     return app.test_client()
 
 
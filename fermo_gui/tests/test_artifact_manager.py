@@ -0,0 +1,132 @@
+import gzip
+import json
+import shutil
+
+import pytest
+
+from fermo_gui.analysis.artifact_manager import ArtifactManager
+from fermo_gui.analysis.column_codec import ColumnCodec
+from fermo_gui.analysis.columnar_store import ColumnarStore
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    shutil.copy(
+        "fermo_gui/upload/example/results/out.fermo.session.json",
+        tmp_path.joinpath("out.fermo.session.json"),
+    )
+    return tmp_path
+
+
+def test_build_valid(results_dir):
+    manager = ArtifactManager(results_dir=results_dir)
+    assert manager.is_current() is False
+    data = manager.build()
+    assert manager.is_current() is True
+    assert manager.read() == json.loads(json.dumps(data))
+    assert manager.read_meta()["sha256"] == ArtifactManager.hash_file(
+        results_dir.joinpath(ArtifactManager.artifact_name)
+    )
+
+
+def test_is_current_outdated_valid(results_dir):
+    manager = ArtifactManager(results_dir=results_dir)
+    manager.build()
+    with open(results_dir.joinpath("out.fermo.session.json"), "a") as outfile:
+        outfile.write(" ")
+    assert manager.is_current() is False
+
+
+def test_build_invalid(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ArtifactManager(results_dir=tmp_path).build()
+
+
+def test_build_columnar_valid(results_dir):
+    ArtifactManager(results_dir=results_dir).build()
+    assert ColumnarStore(results_dir=results_dir).is_current() is True
+
+
+def test_build_resources_valid(results_dir):
+    manager = ArtifactManager(results_dir=results_dir)
+    data = manager.build()
+    sample = data["stats_samples"][0]
+    path = manager.resource_path(data["resources"]["samples"][sample])
+    with open(path) as infile:
+        records = json.load(infile)
+    assert records
+    assert (
+        json.loads(
+            gzip.decompress(
+                manager.resource_path(
+                    data["resources"]["samples"][sample], "gzip"
+                ).read_bytes()
+            )
+        )
+        == records
+    )
+    assert data["resources"]["version"].startswith(f"{ArtifactManager.format_version}-")
+
+
+def test_store_resources_replace_valid(results_dir):
+    manager = ArtifactManager(results_dir=results_dir)
+    manager.store_resources({"features.json": [1]})
+    manager.store_resources({"features.json": [2]})
+    assert json.loads(manager.resource_path("features.json").read_bytes()) == [2]
+    assert [
+        path.name for path in results_dir.iterdir() if path.name.startswith(".")
+    ] == []
+
+
+def test_write_atomic_valid(tmp_path):
+    path = tmp_path.joinpath("out.json")
+    ArtifactManager.write_atomic(path, b"1")
+    ArtifactManager.write_atomic(path, b"2")
+    assert path.read_bytes() == b"2"
+    assert [item.name for item in tmp_path.iterdir()] == ["out.json"]
+
+
+def test_build_trace_levels_valid(results_dir):
+    manager = ArtifactManager(results_dir=results_dir)
+    data = manager.build()
+    name = data["resources"]["samples"][data["stats_samples"][0]]
+    with open(manager.resource_path(name)) as infile:
+        records = json.load(infile)
+    levels = data["resources"]["sample_levels"][data["stats_samples"][0]]
+    assert list(levels) == [str(level) for level in manager.trace_levels]
+    for max_points in data["resources"]["trace_levels"]:
+        path = manager.resource_path(levels[str(max_points)])
+        with open(path) as infile:
+            level_records = json.load(infile)
+        assert [record["f_id"] for record in level_records] == [
+            record["f_id"] for record in records
+        ]
+        assert all(len(record["trace_rt"]) <= max_points for record in level_records)
+        binary = ColumnCodec.decode(
+            manager.resource_path(
+                manager.binary_name(levels[str(max_points)])
+            ).read_bytes()
+        )
+        assert ColumnCodec.to_records(binary)[0]["f_id"] == level_records[0]["f_id"]
+        assert [len(trace) for trace in binary["trace_rt"]] == [
+            len(record["trace_rt"]) for record in level_records
+        ]
+
+
+def test_store_resources_binary_valid(results_dir):
+    manager = ArtifactManager(results_dir=results_dir)
+    manager.store_resources({"samples/a.bin": b"\x00\x01", "samples/a.json": [1]})
+    assert manager.resource_path("samples/a.bin").read_bytes() == b"\x00\x01"
+    assert not manager.resource_path("samples/a.bin", "gzip").exists()
+    assert manager.resource_path("samples/a.json", "gzip").exists()
+
+
+def test_create_data_levels_skipped_valid(results_dir, monkeypatch):
+    monkeypatch.setattr(ArtifactManager, "trace_levels", (3, 1000))
+    data, resources = ArtifactManager(results_dir=results_dir).create_data()
+    for sample, levels in data["resources"]["sample_levels"].items():
+        assert list(levels) == ["3"]
+        assert (
+            ArtifactManager.level_name(data["resources"]["samples"][sample], 1000)
+            not in resources
+        )
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fermo_gui.analysis.column_codec import ColumnCodec
+
+SCHEMA = {
+    "f_id": "int32",
+    "rt": "float64",
+    "trace_rt": "float32[]",
+    "trace_int": "float32[]",
+}
+
+
+def test_encode_decode_valid():
+    records = [
+        {"f_id": 1, "rt": 1.5, "trace_rt": [1.0, 1.5, 2.0], "trace_int": [0, 1, 0]},
+        {"f_id": 2, "rt": None, "trace_rt": None, "trace_int": None},
+        {"f_id": 3, "rt": 2.5, "trace_rt": [2.25, 2.5], "trace_int": [0.5, 1.0]},
+    ]
+    content = ColumnCodec.encode(records, SCHEMA)
+    header, start = ColumnCodec.read_header(content)
+    assert start % 8 == 0
+    assert all(column["offset"] % 8 == 0 for column in header["columns"].values())
+    assert (
+        header["columns"]["trace_rt"]["offsets"]
+        == header["columns"]["trace_int"]["offsets"]
+    )
+
+    columns = ColumnCodec.decode(content)
+    assert columns["f_id"].dtype == np.int32
+    assert columns["trace_rt"][0].dtype == np.float32
+    assert ColumnCodec.to_records(columns) == [
+        records[0],
+        {"f_id": 2, "rt": None, "trace_rt": [], "trace_int": []},
+        records[2],
+    ]
+
+
+def test_encode_empty_valid():
+    assert (
+        ColumnCodec.to_records(ColumnCodec.decode(ColumnCodec.encode([], SCHEMA))) == []
+    )
+
+
+def test_encode_invalid():
+    with pytest.raises(ValueError):
+        ColumnCodec.encode([{"f_id": 1}], {"f_id": "int64"})
+
+
+def test_decode_invalid():
+    with pytest.raises(ValueError):
+        ColumnCodec.decode(b'[{"f_id": 1}]')
@@ -0,0 +1,134 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.network_layout import NetworkLayout
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    shutil.copy(
+        "fermo_gui/upload/example/results/out.fermo.session.json",
+        tmp_path.joinpath("out.fermo.session.json"),
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def session(results_dir):
+    with open(results_dir.joinpath("out.fermo.session.json")) as infile:
+        return json.load(infile)
+
+
+def test_convert_valid(results_dir):
+    store = ColumnarStore(results_dir=results_dir)
+    assert store.is_current() is False
+    store.convert()
+    assert store.is_current() is True
+    assert len(store.column("f_id")) == 143
+    assert isinstance(store.column("mz"), np.memmap)
+    assert np.all(np.diff(store.column("f_id")) > 0)
+
+
+def test_convert_replace_valid(results_dir):
+    store = ColumnarStore(results_dir=results_dir)
+    store.convert()
+    mz = store.column("mz")
+    store.convert()
+    assert store.is_current() is True
+    assert np.array_equal(store.column("mz"), mz)
+    assert [path.name for path in results_dir.iterdir() if path.name[0] == "."] == []
+
+
+def test_convert_session_valid(results_dir, session):
+    store = ColumnarStore(results_dir=results_dir)
+    store.convert()
+    streamed = {
+        name: store.read_json(name) for name in ("sections", "networks", "samples")
+    }
+    trace_rt = np.array(store.column("trace_rt"))
+    stats = json.dumps(session["stats"])
+    store.convert(session)
+    assert json.dumps(session["stats"]) == stats
+    for name, value in streamed.items():
+        assert store.read_json(name) == value
+    assert np.array_equal(store.column("trace_rt"), trace_rt)
+
+
+def test_adjacency_valid(results_dir, session):
+    store = ColumnarStore(results_dir=results_dir)
+    store.convert()
+    offsets, rows, weights = store.adjacency("modified_cosine")
+    edges = sum(
+        len(network["elements"]["edges"])
+        for network in session["stats"]["networks"]["modified_cosine"][
+            "subnetworks"
+        ].values()
+    )
+    assert offsets[-1] == len(rows) == 2 * edges
+    row = store.feature_row(33)
+    assert np.all(np.diff(weights[offsets[row] : offsets[row + 1]]) <= 0)
+    assert store.adjacency("unknown") is None
+
+
+def test_fold_change_valid(results_dir, session):
+    store = ColumnarStore(results_dir=results_dir)
+    store.convert()
+    forward = store.fold_change("phylogroup", "C", "V2")
+    backward = store.fold_change("phylogroup", "V2", "C")
+    for f_id, g_info in session["general_features"].items():
+        row = store.feature_row(int(f_id))
+        factors = [
+            change["factor"]
+            for change in (g_info.get("group_factors") or {}).get("phylogroup", [])
+            if {change["group1"], change["group2"]} == {"C", "V2"}
+        ]
+        if factors:
+            assert max(forward[row], backward[row]) == factors[0]
+            assert forward[row] * backward[row] == pytest.approx(1.0)
+        else:
+            assert np.isnan(forward[row]) and np.isnan(backward[row])
+    assert store.fold_change("phylogroup", "C", "C") is None
+
+
+def test_is_current_layout_changed(results_dir):
+    ColumnarStore(results_dir=results_dir).convert()
+    assert ColumnarStore(results_dir=results_dir).is_current() is True
+    store = ColumnarStore(results_dir=results_dir, layout=NetworkLayout(iterations=10))
+    assert store.is_current() is False
+
+
+def test_convert_invalid(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ColumnarStore(results_dir=tmp_path).convert()
+
+
+def test_general_feature_valid(results_dir, session):
+    store = ColumnarStore(results_dir=results_dir)
+    store.convert()
+    g_info = store.general_feature(store.feature_row(1))
+    expected = session["general_features"]["1"]
+    for key in (*store.side_fields, "rt", "mz", "blank"):
+        assert g_info.get(key) == expected.get(key)
+    assert g_info["scores"] == {"novelty": expected["scores"]["novelty"]}
+    assert (
+        g_info["networks"]["modified_cosine"]["network_id"]
+        == expected["networks"]["modified_cosine"]["network_id"]
+    )
+    assert store.feature_row(100000) is None
+
+
+def test_sample_spec_features_valid(results_dir, session):
+    store = ColumnarStore(results_dir=results_dir)
+    store.convert()
+    s_id = session["stats"]["samples"][0]
+    spec_features = store.sample_spec_features(store.sample_entries(s_id))
+    expected = session["samples"][s_id]["sample_spec_features"]
+    assert len(spec_features) == len(session["samples"][s_id]["feature_ids"])
+    for f_info in spec_features:
+        for key in ("rt", "intensity", "trace_rt", "trace_int"):
+            assert f_info[key] == expected[str(f_info["f_id"])][key]
+    assert store.sample_entries("unknown") == slice(0, 0)
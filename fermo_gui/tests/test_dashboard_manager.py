@@ -1,5 +1,8 @@
+import shutil
+
 import pytest
 
+from fermo_gui.analysis.columnar_store import ColumnarStore
 from fermo_gui.analysis.dashboard_manager import DashboardManager as Manager
 from fermo_gui.analysis.general_manager import GeneralManager
 
@@ -75,3 +78,160 @@ def test_extract_stats_samples_dyn_invalid():
     assert manager.stats_samples_dyn == {
         "error": "error during parsing of session file"
     }
+
+
+@pytest.fixture
+def store(tmp_path):
+    shutil.copy(
+        "fermo_gui/upload/example/results/out.fermo.session.json",
+        tmp_path.joinpath("out.fermo.session.json"),
+    )
+    store = ColumnarStore(results_dir=tmp_path)
+    store.convert()
+    return store
+
+
+def test_prepare_data_overview_valid(store):
+    manager = Manager()
+    manager.prepare_data_overview(store)
+    data = manager.provide_data_overview()
+    assert "stats_chromatogram" not in data
+    assert "stats_features" not in data
+    assert len(data["stats_samples"]) == 11
+    assert data["stats_rt_range"][0] < data["stats_rt_range"][1]
+
+
+def test_extract_stats_samples_dyn_indexed_valid(session, store):
+    manager = Manager()
+    manager.extract_stats_samples_dyn(session)
+    indexed_manager = Manager()
+    indexed_manager.extract_stats_samples_dyn(session, store)
+    assert indexed_manager.stats_samples_dyn == manager.stats_samples_dyn
+    assert indexed_manager.stats_groups == manager.stats_groups
+    assert indexed_manager.stats_fgroups == manager.stats_fgroups
+
+
+def test_build_sample_data_valid(session, store):
+    manager = Manager()
+    manager.create_chromatogram(session)
+    sample = session["stats"]["samples"][0]
+    assert (
+        Manager().build_sample_data(store, sample) == manager.stats_chromatogram[sample]
+    )
+    assert Manager().build_sample_data(store, "unknown") == []
+
+
+def test_build_feature_data_valid(session, store):
+    manager = Manager()
+    manager.extract_features(session)
+    feature = Manager().build_feature_data(store, 1)
+    assert feature == manager.stats_features["1"]
+    assert "trace_rt" not in feature
+    assert Manager().build_feature_data(store, 100000) is None
+
+
+def test_build_network_data_valid(session, store):
+    n_id = session["general_features"]["1"]["networks"]["modified_cosine"]["network_id"]
+    network = Manager().build_network_data(store, "modified_cosine", n_id)
+    assert "elements" in network["network"]
+    assert all("position" in node for node in network["network"]["elements"]["nodes"])
+    assert Manager().build_network_data(store, "modified_cosine", "x") is None
+
+
+def test_build_network_neighborhood_valid(store):
+    neighborhood = Manager().build_network_neighborhood(
+        store, "modified_cosine", 33, hops=1, max_nodes=5, max_edges=3
+    )
+    nodes = neighborhood["network"]["elements"]["nodes"]
+    edges = neighborhood["network"]["elements"]["edges"]
+    assert len(nodes) == 5
+    assert nodes[0]["data"] == {"id": "33", "value": 33, "name": "33", "hops": 0}
+    assert len(edges) == 3
+    assert any(33 in (edge["data"]["source"], edge["data"]["target"]) for edge in edges)
+    assert neighborhood["neighborhood"]["truncated"] is True
+
+
+def test_build_network_neighborhood_invalid(store):
+    assert (
+        Manager().build_network_neighborhood(store, "modified_cosine", 100000) is None
+    )
+    assert Manager().build_network_neighborhood(store, "unknown", 33) is None
+
+
+def test_build_fold_overview_valid(store):
+    overview = Manager.build_fold_overview(store, "phylogroup", "C", "V2")
+    row = overview["f_id"].index(4)
+    assert overview["fold"][row] == 5.84
+    assert overview["log2_fold"][row] > 0
+    reverse = Manager.build_fold_overview(store, "phylogroup", "V2", "C")
+    assert reverse["log2_fold"][row] == pytest.approx(-overview["log2_fold"][row])
+    assert Manager.build_fold_overview(store, "phylogroup", "C", "unknown") is None
+
+
+def test_decimate_trace_valid():
+    trace_rt = [float(i) for i in range(101)]
+    trace_int = [100 - abs(50 - i) for i in range(101)]
+    rt, intensity = Manager.decimate_trace(trace_rt, trace_int, 5)
+    assert len(rt) == len(intensity) == 5
+    assert (rt[0], rt[-1]) == (0.0, 100.0)
+    assert max(intensity) == 100
+    assert Manager.decimate_trace(trace_rt[:3], trace_int[:3], 5) == (
+        trace_rt[:3],
+        trace_int[:3],
+    )
+
+
+def test_decimate_records_valid(session, store):
+    sample = session["stats"]["samples"][0]
+    records = Manager().build_sample_data(store, sample)
+    traces = [record["trace_rt"] for record in records]
+    decimated = Manager.decimate_records(records, 3)
+    assert decimated == Manager().build_sample_data(store, sample, 3)
+    assert all(len(record["trace_rt"]) <= 3 for record in decimated)
+    assert [record["trace_rt"] for record in records] == traces
+
+
+def test_extract_features_valid(session):
+    manager = Manager()
+    manager.extract_features(session)
+    assert len(manager.stats_features) == 143
+    assert manager.stats_features["1"]["mz"] == session["general_features"]["1"]["mz"]
+
+
+def test_extract_features_invalid():
+    manager = Manager()
+    manager.extract_features({"general_features": {"a": {}}})
+    assert manager.stats_features == {"error": "error during parsing of session file"}
+
+
+def test_extract_network_index_valid(session):
+    manager = Manager()
+    manager.extract_network_index(session)
+    manager.extract_features(session)
+    summary = session["stats"]["networks"]["modified_cosine"]["summary"]
+    feature = manager.stats_features["1"]
+    assert "n_features_cosine" not in feature
+    members = manager.stats_network_index["modified_cosine"][str(feature["n_cos_id"])]
+    assert members == summary[str(feature["n_cos_id"])]
+    assert set(manager.stats_network_index) == {"modified_cosine", "ms2deepscore"}
+
+
+def test_build_network_index_large_valid():
+    members = [str(f_id) for f_id in range(60)]
+    index = Manager.build_network_index({"modified_cosine": {"0": members}})
+    assert index == {"modified_cosine": {"0": list(range(60))}, "ms2deepscore": {}}
+
+
+def test_extract_network_index_invalid():
+    manager = Manager()
+    manager.extract_network_index({"stats": {"networks": {"modified_cosine": 1}}})
+    assert manager.stats_network_index == {
+        "error": "error during parsing of session file"
+    }
+
+
+def test_create_chromatogram_valid(session):
+    manager = Manager()
+    manager.create_chromatogram(session)
+    record = manager.stats_chromatogram[session["stats"]["samples"][0]][0]
+    assert set(record) == {"f_id", "rt", "trace_rt", "trace_int", "abs_int", "rel_int"}
@@ -36,3 +36,17 @@ def test_create_instance_path(app):
 def test_register_blueprints_valid(client):
     response = client.get("/")
     assert response.status_code == 200
+
+
+def test_configure_celery_queues_valid(app):
+    celery_app = app.extensions["celery"]
+    assert [queue.name for queue in celery_app.conf.task_queues] == ["fast", "heavy"]
+    assert celery_app.conf.task_default_queue == "fast"
+
+
+def test_configure_worker_valid(app):
+    assert app.extensions["model_cache"].enabled
+
+
+def test_configure_reuse_valid(app):
+    assert app.extensions["result_index"].enabled
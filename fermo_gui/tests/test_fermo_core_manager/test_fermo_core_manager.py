@@ -4,6 +4,7 @@ import jsonschema
 import pytest
 
 from fermo_gui.analysis.fermo_core_manager import FermoCoreManager
+from fermo_gui.analysis.job_progress import JobProgress
 
 
 def test_run_fermo_core_min_jobid_invalid():
@@ -29,3 +30,15 @@ def test_run_fermo_core_min_valid():
         uploads_dir=Path("tests/test_fermo_core_manager/example_data_min"),
     )
     assert m_fermo.run_fermo_core() is None
+
+
+def test_run_fermo_core_progress_valid():
+    states = []
+    m_fermo = FermoCoreManager(
+        job_id="example_data_min",
+        uploads_dir=Path("tests/test_fermo_core_manager/example_data_min"),
+    )
+    m_fermo.run_fermo_core(progress=JobProgress(callback=states.append))
+    assert states[0]["module"] is None
+    assert states[-1]["module"] == "ExportManager"
+    assert states[-1]["features_total"] > 0
@@ -0,0 +1,98 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.filter_engine import FilterEngine, FilterQuery, FilterSpec
+
+
+@pytest.fixture
+def session():
+    with open("fermo_gui/upload/example/results/out.fermo.session.json") as infile:
+        return json.load(infile)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    shutil.copy(
+        "fermo_gui/upload/example/results/out.fermo.session.json",
+        tmp_path.joinpath("out.fermo.session.json"),
+    )
+    store = ColumnarStore(results_dir=tmp_path)
+    store.convert()
+    return FilterEngine(store=store)
+
+
+def retained(engine, **filters):
+    mask = engine.mask(FilterSpec(**filters))
+    return set(engine.store.column("f_id")[mask].tolist())
+
+
+def test_mask_unfiltered_valid(engine):
+    assert engine.mask(FilterSpec()).all()
+
+
+def test_mask_scores_valid(engine, session):
+    expected = {
+        int(f_id)
+        for f_id, g_info in session["general_features"].items()
+        if ((g_info.get("annotations") or {}).get("matches") or [{}])[0].get(
+            "score", -1
+        )
+        >= 0.5
+    }
+    assert retained(engine, match=(0.5, 1.0)) == expected
+
+
+def test_mask_groups_valid(engine, session):
+    expected = set(session["stats"]["groups"]["categories"]["phylogroup"]["C"]["f_ids"])
+    assert retained(engine, groups=["C"]) == expected
+
+
+def test_mask_fold_valid(engine, session):
+    expected = set()
+    for f_id, g_info in session["general_features"].items():
+        for change in (g_info.get("group_factors") or {}).get("phylogroup", []):
+            pair = {change["group1"], change["group2"]}
+            if pair == {"S", "C"} and change["factor"] >= 1.2:
+                expected.add(int(f_id))
+    fold = {"group": "phylogroup", "group1": "C", "group2": "S", "factor": 1.2}
+    assert retained(engine, fold=fold) == expected
+
+
+def test_mask_network_valid(engine, session):
+    network = {"algorithm": "modified_cosine", "exclude": ["blanks"]}
+    for f_id in retained(engine, network=network):
+        n_id = session["general_features"][str(f_id)]["networks"]["modified_cosine"][
+            "network_id"
+        ]
+        members = session["stats"]["networks"]["modified_cosine"]["subnetworks"][
+            str(n_id)
+        ]["elements"]["nodes"]
+        assert not any(
+            session["general_features"][str(node["data"]["id"])].get("blank")
+            for node in members
+        )
+    network["algorithm"] = "unknown"
+    assert retained(engine, network=network) == set()
+
+
+def test_sample_counts_valid(engine, session):
+    counts = engine.evaluate(FilterQuery(outputs=["samples"]))["samples"]
+    for s_id, sample in session["samples"].items():
+        assert counts[s_id] == len(sample["sample_spec_features"])
+
+
+def test_filter_query_invalid():
+    with pytest.raises(ValidationError):
+        FilterQuery.model_validate({"filters": {"novelty": [0]}})
+    with pytest.raises(ValidationError):
+        FilterQuery.model_validate({"outputs": ["mask"]})
+
+
+def test_in_range_nan_valid():
+    values = np.array([0.5, np.nan, 2.0])
+    assert FilterEngine.in_range(values, (0, 1)).tolist() == [True, False, False]
@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.job_comparison import ComparisonQuery, JobComparison
+
+
+@pytest.fixture
+def session():
+    with open("fermo_gui/upload/example/results/out.fermo.session.json") as infile:
+        return json.load(infile)
+
+
+def create_store(path, session):
+    path.mkdir()
+    with open(path.joinpath("out.fermo.session.json"), "w") as outfile:
+        json.dump(session, outfile)
+    store = ColumnarStore(results_dir=path)
+    store.convert()
+    return store
+
+
+def test_match_features_valid():
+    ref_mz = np.array([100.0, 200.0, 200.0005, 300.0])
+    ref_rt = np.array([1.0, 2.0, 2.0, 3.0])
+    mz = np.array([200.0004, 100.0001, 300.0, 400.0, np.nan])
+    rt = np.array([2.01, 1.0, 5.0, 4.0, 1.0])
+    matches = JobComparison.match_features(ref_mz, ref_rt, mz, rt, 10, 0.1)
+    assert matches.tolist() == [2, 0, -1, -1, -1]
+
+
+def test_match_features_one_to_one_valid():
+    ref_mz = np.array([200.0])
+    ref_rt = np.array([2.0])
+    mz = np.array([200.001, 200.0])
+    rt = np.array([2.0, 2.0])
+    matches = JobComparison.match_features(ref_mz, ref_rt, mz, rt, 10, 0.1)
+    assert matches.tolist() == [-1, 0]
+
+
+def test_compare_valid(tmp_path, session):
+    modified = json.loads(json.dumps(session))
+    dropped = sorted(modified["general_features"], key=int)[:10]
+    for f_id in dropped:
+        del modified["general_features"][f_id]
+    for g_info in modified["general_features"].values():
+        g_info["area"] = g_info["area"] * 2
+    stores = {
+        "job_a": create_store(tmp_path.joinpath("a"), session),
+        "job_b": create_store(tmp_path.joinpath("b"), modified),
+    }
+
+    result = JobComparison(stores=stores).compare()
+    n_features = len(session["general_features"])
+    assert result["summary"]["features"] == {
+        "job_a": n_features,
+        "job_b": n_features - 10,
+    }
+    assert result["summary"]["shared"] == n_features - 10
+    assert result["summary"]["unique"] == {"job_a": 10, "job_b": 0}
+
+    features = result["features"]
+    for f_id_a, f_id_b, ratio in zip(
+        features["f_id"]["job_a"],
+        features["f_id"]["job_b"],
+        features["ratio"]["job_b"],
+        strict=True,
+    ):
+        if str(f_id_a) in dropped:
+            assert f_id_b is None and ratio is None
+        elif session["general_features"][str(f_id_a)]["area"] > 0:
+            assert ratio == pytest.approx(2.0)
+
+
+def test_with_reference_valid(tmp_path, session):
+    modified = json.loads(json.dumps(session))
+    for g_info in modified["general_features"].values():
+        g_info["area"] = g_info["area"] * 2
+    stores = {
+        "job_a": create_store(tmp_path.joinpath("a"), session),
+        "job_b": create_store(tmp_path.joinpath("b"), modified),
+    }
+    result = JobComparison(stores=stores).compare()
+
+    reordered = JobComparison.with_reference(result, ["job_b", "job_a"])
+    assert reordered["job_ids"] == ["job_b", "job_a"]
+    assert list(reordered["features"]["area"]) == ["job_b", "job_a"]
+    ratios = [r for r in reordered["features"]["ratio"]["job_a"] if r is not None]
+    assert ratios and all(r == pytest.approx(0.5) for r in ratios)
+    assert list(result["features"]["ratio"]) == ["job_b"]
+
+
+def test_cache_key_valid():
+    query = ComparisonQuery(job_ids=["job_b", "job_a"])
+    assert query.cache_key() == ComparisonQuery(job_ids=["job_a", "job_b"]).cache_key()
+
+
+def test_comparison_query_invalid():
+    with pytest.raises(ValidationError):
+        ComparisonQuery(job_ids=["job_a"])
+    with pytest.raises(ValidationError):
+        ComparisonQuery(job_ids=["job_a", "job_a"])
+    with pytest.raises(ValidationError):
+        ComparisonQuery(job_ids=["job_a", "../job_b"])
@@ -0,0 +1,110 @@
+import json
+import queue
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from fermo_gui.analysis.job_events import JobEvents
+
+
+class FakePubSub:
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.patterns = []
+        self.closed = False
+
+    def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+
+    def get_message(self, timeout):
+        try:
+            message = self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None:
+            raise ConnectionError("closed")
+        return message
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self):
+        self.connections = []
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        self.connections.append(FakePubSub())
+        return self.connections[-1]
+
+
+def message(job_id, status):
+    return {
+        "type": "pmessage",
+        "channel": f"{JobEvents.prefix}:{job_id}".encode(),
+        "data": json.dumps({"status": status}).encode(),
+    }
+
+
+@pytest.fixture
+def events():
+    events = JobEvents(timeout=5, heartbeat=0.05)
+    events._redis = FakeRedis()
+    yield events
+    events.close()
+
+
+def statuses(subscription):
+    return [None if data is None else data["status"] for data in subscription]
+
+
+def test_format_event_valid():
+    assert JobEvents.format_event(None) == ": heartbeat\n\n"
+    text = JobEvents.format_event({"status": "done"})
+    assert text.startswith("event: status\ndata: ") and text.endswith("\n\n")
+    assert json.loads(text.split("data: ")[1]) == {"status": "done"}
+
+
+def test_subscribe_shared_connection(events):
+    first = events.subscribe("job")
+    second = events.subscribe("job")
+    other = events.subscribe("other")
+    assert len(events._redis.connections) == 1
+    assert events._redis.connections[0].patterns == [f"{JobEvents.prefix}:*"]
+    assert events.subscribers() == 3
+
+    pubsub = events._redis.connections[0]
+    for status in ("running", "done"):
+        pubsub.messages.put(message("job", status))
+    assert statuses(first) == ["running", "done"]
+    assert statuses(second) == ["running", "done"]
+    assert events.subscribers() == 1
+    other.close()
+    assert events.subscribers() == 0
+
+
+def test_subscription_heartbeat_valid(events):
+    subscription = events.subscribe("job")
+    iterator = iter(subscription)
+    assert next(iterator) is None
+    events._redis.connections[0].messages.put(message("job", "failed"))
+    assert [data for data in iterator if data is not None] == [{"status": "failed"}]
+
+
+def test_subscription_connection_lost_valid(events):
+    subscription = events.subscribe("job")
+    pubsub = events._redis.connections[0]
+    pubsub.messages.put(message("job", "running"))
+    pubsub.messages.put(None)
+    assert [data for data in statuses(subscription) if data] == ["running"]
+
+    events.subscribe("job").close()
+    assert len(events._redis.connections) == 2
+
+
+def test_disabled_invalid():
+    events = JobEvents()
+    assert not events.enabled
+    events.publish("job", "done")
+    with pytest.raises(RuntimeError):
+        events.subscribe("job")
@@ -0,0 +1,35 @@
+import logging
+
+from fermo_gui.analysis.job_progress import JobProgress
+
+
+def test_module_index_valid():
+    assert JobProgress.module_index("'GeneralParser': started file parsing.") == 0
+    assert JobProgress.module_index("'MgfParser': completed parsing.") == 0
+    assert (
+        JobProgress.module_index("'AnnotationManager/FragmentAnnotator': feature") == 7
+    )
+
+
+def test_module_index_invalid():
+    assert JobProgress.module_index("'UtilityMethodManager': done") is None
+    assert JobProgress.module_index("Started 'fermo_core' on job_id 'x'.") is None
+
+
+def test_emit_valid():
+    states = []
+    progress = JobProgress(callback=states.append, n_features=10, min_interval=3600)
+    logger = logging.getLogger("test_job_progress")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(progress)
+    try:
+        logger.info("'GeneralParser': started file parsing.")
+        logger.info("'GroupAssigner': started.")
+        logger.info("'MgfParser': moves no step back.")
+        logger.info("'GroupAssigner': completed.")
+    finally:
+        logger.removeHandler(progress)
+    assert [state["module"] for state in states] == ["GeneralParser", "GroupAssigner"]
+    assert states[-1]["module_index"] == 4
+    assert states[-1]["module_total"] == len(JobProgress.modules)
+    assert states[-1]["features_total"] == 10
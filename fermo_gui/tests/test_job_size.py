@@ -0,0 +1,69 @@
+from fermo_gui.analysis.job_size import JobSize, count_rows
+
+DATA_DIR = "tests/test_fermo_core_manager/example_data_min"
+
+
+def params(cosine_network=False, library=None):
+    return {
+        "files": {
+            "peaktable": {"filepath": f"{DATA_DIR}/quant_all.csv"},
+            "msms": {"filepath": f"{DATA_DIR}/msms.mgf"},
+            "spectral_library": {"filepath": library},
+        },
+        "core_modules": {
+            "adduct_annotation": {"activate_module": True},
+            "spec_sim_networking": {
+                "modified_cosine": {"activate_module": cosine_network},
+                "ms2deepscore": {"activate_module": False},
+            },
+        },
+        "additional_modules": {
+            "spectral_library_matching": {
+                "modified_cosine": {"activate_module": library is not None},
+            }
+        },
+    }
+
+
+def test_from_params_valid():
+    size = JobSize.from_params(params(cosine_network=True))
+    assert size.n_features == 143
+    assert size.n_spectra == 141
+    assert size.n_library == 0
+    assert size.modules == ["spec_sim_networking/modified_cosine"]
+    assert size.cost() == 143 + 141 * 140 / 2
+
+
+def test_from_params_library_valid():
+    size = JobSize.from_params(params(library=f"{DATA_DIR}/msms.mgf"), n_features=5)
+    assert size.n_features == 5
+    assert size.modules == ["spectral_library_matching/modified_cosine"]
+    assert size.cost() == 5 + 141 * 141
+
+
+def test_queue_valid():
+    routes = [("fast", 1000), ("heavy", None)]
+    assert JobSize(n_features=200).queue(routes) == "fast"
+    assert (
+        JobSize(
+            n_features=200,
+            n_spectra=100,
+            modules=["spec_sim_networking/modified_cosine"],
+        ).queue(routes)
+        == "heavy"
+    )
+    assert (
+        JobSize(n_features=5000).queue([["fast", 1000], ["medium", 2000]]) == "medium"
+    )
+
+
+def test_count_invalid():
+    assert count_rows(None) is None
+    assert JobSize.count_spectra("not_a_file.mgf") == 0
+
+
+def test_count_rows_valid(tmp_path):
+    peaktable = tmp_path.joinpath("peaktable.csv")
+    peaktable.write_text("id,mz\n1,100.0\n2,200.0\n")
+    assert count_rows(peaktable) == 2
+    assert count_rows(tmp_path.joinpath("missing.csv")) is None
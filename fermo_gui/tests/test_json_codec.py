@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from fermo_gui.analysis.json_codec import JsonCodec
+from fermo_gui.config.config_json import CodecJSONProvider
+
+
+@pytest.fixture(params=JsonCodec.available())
+def codec(request):
+    return JsonCodec(request.param)
+
+
+def test_roundtrip_valid(codec, tmp_path):
+    data = {"a": [1, 2.5, None, True], "b": {"c": "ö"}}
+    assert codec.loads(codec.dumps(data)) == data
+    assert codec.loads(codec.dumpb(data, indent=True)) == data
+    codec.dump(data, tmp_path.joinpath("data.json"))
+    assert codec.load(tmp_path.joinpath("data.json")) == data
+
+
+def test_dumps_compatible_valid(codec):
+    data = {2: "x", 1: {"b": 1, "a": 2}}
+    assert json.loads(codec.dumps(data, sort_keys=True)) == json.loads(
+        json.dumps(data, sort_keys=True)
+    )
+    assert codec.dumps(data, sort_keys=True).startswith('{"1"')
+
+
+def test_loads_nan_valid(codec):
+    assert codec.loads('{"a": NaN}')["a"] != codec.loads('{"a": NaN}')["a"]
+
+
+def test_loads_invalid(codec):
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{'a': 1}")
+
+
+def test_backend_invalid():
+    with pytest.raises(ValueError):
+        JsonCodec("unknown")
+
+
+def test_provider_valid(app):
+    assert isinstance(app.json, CodecJSONProvider)
+    assert app.jinja_env.policies["json.dumps_function"] == app.json.dumps
+    with app.app_context():
+        assert app.json.loads(app.json.dumps({"b": 1, "a": [1]})) == {
+            "a": [1],
+            "b": 1,
+        }
@@ -0,0 +1,56 @@
+import json
+import shutil
+
+import pytest
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.membership_index import MembershipIndex
+
+
+@pytest.fixture
+def session():
+    with open("fermo_gui/upload/example/results/out.fermo.session.json") as infile:
+        return json.load(infile)
+
+
+@pytest.fixture
+def index(tmp_path):
+    shutil.copy(
+        "fermo_gui/upload/example/results/out.fermo.session.json",
+        tmp_path.joinpath("out.fermo.session.json"),
+    )
+    store = ColumnarStore(results_dir=tmp_path)
+    store.convert()
+    return MembershipIndex(store=store)
+
+
+def test_feature_mask_valid(index, session):
+    categories = session["stats"]["groups"]["categories"]
+    f_ids = index.store.column("f_id")
+    union = set(f_ids[index.feature_mask(["C", "S"])].tolist())
+    assert union == set(categories["phylogroup"]["C"]["f_ids"]) | set(
+        categories["phylogroup"]["S"]["f_ids"]
+    )
+    every = set(f_ids[index.feature_mask(["C", "AF"], every=True)].tolist())
+    assert every == set(categories["phylogroup"]["C"]["f_ids"]) & set(
+        categories["medium"]["AF"]["f_ids"]
+    )
+
+
+def test_feature_mask_invalid(index):
+    assert not index.feature_mask(["unknown"]).any()
+    assert not index.feature_mask([]).any()
+
+
+def test_sample_mask_valid(index, session):
+    sample_ids = index.store.read_json("meta")["sample_ids"]
+    mask = index.sample_mask(["A2"])
+    assert {s for s, m in zip(sample_ids, mask, strict=True) if m} == set(
+        session["stats"]["groups"]["categories"]["phylogroup"]["A2"]["s_ids"]
+    )
+
+
+def test_sample_categories_valid(index):
+    categories = index.sample_categories()
+    assert categories["5440_5439_mod.mzXML"] == {"phylogroup": "A2", "medium": "AF"}
+    assert index.group_categories()["phylogroup"] == ["C", "A2", "S", "V2"]
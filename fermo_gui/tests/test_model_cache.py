@@ -0,0 +1,83 @@
+import importlib
+
+import pytest
+
+from fermo_gui.analysis import model_cache as model_cache_module
+from fermo_gui.analysis.model_cache import ModelCache
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def fake_load_model(path):
+        calls.append(path)
+        return object()
+
+    monkeypatch.setattr(model_cache_module, "load_model", fake_load_model)
+    return calls
+
+
+def test_load_model_cached(loads, tmp_path):
+    cache = ModelCache()
+    first = cache.load_model(tmp_path / "model.pt")
+    assert cache.stats()["setup"] == "cold"
+    cache.reset_stats()
+    assert cache.load_model(tmp_path / "model.pt") is first
+    assert len(loads) == 1
+    assert cache.stats()["setup"] == "warm"
+    assert cache.stats()["hits"] == 1
+
+
+def test_load_model_disabled(loads, tmp_path):
+    cache = ModelCache(enabled=False)
+    cache.load_model(tmp_path / "model.pt")
+    cache.reset_stats()
+    cache.load_model(tmp_path / "model.pt")
+    assert len(loads) == 2
+    assert cache.stats()["setup"] == "cold"
+
+
+def test_stats_none():
+    assert ModelCache().stats()["setup"] == "none"
+
+
+def test_install_valid(monkeypatch):
+    cache = ModelCache()
+    for name in cache.modules:
+        module = importlib.import_module(name)
+        monkeypatch.setattr(module, "load_model", module.load_model)
+    cache.install()
+    for name in cache.modules:
+        assert importlib.import_module(name).load_model == cache.load_model
+
+
+def test_preload_missing_model(loads, monkeypatch, tmp_path):
+    cache = ModelCache()
+    for name in cache.modules:
+        module = importlib.import_module(name)
+        monkeypatch.setattr(module, "load_model", module.load_model)
+    monkeypatch.setattr(
+        ModelCache, "default_model_path", staticmethod(lambda: tmp_path / "no.pt")
+    )
+    cache.preload()
+    assert cache.preloaded
+    assert loads == []
+
+
+def test_preload_valid(loads, monkeypatch, tmp_path):
+    cache = ModelCache()
+    for name in cache.modules:
+        module = importlib.import_module(name)
+        monkeypatch.setattr(module, "load_model", module.load_model)
+    path = tmp_path / "model.pt"
+    path.touch()
+    monkeypatch.setattr(ModelCache, "default_model_path", staticmethod(lambda: path))
+    cache.preload()
+    cache.load_model(path)
+    assert len(loads) == 1
+    assert cache.stats()["setup"] == "warm"
+
+
+def test_describe_valid():
+    assert "Worker setup: none" in ModelCache().describe()
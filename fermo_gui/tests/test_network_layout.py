@@ -0,0 +1,43 @@
+import pytest
+from pydantic import ValidationError
+
+from fermo_gui.analysis.network_layout import NetworkLayout
+
+
+@pytest.fixture
+def network():
+    return {
+        "elements": {
+            "nodes": [{"data": {"id": str(i), "value": i}} for i in range(1, 5)],
+            "edges": [
+                {"data": {"weight": 0.9, "source": 1, "target": 2}},
+                {"data": {"weight": 0.8, "source": 2, "target": 3}},
+                {"data": {"weight": 0.7, "source": 3, "target": 4}},
+            ],
+        }
+    }
+
+
+@pytest.mark.parametrize("algorithm", ["spring", "kamada_kawai"])
+def test_layout_valid(network, algorithm):
+    positions = NetworkLayout(algorithm=algorithm).layout(network)
+    assert set(positions) == {"1", "2", "3", "4"}
+    assert set(positions["1"]) == {"x", "y"}
+    assert positions == NetworkLayout(algorithm=algorithm).layout(network)
+
+
+def test_layout_skipped_valid(network):
+    assert NetworkLayout(algorithm="none").layout(network) is None
+    assert NetworkLayout(max_nodes=4).layout(network) is None
+
+
+def test_layout_invalid():
+    with pytest.raises(ValidationError):
+        NetworkLayout(algorithm="unknown")
+
+
+def test_layout_networks_valid(network):
+    layouts = NetworkLayout().layout_networks(
+        {"modified_cosine": {"subnetworks": {1: network}}}
+    )
+    assert set(layouts["modified_cosine"]["1"]) == {"1", "2", "3", "4"}
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from fermo_gui.analysis.json_codec import codec
+from fermo_gui.analysis.result_index import ResultIndex
+
+
+def make_job(upload_dir, job_id, content="id,mz\n1,100.0\n"):
+    job_dir = upload_dir.joinpath(job_id)
+    job_dir.mkdir(parents=True)
+    job_dir.joinpath("peaktable.csv").write_text(content)
+    params = {
+        "files": {
+            "peaktable": {
+                "filepath": str(job_dir.joinpath("peaktable.csv")),
+                "format": "mzmine3",
+            }
+        },
+        "core_modules": {"adduct_annotation": {"activate_module": True}},
+    }
+    return job_dir, params
+
+
+def complete_job(job_dir):
+    results_dir = job_dir.joinpath("results")
+    results_dir.joinpath("out.fermo.dashboard").mkdir(parents=True)
+    results_dir.joinpath("out.fermo.session.json").write_text("{}")
+    results_dir.joinpath("out.fermo.dashboard/features.json").write_text("[]")
+    return results_dir
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ResultIndex(index_dir=tmp_path.joinpath("index"), ttl=3600)
+
+
+def test_fingerprint_ignores_paths(tmp_path):
+    _, params_a = make_job(tmp_path, "job_a")
+    _, params_b = make_job(tmp_path, "job_b")
+    assert ResultIndex.fingerprint(params_a) == ResultIndex.fingerprint(params_b)
+
+
+def test_fingerprint_content_changed(tmp_path):
+    _, params_a = make_job(tmp_path, "job_a")
+    _, params_b = make_job(tmp_path, "job_b", content="id,mz\n1,100.1\n")
+    assert ResultIndex.fingerprint(params_a) != ResultIndex.fingerprint(params_b)
+
+
+def test_fingerprint_params_changed(tmp_path):
+    _, params_a = make_job(tmp_path, "job_a")
+    _, params_b = make_job(tmp_path, "job_b")
+    params_b["core_modules"]["adduct_annotation"]["activate_module"] = False
+    assert ResultIndex.fingerprint(params_a) != ResultIndex.fingerprint(params_b)
+
+
+def test_fingerprint_directory(tmp_path):
+    dir_a = tmp_path.joinpath("job_a/as_results")
+    dir_b = tmp_path.joinpath("job_b/as_results")
+    for directory in (dir_a, dir_b):
+        directory.mkdir(parents=True)
+        directory.joinpath("region.gbk").write_text("LOCUS")
+    params_a = {"files": {"as_results": {"directory_path": str(dir_a)}}}
+    params_b = {"files": {"as_results": {"directory_path": str(dir_b)}}}
+    assert ResultIndex.fingerprint(params_a) == ResultIndex.fingerprint(params_b)
+
+
+def test_lookup_hit(index, tmp_path):
+    job_dir, params = make_job(tmp_path, "job_a")
+    results_dir = complete_job(job_dir)
+    key = index.fingerprint(params)
+    index.register(key, "job_a")
+    assert index.lookup(key, tmp_path) == results_dir
+    assert codec.load(index.entry_path(key))["hits"] == 1
+    assert index.stats()["hits"] == 1
+
+
+def test_lookup_miss(index, tmp_path):
+    assert index.lookup("0" * 64, tmp_path) is None
+    assert index.stats()["misses"] == 1
+
+
+def test_lookup_expired(index, tmp_path):
+    job_dir, params = make_job(tmp_path, "job_a")
+    complete_job(job_dir)
+    key = index.fingerprint(params)
+    index.register(key, "job_a")
+    entry = codec.load(index.entry_path(key))
+    entry["created"] = time.time() - 7200
+    codec.dump(entry, index.entry_path(key))
+    assert index.lookup(key, tmp_path) is None
+    assert not index.entry_path(key).exists()
+    assert index.stats()["expired"] == 1
+
+
+def test_lookup_results_removed(index, tmp_path):
+    _, params = make_job(tmp_path, "job_a")
+    key = index.fingerprint(params)
+    index.register(key, "job_a")
+    assert index.lookup(key, tmp_path) is None
+    assert not index.entry_path(key).exists()
+
+
+def test_disabled(tmp_path):
+    index = ResultIndex(index_dir=tmp_path.joinpath("index"), ttl=0)
+    job_dir, params = make_job(tmp_path, "job_a")
+    complete_job(job_dir)
+    index.register("key", "job_a")
+    assert not index.enabled
+    assert index.lookup("key", tmp_path) is None
+    assert index.stats()["entries"] == 0
+
+
+def test_link_results(index, tmp_path):
+    source_dir, _ = make_job(tmp_path, "job_a")
+    results_dir = complete_job(source_dir)
+    task_path, _ = make_job(tmp_path, "job_b")
+    assert index.link_results(results_dir, task_path)
+    linked = task_path.joinpath("results/out.fermo.session.json")
+    assert linked.read_text() == "{}"
+    assert (
+        linked.stat().st_ino
+        == results_dir.joinpath("out.fermo.session.json").stat().st_ino
+    )
+    assert task_path.joinpath("results/out.fermo.dashboard/features.json").exists()
+    assert not task_path.joinpath(".results.tmp").exists()
@@ -1,3 +1,10 @@
+import gzip
+import json
+
+from fermo_gui.analysis.column_codec import ColumnCodec
+from fermo_gui.routes import routes_results
+
+
 def test_route_invalid(client):
     response = client.get("/abcde")
     assert response.status_code == 404
@@ -21,3 +28,252 @@ def test_contact_valid(client):
 def test_results_example_valid(client):
     response = client.get("/results/example/")
     assert response.status_code == 200
+
+
+def test_results_sample_valid(client):
+    response = client.get("/results/example/samples/5440_5439_mod.mzXML/")
+    assert response.status_code == 200
+    assert isinstance(response.get_json(), list)
+
+
+def test_results_sample_trace_level_valid(client):
+    response = client.get("/results/example/samples/5440_5439_mod.mzXML/?max_points=3")
+    assert response.status_code == 200
+    assert all(len(record["trace_rt"]) <= 3 for record in response.get_json())
+    response = client.get("/results/example/samples/5440_5439_mod.mzXML/?max_points=4")
+    assert response.status_code == 404
+
+
+def test_results_sample_binary_valid(client):
+    url = "/results/example/samples/5440_5439_mod.mzXML/?max_points=3"
+    records = client.get(url).get_json()
+    response = client.get(url, headers={"Accept": ColumnCodec.mimetype})
+    assert response.status_code == 200
+    assert response.mimetype == ColumnCodec.mimetype
+    assert "Accept" in response.vary
+    columns = ColumnCodec.decode(response.get_data())
+    assert columns["f_id"].tolist() == [record["f_id"] for record in records]
+    response = client.get(url, headers={"Accept": "*/*"})
+    assert response.mimetype == "application/json"
+
+
+def test_results_fold_overview_valid(client):
+    response = client.get("/results/example/fold_changes/phylogroup/C/V2/")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["f_id"]) == len(data["log2_fold"]) > 0
+    response = client.get("/results/example/fold_changes/phylogroup/C/unknown/")
+    assert response.status_code == 404
+
+
+def test_results_sample_invalid(client):
+    response = client.get("/results/example/samples/unknown/")
+    assert response.status_code == 404
+    response = client.get("/results/not_a_job/samples/unknown/")
+    assert response.status_code == 404
+
+
+def test_results_feature_valid(client):
+    response = client.get("/results/example/features/1/")
+    assert response.status_code == 200
+    assert response.get_json()["f_id"] == 1
+
+
+def test_results_network_invalid(client):
+    response = client.get("/results/example/networks/modified_cosine/unknown/")
+    assert response.status_code == 404
+
+
+def test_results_network_neighborhood_valid(client):
+    response = client.get(
+        "/results/example/networks/modified_cosine/neighborhood/33/?max_nodes=1000"
+    )
+    assert response.status_code == 200
+    assert response.get_json()["neighborhood"]["max_nodes"] == 250
+    response = client.get("/results/example/networks/unknown/neighborhood/33/")
+    assert response.status_code == 404
+
+
+def test_results_filter_valid(client):
+    response = client.post(
+        "/results/example/filter/",
+        json={"filters": {"exclude_blank": True}, "outputs": ["count", "samples"]},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["count"] == 102
+    assert len(response.get_json()["samples"]) == 11
+
+
+def test_results_filter_invalid(client):
+    response = client.post("/results/example/filter/", json={"filters": {"mz": 1}})
+    assert response.status_code == 400
+    response = client.post("/results/not_a_job/filter/", json={})
+    assert response.status_code == 404
+
+
+def test_results_feature_table_gzip_valid(client):
+    response = client.get(
+        "/results/example/features/", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.content_encoding == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert json.loads(gzip.decompress(response.data))["1"]["f_id"] == 1
+
+
+def test_results_feature_table_etag_valid(client):
+    response = client.get("/results/example/features/")
+    etag = response.get_etag()
+    assert etag[1] is False
+    assert response.cache_control.no_cache is True
+    response = client.get(
+        "/results/example/features/", headers={"If-None-Match": f'"{etag[0]}"'}
+    )
+    assert response.status_code == 304
+
+
+def test_results_feature_table_versioned_valid(client):
+    version = client.get("/results/example/features/").get_etag()[0].split("-")
+    response = client.get(f"/results/example/features/?v={version[0]}-{version[1]}")
+    assert response.cache_control.immutable is True
+    assert response.cache_control.max_age == 31536000
+
+
+def test_results_feature_table_accel_valid(app, client):
+    app.config["RESOURCE_ACCEL_REDIRECT"] = "/_fermo_resources/"
+    response = client.get("/results/example/features/")
+    assert response.headers["X-Accel-Redirect"] == (
+        "/_fermo_resources/example/results/out.fermo.dashboard/features.json"
+    )
+    assert response.data == b""
+
+
+def test_results_feature_table_invalid(client):
+    response = client.get("/results/not_a_job/features/")
+    assert response.status_code == 404
+
+
+def test_results_network_index_valid(client):
+    response = client.get("/results/example/networks/")
+    assert response.status_code == 200
+    assert set(response.get_json()) == {"modified_cosine", "ms2deepscore"}
+
+
+def test_results_search_valid(client):
+    response = client.get("/results/example/search/?f_id=5")
+    assert response.status_code == 200
+    assert response.json["results"][0]["f_id"] == 5
+
+
+def test_results_search_invalid(client):
+    response = client.get("/results/example/search/")
+    assert response.status_code == 400
+    response = client.get("/results/not_a_job/search/?f_id=5")
+    assert response.status_code == 404
+
+
+def test_results_compare_invalid(client):
+    response = client.get("/results/compare/?job_id=example")
+    assert response.status_code == 400
+    response = client.get("/results/compare/?job_id=example&job_id=not_a_job")
+    assert response.status_code == 404
+
+
+def test_results_status_valid(client):
+    response = client.get("/results/example/status/")
+    assert response.status_code == 200
+    assert response.json["status"] == "done"
+    assert response.json["url"] == "/results/example/"
+
+
+def fake_async_result(states):
+    class FakeAsyncResult:
+        def __init__(self, task_id, app=None):
+            self.state, self.info = states.get(task_id, ("PENDING", None))
+
+    return FakeAsyncResult
+
+
+def test_results_status_dashboard_pending(client, monkeypatch):
+    monkeypatch.setattr(
+        routes_results,
+        "AsyncResult",
+        fake_async_result({"example": ("SUCCESS", True)}),
+    )
+    response = client.get("/results/example/status/")
+    assert response.json["status"] == "running"
+    assert response.json["url"] is None
+
+
+def test_results_status_dashboard_done(client, monkeypatch):
+    monkeypatch.setattr(
+        routes_results,
+        "AsyncResult",
+        fake_async_result(
+            {"example": ("SUCCESS", True), "example.dashboard": ("SUCCESS", True)}
+        ),
+    )
+    response = client.get("/results/example/status/")
+    assert response.json["status"] == "done"
+
+
+def test_results_status_files_dashboard_pending(app, client, tmp_path):
+    results_dir = tmp_path.joinpath("job/results")
+    results_dir.mkdir(parents=True)
+    results_dir.joinpath("out.fermo.session.json").write_text("{}")
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    assert client.get("/results/job/status/").json["status"] == "running"
+    results_dir.joinpath("out.fermo.log").write_text(
+        "Could not precompute dashboard data: error\n"
+    )
+    assert client.get("/results/job/status/").json["status"] == "failed"
+
+
+def test_results_dashboard_pending(app, client, tmp_path, monkeypatch):
+    results_dir = tmp_path.joinpath("job/results")
+    results_dir.mkdir(parents=True)
+    results_dir.joinpath("out.fermo.session.json").write_text("{}")
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    dispatched = []
+    monkeypatch.setattr(routes_results, "AsyncResult", fake_async_result({}))
+    monkeypatch.setattr(
+        routes_results,
+        "dispatch_dashboard",
+        lambda job_id, task_path: dispatched.append((job_id, task_path)),
+    )
+    response = client.get("/results/job/")
+    assert response.status_code == 302
+    assert response.location == "/analysis/job_submitted/job/"
+    assert dispatched == [("job", tmp_path.joinpath("job"))]
+    response = client.get("/results/job/features/")
+    assert response.status_code == 503
+    assert response.json["status"] == "running"
+    assert response.retry_after is not None
+
+
+def test_results_status_files_running(app, client, tmp_path):
+    results_dir = tmp_path.joinpath("job/results")
+    results_dir.mkdir(parents=True)
+    results_dir.joinpath("out.fermo.log").write_text("'GeneralParser': started\n")
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    assert client.get("/results/job/status/").json["status"] == "running"
+    with open(results_dir.joinpath("out.fermo.log"), "a") as logfile:
+        logfile.write("An error occurred: error")
+    assert client.get("/results/job/status/").json["status"] == "failed"
+
+
+def test_results_status_invalid(client):
+    response = client.get("/results/not_a_job/status/")
+    assert response.status_code == 404
+
+
+def test_results_events_valid(client):
+    response = client.get("/results/example/events/")
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert b'"status":' in response.data and b"/results/example/" in response.data
+
+
+def test_results_events_invalid(client):
+    response = client.get("/results/not_a_job/events/")
+    assert response.status_code == 404
@@ -0,0 +1,83 @@
+import json
+import shutil
+
+import pytest
+from pydantic import ValidationError
+
+from fermo_gui.analysis.columnar_store import ColumnarStore
+from fermo_gui.analysis.search_index import SearchIndex, SearchQuery
+
+
+@pytest.fixture
+def session():
+    with open("fermo_gui/upload/example/results/out.fermo.session.json") as infile:
+        return json.load(infile)
+
+
+@pytest.fixture
+def index(tmp_path):
+    shutil.copy(
+        "fermo_gui/upload/example/results/out.fermo.session.json",
+        tmp_path.joinpath("out.fermo.session.json"),
+    )
+    store = ColumnarStore(results_dir=tmp_path)
+    store.convert()
+    return SearchIndex(store=store)
+
+
+def found(index, **query):
+    return [entry["f_id"] for entry in index.search(SearchQuery(**query))["results"]]
+
+
+def test_search_f_id_valid(index, session):
+    result = index.search(SearchQuery(f_id=5))
+    assert result["total"] == 1
+    assert (
+        result["results"][0]["samples"] == session["general_features"]["5"]["samples"]
+    )
+    assert found(index, f_id=100000) == []
+
+
+def test_search_mz_valid(index, session):
+    expected = {
+        int(f_id)
+        for f_id, g_info in session["general_features"].items()
+        if abs(g_info["mz"] - 261.1439) <= 0.01
+    }
+    hits = found(index, mz=261.1439, da=0.01)
+    assert set(hits) == expected
+    assert hits[0] == 4
+    assert set(found(index, mz=261.1439, ppm=5)) <= expected
+
+
+def test_search_rt_valid(index, session):
+    expected = {
+        int(f_id)
+        for f_id, g_info in session["general_features"].items()
+        if abs(g_info["rt"] - 5.57) <= 0.1
+    }
+    assert set(found(index, rt=5.57)) == expected
+
+
+def test_search_text_valid(index, session):
+    expected = {
+        int(f_id)
+        for f_id, g_info in session["general_features"].items()
+        if any(
+            "alkaloids" in (match.get("npc_class") or "").lower()
+            for match in (g_info.get("annotations") or {}).get("matches", [])
+        )
+    }
+    assert set(found(index, q="alkaloids")) == expected
+    assert set(found(index, q="ALKAL")) == expected
+    assert found(index, q="alkaloids", rt=100.0) == []
+    assert len(found(index, q="[M+H]+")) > 0
+
+
+def test_search_query_invalid():
+    with pytest.raises(ValidationError):
+        SearchQuery()
+    with pytest.raises(ValidationError):
+        SearchQuery(q="  ")
+    with pytest.raises(ValidationError):
+        SearchQuery(f_id=1, limit=0)
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from fermo_gui.analysis.session_cache import SessionCache
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    path = tmp_path.joinpath("out.fermo.session.json")
+    path.write_text('{"a": 1}')
+    return path
+
+
+def test_get_or_build_valid(session_file):
+    cache = SessionCache(max_bytes=1000)
+    assert cache.get_or_build("job", "session", session_file, lambda: {"a": 1}) == {
+        "a": 1
+    }
+    assert cache.get_or_build("job", "session", session_file, lambda: {"a": 2}) == {
+        "a": 1
+    }
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["local_hits"] == 1
+
+
+def test_get_or_build_stale_valid(session_file):
+    cache = SessionCache(max_bytes=1000)
+    cache.get_or_build("job", "session", session_file, lambda: {"a": 1})
+    session_file.write_text('{"a": 22}')
+    os.utime(session_file, ns=(1, 1))
+    assert cache.get_or_build("job", "session", session_file, lambda: {"a": 22}) == {
+        "a": 22
+    }
+
+
+def test_get_or_build_several_files_valid(session_file, tmp_path):
+    other_file = tmp_path.joinpath("other.json")
+    other_file.write_text('{"b": 1}')
+    cache = SessionCache(max_bytes=1000)
+    paths = [session_file, other_file]
+    assert cache.get_stamp(paths)[1] == 16
+    cache.get_or_build("a,b", "comparison", paths, lambda: {"c": 1})
+    other_file.write_text('{"b": 2}')
+    os.utime(other_file, ns=(1, 1))
+    assert cache.get_or_build("a,b", "comparison", paths, lambda: {"c": 2}) == {"c": 2}
+
+
+def test_get_or_build_invalid(tmp_path):
+    cache = SessionCache(max_bytes=1000)
+    with pytest.raises(FileNotFoundError):
+        cache.get_or_build("job", "session", tmp_path.joinpath("x"), dict)
+
+
+def test_eviction_valid(session_file):
+    cache = SessionCache(max_bytes=20)
+    cache.get_or_build("job1", "session", session_file, lambda: {"a": 1})
+    cache.get_or_build("job2", "session", session_file, lambda: {"a": 1})
+    cache.get_or_build("job3", "session", session_file, lambda: {"a": 1})
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_local("job1", "session", cache.get_stamp(session_file)) is None
+
+
+def test_invalidate_valid(session_file):
+    cache = SessionCache(max_bytes=1000)
+    cache.get_or_build("job", "session", session_file, lambda: {"a": 1})
+    cache.get_or_build("job", "dashboard", session_file, lambda: {"b": 1})
+    cache.invalidate("job")
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_redis_unavailable_valid(session_file):
+    cache = SessionCache(max_bytes=1000, redis_url="redis://localhost:1")
+    assert cache.get_or_build("job", "session", session_file, lambda: {"a": 1}) == {
+        "a": 1
+    }
+    assert cache.stats()["redis_errors"] == 2
@@ -0,0 +1,64 @@
+import io
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from fermo_gui.analysis.artifact_manager import ArtifactManager
+from fermo_gui.analysis.session_processor import SessionProcessor
+from fermo_gui.analysis.session_validator import TrustedSessionRegistry
+
+EXAMPLE = Path("fermo_gui/upload/example/results/out.fermo.session.json")
+
+
+def create_processor(tmp_path, content, online=False, trusted_sessions=None):
+    task_dir = tmp_path.joinpath("job").joinpath("results")
+    task_dir.mkdir(parents=True)
+    form = SimpleNamespace(
+        session_file=SimpleNamespace(
+            data=FileStorage(stream=io.BytesIO(content), filename="session.json")
+        )
+    )
+    return SessionProcessor(
+        task_dir=task_dir,
+        form=form,
+        online=online,
+        trusted_sessions=trusted_sessions,
+    )
+
+
+def test_process_forms_session_valid(tmp_path):
+    processor = create_processor(tmp_path, EXAMPLE.read_bytes())
+    processor.run_processor()
+    assert processor.task_dir.joinpath("out.fermo.session.json").read_bytes() == (
+        EXAMPLE.read_bytes()
+    )
+    with open(tmp_path.joinpath("job").joinpath("job.parameters.json")) as infile:
+        assert "files" in json.load(infile)
+    assert ArtifactManager(results_dir=processor.task_dir).is_current() is False
+
+
+def test_process_forms_session_size_invalid(tmp_path):
+    processor = create_processor(tmp_path, EXAMPLE.read_bytes(), online=True)
+    processor.maxsize_file = 1000
+    with pytest.raises(ValueError, match="too large"):
+        processor.run_processor()
+
+
+def test_process_forms_session_format_invalid(tmp_path):
+    processor = create_processor(tmp_path, b'{"metadata": 1}')
+    with pytest.raises(ValueError, match="invalid format"):
+        processor.run_processor()
+
+
+def test_save_file_digest_valid(tmp_path):
+    registry = TrustedSessionRegistry(
+        registry_dir=tmp_path.joinpath("trusted"), secret_key="test"  # noqa: S106
+    )
+    processor = create_processor(
+        tmp_path, EXAMPLE.read_bytes(), trusted_sessions=registry
+    )
+    _, digest = processor.save_file(processor.form.session_file.data)
+    assert digest == registry.digest(EXAMPLE)
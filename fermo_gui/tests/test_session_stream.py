@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from fermo_gui.analysis.session_stream import SessionStreamReader
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    path = tmp_path.joinpath("session.json")
+    path.write_text(
+        json.dumps(
+            {
+                "stats": {"samples": ["s1", "s2"], "value": 1.25},
+                "samples": {"s1": {"f": [1, 2]}, "s2": {"f": []}},
+                "empty": {},
+                "tail": 12345,
+            },
+            indent=2,
+        )
+    )
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1048576])
+def test_read_valid(session_file, chunk_size):
+    items = []
+    reader = SessionStreamReader(path=session_file, chunk_size=chunk_size)
+    sections = reader.read({"samples": lambda k, v: items.append((k, v))})
+    assert items == [("s1", {"f": [1, 2]}), ("s2", {"f": []})]
+    assert sections == {
+        "stats": {"samples": ["s1", "s2"], "value": 1.25},
+        "empty": {},
+        "tail": 12345,
+    }
+    assert reader.streamed == ["samples"]
+
+
+def test_read_invalid(tmp_path):
+    path = tmp_path.joinpath("session.json")
+    path.write_text('{"stats": {"samples": []} "samples": {}}')
+    with pytest.raises(ValueError):
+        SessionStreamReader(path=path, chunk_size=4).read({})
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from fermo_gui.analysis.json_codec import codec
+from fermo_gui.analysis.session_processor import SessionProcessor
+from fermo_gui.analysis.session_validator import (
+    TrustedSessionRegistry,
+    get_validator,
+    validate_session,
+)
+
+EXAMPLE = "fermo_gui/upload/example/results/out.fermo.session.json"
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TrustedSessionRegistry(
+        registry_dir=tmp_path.joinpath("trusted"), secret_key="test"  # noqa: S106
+    )
+
+
+def test_get_validator_cached_valid():
+    assert get_validator() is get_validator()
+
+
+def test_validate_session_valid():
+    validate_session(codec.load(EXAMPLE))
+
+
+def test_validate_session_invalid():
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        validate_session({"metadata": 1})
+
+
+def test_registry_valid(registry, tmp_path):
+    assert registry.is_trusted(EXAMPLE) is False
+    registry.register(EXAMPLE)
+    assert registry.is_trusted(EXAMPLE) is True
+    modified = tmp_path.joinpath("session.json")
+    modified.write_bytes(Path(EXAMPLE).read_bytes() + b" ")
+    assert registry.is_trusted(modified) is False
+
+
+def test_registry_key_valid(registry):
+    registry.register(EXAMPLE)
+    other = TrustedSessionRegistry(
+        registry_dir=registry.registry_dir, secret_key="other"  # noqa: S106
+    )
+    assert other.is_trusted(EXAMPLE) is False
+
+
+def test_verify_session_format_trusted_valid(registry, tmp_path):
+    invalid = tmp_path.joinpath("session.json")
+    invalid.write_text('{"metadata": 1}')
+    with pytest.raises(ValueError):
+        SessionProcessor.verify_session_format(invalid, registry)
+    registry.register(invalid)
+    SessionProcessor.verify_session_format(invalid, registry)